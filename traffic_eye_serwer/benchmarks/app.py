@@ -0,0 +1,99 @@
+"""Module starting the API in the benchmark process.
+
+The app is imported from `traffic_signs_detection` and run from that
+directory, so `.env`, the model path and the outputs resolve as they do
+for `uvicorn main:app`.
+"""
+
+import os
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Iterable, Iterator
+
+from benchmarks import stub_model
+
+APP_DIR = Path(__file__).resolve().parent.parent / "traffic_signs_detection"
+READY_TIMEOUT_SECONDS = 600
+
+
+def _in_memory_repository() -> Any:
+    from core.config_model import class_names
+    from core.domain.roadsign import RoadSign
+    from core.repositories.iroadsign import IRoadSignRepository
+
+    class InMemoryRoadSignRepository(IRoadSignRepository):
+        """A class serving a generated catalogue with every class of the model."""
+
+        def __init__(self) -> None:
+            self.road_signs = {
+                name: RoadSign(id=name, name=name, description=f"Road sign {name}", photo_url=f"/photos/{name}.png")
+                for name in class_names
+            }
+
+        async def get_road_sign_by_id(self, road_sign_id: str) -> Any | None:
+            return self.road_signs.get(road_sign_id)
+
+        async def get_road_signs_by_ids(self, road_sign_ids: Iterable[str]) -> dict[str, Any]:
+            return {road_sign_id: self.road_signs[road_sign_id] for road_sign_id in road_sign_ids if road_sign_id in self.road_signs}
+
+        async def get_all_road_signs(self) -> Iterable[Any]:
+            return list(self.road_signs.values())
+
+    return InMemoryRoadSignRepository()
+
+
+@contextmanager
+def start_app(stub: bool = False, stub_latency: float = 0.0, database: bool = False) -> Iterator[Any]:
+    """The function starting the app in process and waiting until its model is ready.
+
+    The result cache is disabled and the `Server-Timing` header enabled,
+    settings already present in the environment are kept.
+
+    Args:
+        stub (bool): Whether to replace the YOLO model with the stub model.
+        stub_latency (float): The seconds the stub model spends per image.
+        database (bool): Whether to read the signs from the database of `.env` instead of a generated catalogue.
+
+    Yields:
+        TestClient: The client sending requests to the app.
+    """
+
+    os.environ.setdefault("TIMING_HEADER", "true")
+    os.environ.setdefault("RESULT_CACHE_ENTRIES", "0")
+    os.environ.setdefault("RESULT_CACHE_DIR", "")
+    if stub:
+        # The stub is only installed in this process
+        os.environ["INFERENCE_EXECUTOR"] = "thread"
+        os.environ["MODEL_WORKERS"] = "0"
+        os.environ["MODEL_BACKEND"] = "torch"
+        stub_model.install(stub_latency)
+    if not database:
+        for name in ("DB_HOST", "DB_NAME", "DB_USER", "DB_PASSWORD"):
+            os.environ.setdefault(name, "benchmark")
+        os.environ.setdefault("DB_PORT", "5432")
+
+    os.chdir(APP_DIR)
+    sys.path.insert(0, str(APP_DIR))
+
+    from fastapi.testclient import TestClient
+
+    import main
+
+    if not database:
+        async def skip() -> None:
+            return None
+
+        main.init_db = skip
+        main.database.connect = skip
+        main.database.disconnect = skip
+        main.container.road_sign_db_repository.override(_in_memory_repository())
+
+    with TestClient(main.app) as client:
+        deadline = time.monotonic() + READY_TIMEOUT_SECONDS
+        while (response := client.get("/health/ready")).status_code != 200:
+            if response.json().get("status") == "failed" or time.monotonic() > deadline:
+                raise RuntimeError(f"The model did not get ready: {response.json()}")
+            time.sleep(0.1)
+        yield client
@@ -0,0 +1,170 @@
+"""Module generating the synthetic, reproducible image and video corpus of the benchmarks."""
+
+from pathlib import Path
+from typing import List
+
+import cv2
+import numpy as np
+
+# BGR colours of the painted signs
+RED = (40, 40, 220)
+BLUE = (200, 90, 20)
+WHITE = (245, 245, 245)
+YELLOW = (40, 200, 240)
+
+
+def parse_resolution(text: str) -> tuple[int, int]:
+    """The function parsing a `WIDTHxHEIGHT` resolution.
+
+    Args:
+        text (str): The resolution, e.g. `1920x1080`.
+
+    Raises:
+        ValueError: If the text is not a resolution.
+
+    Returns:
+        tuple[int, int]: The width and the height.
+    """
+
+    width, _, height = text.lower().partition("x")
+    if not width.isdigit() or not height.isdigit():
+        raise ValueError(f"Invalid resolution: {text}")
+    return int(width), int(height)
+
+
+def background(width: int, height: int, rng: np.random.Generator) -> np.ndarray:
+    """The function painting a street-like background with sky, facades and asphalt.
+
+    Noise keeps the JPEG size and the decode cost close to a real photo.
+
+    Args:
+        width (int): The width of the image.
+        height (int): The height of the image.
+        rng (np.random.Generator): The source of the noise.
+
+    Returns:
+        np.ndarray: The BGR background.
+    """
+
+    img = np.empty((height, width, 3), dtype=np.uint8)
+    horizon = height // 3
+    img[:horizon] = np.linspace((230, 200, 160), (200, 170, 130), horizon, dtype=np.uint8)[:, None]
+    img[horizon:height * 2 // 3] = (120, 130, 140)
+    img[height * 2 // 3:] = (70, 70, 70)
+    noise = rng.integers(-12, 13, (height, width, 1), dtype=np.int16)
+    return np.clip(img.astype(np.int16) + noise, 0, 255).astype(np.uint8)
+
+
+def paint_sign(img: np.ndarray, kind: int, center: tuple[int, int], size: int) -> None:
+    """The function painting a simple traffic sign in place.
+
+    Args:
+        img (np.ndarray): The BGR image.
+        kind (int): The shape, 0 a prohibition, 1 a mandatory, 2 a warning and 3 an information sign.
+        center (tuple[int, int]): The centre of the sign.
+        size (int): The diameter of the sign in pixels.
+    """
+
+    x, y = center
+    radius = max(4, size // 2)
+    cv2.line(img, (x, y + radius), (x, y + radius * 4), (90, 90, 90), max(2, radius // 6))
+    if kind == 0:
+        cv2.circle(img, center, radius, RED, -1)
+        cv2.circle(img, center, int(radius * 0.75), WHITE, -1)
+    elif kind == 1:
+        cv2.circle(img, center, radius, BLUE, -1)
+        cv2.arrowedLine(img, (x, y + radius // 2), (x, y - radius // 2), WHITE, max(2, radius // 5))
+    elif kind == 2:
+        triangle = np.array([(x, y - radius), (x - radius, y + radius), (x + radius, y + radius)], dtype=np.int32)
+        cv2.fillPoly(img, [triangle], RED)
+        cv2.fillPoly(img, [((triangle - (x, y)) * 0.7).astype(np.int32) + (x, y)], YELLOW)
+    else:
+        cv2.rectangle(img, (x - radius, y - radius), (x + radius, y + radius), BLUE, -1)
+        cv2.rectangle(img, (x - radius // 2, y - radius // 2), (x + radius // 2, y + radius // 2), WHITE, -1)
+
+
+def synthetic_image(width: int, height: int, seed: int, signs: int = 6) -> np.ndarray:
+    """The function generating a street image with signs of various sizes.
+
+    Args:
+        width (int): The width of the image.
+        height (int): The height of the image.
+        seed (int): The seed, the same seed gives the same image.
+        signs (int): The number of painted signs.
+
+    Returns:
+        np.ndarray: The BGR image.
+    """
+
+    rng = np.random.default_rng(seed)
+    img = background(width, height, rng)
+    for _ in range(signs):
+        size = int(rng.uniform(0.015, 0.08) * width)
+        x = int(rng.uniform(size, width - size))
+        y = int(rng.uniform(size, height * 0.6))
+        paint_sign(img, int(rng.integers(4)), (x, y), size)
+    return img
+
+
+def image_corpus(resolution: tuple[int, int], count: int, seed: int = 0, quality: int = 90) -> List[bytes]:
+    """The function generating distinct JPEG images, so no request is served from the result cache.
+
+    Args:
+        resolution (tuple[int, int]): The width and the height of the images.
+        count (int): The number of images.
+        seed (int): The seed of the first image.
+        quality (int): The JPEG quality.
+
+    Returns:
+        List[bytes]: The encoded images.
+    """
+
+    width, height = resolution
+    images = []
+    for index in range(count):
+        ok, encoded = cv2.imencode(".jpg", synthetic_image(width, height, seed + index), [cv2.IMWRITE_JPEG_QUALITY, quality])
+        if not ok:
+            raise RuntimeError(f"Failed to encode a {width}x{height} image")
+        images.append(encoded.tobytes())
+    return images
+
+
+def synthetic_video(path: Path, resolution: tuple[int, int], frames: int, seed: int = 0, fps: float = 30) -> Path:
+    """The function writing a drive past signs which grow as they approach.
+
+    Args:
+        path (Path): The path of the `.mp4` file.
+        resolution (tuple[int, int]): The width and the height of the frames.
+        frames (int): The number of frames.
+        seed (int): The seed, the same seed gives the same video.
+        fps (float): The frame rate.
+
+    Raises:
+        RuntimeError: If the video cannot be written.
+
+    Returns:
+        Path: The written video.
+    """
+
+    width, height = resolution
+    rng = np.random.default_rng(seed)
+    scene = background(width, height, rng)
+    signs = [(int(rng.integers(4)), rng.uniform(0.1, 0.9), rng.uniform(0.1, 0.5), rng.uniform(0, 1)) for _ in range(4)]
+
+    out = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"mp4v"), fps, (width, height))
+    if not out.isOpened():
+        raise RuntimeError(f"Failed to create video {path}")
+    try:
+        for index in range(frames):
+            frame = np.roll(scene, -index * max(1, width // 200), axis=1)
+            for kind, x, y, phase in signs:
+                # Each sign drifts outwards and grows over a cycle of 90 frames
+                progress = (index / 90 + phase) % 1
+                center_x = int((0.5 + (x - 0.5) * (1 + progress)) * width)
+                size = int((0.02 + 0.06 * progress) * width)
+                if size < center_x < width - size:
+                    paint_sign(frame, kind, (center_x, int(y * height)), size)
+            out.write(frame)
+    finally:
+        out.release()
+    return path
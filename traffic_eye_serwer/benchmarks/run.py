@@ -0,0 +1,397 @@
+"""Benchmark of the image and video detection throughput of the API.
+
+Run from the `traffic_eye_serwer` directory:
+
+    python -m benchmarks.run --stub --output stub.json
+    python -m benchmarks.run --image-resolutions 1920x1080,4032x3024 --concurrency 1,4 --output model.json
+    python -m benchmarks.run --url http://localhost:8000 --output server.json
+
+Without `--url` the app runs in this process, with the local model or the
+stub model, and the peak RSS of the process is reported. The stage
+breakdown comes from the `Server-Timing` header, a remote server needs
+`TIMING_HEADER=true` to report it.
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+import numpy as np
+
+from benchmarks.corpus import image_corpus, parse_resolution, synthetic_video
+
+PERCENTILES = (50, 95, 99)
+
+
+@dataclass
+class Sample:
+    """A class representing the outcome of one request."""
+    status: int
+    latency: float
+    stages: Dict[str, float] = field(default_factory=dict)  # Milliseconds reported by the server
+    frames: int = 0
+    output: str = ""  # The name of the annotated file
+
+
+def parse_server_timing(header: str | None) -> Dict[str, float]:
+    """The function reading the stage durations of a `Server-Timing` header.
+
+    Args:
+        header (str | None): The header, e.g. `decode;dur=12.5, inference;dur=80.1`.
+
+    Returns:
+        Dict[str, float]: The duration of every stage in milliseconds.
+    """
+
+    stages = {}
+    for entry in (header or "").split(","):
+        name, _, parameters = entry.strip().partition(";")
+        for parameter in parameters.split(";"):
+            key, _, value = parameter.strip().partition("=")
+            if key == "dur" and name:
+                stages[name] = float(value)
+    return stages
+
+
+def peak_rss_mb() -> float | None:
+    """The function getting the peak resident memory of this process.
+
+    Returns:
+        float | None: The peak RSS in MiB, None if it cannot be read on this platform.
+    """
+
+    try:
+        import resource
+
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Kilobytes on Linux, bytes on macOS
+        return round(peak / 1024 / (1024 if sys.platform == "darwin" else 1), 1)
+    except ImportError:
+        pass
+    try:
+        import psutil
+
+        return round(psutil.Process().memory_info().peak_wset / 1024 / 1024, 1)
+    except (ImportError, AttributeError):
+        return None
+
+
+def distribution(values: List[float]) -> Dict[str, float] | None:
+    """The function summarising values by their mean, maximum and percentiles.
+
+    Args:
+        values (List[float]): The values.
+
+    Returns:
+        Dict[str, float] | None: The summary, None if there are no values.
+    """
+
+    if not values:
+        return None
+    summary = {f"p{q}": round(float(np.percentile(values, q)), 2) for q in PERCENTILES}
+    summary["mean"] = round(float(np.mean(values)), 2)
+    summary["max"] = round(float(np.max(values)), 2)
+    return summary
+
+
+def post(client: Any, path: str, content: bytes, filename: str, media_type: str, params: dict) -> Sample:
+    """The function sending a file to a detection endpoint.
+
+    Args:
+        client (Any): The httpx or test client.
+        path (str): The path of the endpoint.
+        content (bytes): The file.
+        filename (str): The name of the file.
+        media_type (str): The MIME type of the file.
+        params (dict): The query parameters.
+
+    Returns:
+        Sample: The status, latency and stage timings of the request.
+    """
+
+    started = time.perf_counter()
+    response = client.post(path, params=params, files={"file": (filename, content, media_type)})
+    latency = time.perf_counter() - started
+
+    sample = Sample(response.status_code, latency, parse_server_timing(response.headers.get("server-timing")))
+    if response.status_code < 300:
+        body = response.json()
+        sample.frames = body.get("frames_decoded") or 0
+        sample.output = Path(body.get("file_url") or "").name
+    return sample
+
+
+def run_scenario(send: Callable[[bytes], Sample], corpus: List[bytes], concurrency: int) -> tuple[List[Sample], float]:
+    """The function sending every file of the corpus from a number of concurrent clients.
+
+    Args:
+        send (Callable[[bytes], Sample]): The function sending one file.
+        corpus (List[bytes]): The files, each sent once.
+        concurrency (int): The number of clients sending at the same time.
+
+    Returns:
+        tuple[List[Sample], float]: The samples and the wall time of the scenario in seconds.
+    """
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as clients:
+        samples = list(clients.map(send, corpus))
+    return samples, time.perf_counter() - started
+
+
+def summarise(kind: str, resolution: str, concurrency: int, samples: List[Sample], elapsed: float, in_process: bool) -> dict:
+    """The function building the report of a scenario.
+
+    Args:
+        kind (str): `image` or `video`.
+        resolution (str): The resolution of the corpus.
+        concurrency (int): The number of concurrent clients.
+        samples (List[Sample]): The outcomes of the requests.
+        elapsed (float): The wall time of the scenario in seconds.
+        in_process (bool): Whether the app ran in this process, so its memory can be reported.
+
+    Returns:
+        dict: The latency percentiles, throughput, stage breakdown and memory of the scenario.
+    """
+
+    succeeded = [sample for sample in samples if sample.status < 300]
+    stage_names = sorted({name for sample in succeeded for name in sample.stages})
+    report = {
+        "kind": kind,
+        "resolution": resolution,
+        "concurrency": concurrency,
+        "requests": len(samples),
+        "succeeded": len(succeeded),
+        "rejected": sum(sample.status == 503 for sample in samples),
+        "failed": sum(sample.status >= 300 and sample.status != 503 for sample in samples),
+        "elapsed_seconds": round(elapsed, 3),
+        "latency_ms": distribution([sample.latency * 1000 for sample in succeeded]),
+        "throughput": {"requests_per_second": round(len(succeeded) / elapsed, 3) if elapsed > 0 else None},
+        "stages_ms": {
+            name: distribution([sample.stages[name] for sample in succeeded if name in sample.stages])
+            for name in stage_names
+        },
+        "peak_rss_mb": peak_rss_mb() if in_process else None,
+    }
+    if kind == "image":
+        report["throughput"]["images_per_second"] = report["throughput"]["requests_per_second"]
+    else:
+        frames = sum(sample.frames for sample in succeeded)
+        report["frames"] = frames
+        report["throughput"]["frames_per_second"] = round(frames / elapsed, 3) if elapsed > 0 else None
+    return report
+
+
+def git_commit() -> str | None:
+    """The function getting the commit the benchmark runs on.
+
+    Returns:
+        str | None: The commit hash, None outside of a git checkout.
+    """
+
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=Path(__file__).resolve().parent,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout.strip()
+
+
+def environment(args: argparse.Namespace) -> dict:
+    """The function describing the machine and the settings the benchmark ran with.
+
+    Args:
+        args (argparse.Namespace): The arguments of the benchmark.
+
+    Returns:
+        dict: The description stored with the results.
+    """
+
+    description = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "commit": git_commit(),
+        "target": args.url or "in-process",
+        "model": "stub" if args.stub else "local",
+        "stub_latency_ms": args.stub_latency_ms if args.stub else None,
+        "profile": args.profile,
+        "render": args.render,
+        "seed": args.seed,
+    }
+    if not args.url:
+        from config import config
+
+        description["config"] = {
+            name: getattr(config, name)
+            for name in (
+                "MODEL_PATH", "MODEL_BACKEND", "MODEL_PRECISION", "INFERENCE_EXECUTOR", "INFERENCE_WORKERS",
+                "MODEL_WORKERS", "DETECTION_BATCH_SIZE", "MICRO_BATCHING", "REDUCED_DECODE", "TILE_PREFILTER",
+                "VIDEO_KEYFRAME_INTERVAL", "VIDEO_INFERENCE_BATCH", "IMAGE_CONCURRENCY_LIMIT", "VIDEO_CONCURRENCY_LIMIT",
+            )
+        }
+    return description
+
+
+def remove_outputs(samples: List[Sample]) -> None:
+    """The function removing the annotated files written by the benchmark requests.
+
+    Args:
+        samples (List[Sample]): The outcomes of the requests, run from the app directory.
+    """
+
+    for sample in samples:
+        if sample.output:
+            Path("outputs", sample.output).unlink(missing_ok=True)
+            for suffix in (".src", ".npy", ".json"):
+                Path("temp", "render", f"{sample.output}{suffix}").unlink(missing_ok=True)
+
+
+def benchmark(client: Any, args: argparse.Namespace) -> List[dict]:
+    """The function running every scenario against the app.
+
+    Args:
+        client (Any): The httpx or test client.
+        args (argparse.Namespace): The arguments of the benchmark.
+
+    Returns:
+        List[dict]: The report of every scenario.
+    """
+
+    params = {"render": args.render}
+    if args.profile:
+        params["profile"] = args.profile
+    concurrency_levels = [int(level) for level in args.concurrency.split(",")]
+    in_process = args.url is None
+    reports = []
+    written = []
+    # Every scenario gets new files, a remote server cannot answer from its result cache
+    seed = args.seed
+
+    def send_image(content: bytes) -> Sample:
+        return post(client, "/detection/detect-signs/", content, "benchmark.jpg", "image/jpeg", params)
+
+    def send_video(content: bytes) -> Sample:
+        return post(client, "/detection/detect-signs-video/", content, "benchmark.mp4", "video/mp4", params)
+
+    try:
+        for resolution in filter(None, args.image_resolutions.split(",")):
+            size = parse_resolution(resolution)
+            for _ in range(args.warmup):
+                written.append(send_image(image_corpus(size, 1, seed)[0]))
+                seed += 1
+            for concurrency in concurrency_levels:
+                corpus = image_corpus(size, max(args.images, concurrency), seed)
+                seed += len(corpus)
+                samples, elapsed = run_scenario(send_image, corpus, concurrency)
+                written.extend(samples)
+                reports.append(summarise("image", resolution, concurrency, samples, elapsed, in_process))
+                log_report(reports[-1])
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            for resolution in filter(None, args.video_resolutions.split(",")):
+                size = parse_resolution(resolution)
+                for concurrency in concurrency_levels:
+                    corpus = []
+                    for _ in range(max(args.videos, concurrency)):
+                        path = synthetic_video(Path(temp_dir) / f"{seed}.mp4", size, args.video_frames, seed)
+                        corpus.append(path.read_bytes())
+                        path.unlink()
+                        seed += 1
+                    samples, elapsed = run_scenario(send_video, corpus, concurrency)
+                    written.extend(samples)
+                    reports.append(summarise("video", resolution, concurrency, samples, elapsed, in_process))
+                    log_report(reports[-1])
+    finally:
+        if in_process and not args.keep_outputs:
+            remove_outputs(written)
+    return reports
+
+
+def log_report(report: dict) -> None:
+    """The function printing a one-line summary of a scenario.
+
+    Args:
+        report (dict): The report built by `summarise`.
+    """
+
+    latency = report["latency_ms"] or {}
+    throughput = report["throughput"].get("images_per_second", report["throughput"].get("frames_per_second"))
+    unit = "images/s" if report["kind"] == "image" else "frames/s"
+    print(
+        f"{report['kind']:5} {report['resolution']:>9} x{report['concurrency']:<3}"
+        f" ok {report['succeeded']}/{report['requests']}"
+        f"  p50 {latency.get('p50')} ms  p95 {latency.get('p95')} ms  p99 {latency.get('p99')} ms"
+        f"  {throughput} {unit}  peak RSS {report['peak_rss_mb']} MiB",
+        file=sys.stderr,
+    )
+
+
+def parse_args(argv: List[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark the image and video detection throughput of the API.")
+    parser.add_argument("--url", help="The address of a running server, the app is started in process if not given.")
+    parser.add_argument("--stub", action="store_true", help="Replace the YOLO model with a stub, in process only.")
+    parser.add_argument("--stub-latency-ms", type=float, default=20, help="The time the stub model spends per image.")
+    parser.add_argument("--database", action="store_true", help="Read the signs from the database of .env, in process only.")
+    parser.add_argument("--image-resolutions", default="1280x720,1920x1080,4032x3024", help="Comma-separated WIDTHxHEIGHT, empty to skip images.")
+    parser.add_argument("--images", type=int, default=8, help="The number of images sent per scenario.")
+    parser.add_argument("--video-resolutions", default="640x360,1280x720", help="Comma-separated WIDTHxHEIGHT, empty to skip videos.")
+    parser.add_argument("--videos", type=int, default=2, help="The number of videos sent per scenario.")
+    parser.add_argument("--video-frames", type=int, default=90, help="The number of frames of every video.")
+    parser.add_argument("--concurrency", default="1,4", help="Comma-separated numbers of concurrent clients.")
+    parser.add_argument("--warmup", type=int, default=1, help="The number of unmeasured images sent per resolution.")
+    parser.add_argument("--profile", help="The detection profile, the default one of the server if not given.")
+    parser.add_argument("--render", default="eager", choices=["eager", "lazy", "none"], help="When the annotated files are rendered.")
+    parser.add_argument("--seed", type=int, default=0, help="The seed of the synthetic corpus.")
+    parser.add_argument("--keep-outputs", action="store_true", help="Keep the annotated files written by the requests.")
+    parser.add_argument("--output", help="The JSON file of the results, printed if not given.")
+    return parser.parse_args(argv)
+
+
+def main(argv: List[str] | None = None) -> None:
+    args = parse_args(argv)
+    output = Path(args.output).resolve() if args.output else None
+    started = datetime.now(timezone.utc)
+
+    if args.url:
+        import httpx
+
+        with httpx.Client(base_url=args.url, timeout=None) as client:
+            reports = benchmark(client, args)
+    else:
+        from benchmarks.app import start_app
+
+        with start_app(args.stub, args.stub_latency_ms / 1000, args.database) as client:
+            reports = benchmark(client, args)
+
+    results = {
+        "started": started.isoformat(),
+        "duration_seconds": round((datetime.now(timezone.utc) - started).total_seconds(), 3),
+        "environment": environment(args),
+        "scenarios": reports,
+    }
+    text = json.dumps(results, indent=2)
+    if output:
+        output.write_text(text)
+        print(f"Results written to {output}", file=sys.stderr)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""Module providing a stand-in for the YOLO model, for benchmarks without the weights or torch.
+
+The stub finds the saturated red and blue blobs the synthetic corpus paints
+as signs, so the merging, tracking, drawing and catalogue lookups get real
+work. A fixed delay per image stands in for the forward pass.
+"""
+
+import sys
+import time
+import types
+from typing import Any, List
+
+import cv2
+import numpy as np
+
+# Class ids reported for red and blue signs, `B-1` and `C-2`
+RED_CLASS_ID = 28
+BLUE_CLASS_ID = 51
+MIN_BLOB_AREA = 48
+
+
+class _Tensor:
+    """A numpy array answering the `.cpu().numpy()` calls made on ultralytics tensors."""
+
+    def __init__(self, array: np.ndarray) -> None:
+        self.array = array
+
+    def cpu(self) -> "_Tensor":
+        return self
+
+    def numpy(self) -> np.ndarray:
+        return self.array
+
+
+class _Boxes:
+    def __init__(self, detections: np.ndarray) -> None:
+        self.xyxy = _Tensor(detections[:, :4])
+        self.cls = _Tensor(detections[:, 4])
+        self.conf = _Tensor(detections[:, 5])
+
+    def __len__(self) -> int:
+        return len(self.xyxy.array)
+
+
+class _Result:
+    def __init__(self, detections: np.ndarray) -> None:
+        self.boxes = _Boxes(detections)
+
+
+class StubModel:
+    """A class answering like a YOLO detection model."""
+
+    # Seconds spent per image, set by the benchmark before the model is loaded
+    latency_per_image = 0.0
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        """The initializer of the 'stub model', accepting the arguments of `YOLO`."""
+
+    def __call__(self, images: Any, conf: float = 0.25, verbose: bool = False, **kwargs: Any) -> List[_Result]:
+        if not isinstance(images, list):
+            images = [images]
+        started = time.perf_counter()
+        results = [_Result(self.detect(image, conf)) for image in images]
+        remaining = self.latency_per_image * len(images) - (time.perf_counter() - started)
+        if remaining > 0:
+            time.sleep(remaining)
+        return results
+
+    @staticmethod
+    def detect(image: np.ndarray, conf: float) -> np.ndarray:
+        """The method boxing the red and blue blobs of an image.
+
+        Args:
+            image (np.ndarray): The BGR image.
+            conf (float): The minimal confidence of a detection.
+
+        Returns:
+            np.ndarray: The (N, 6) x1, y1, x2, y2, class_id, confidence detections.
+        """
+
+        blue, green, red = (image[..., channel].astype(np.int16) for channel in range(3))
+        detections = []
+        for class_id, mask in ((RED_CLASS_ID, (red - np.maximum(green, blue)) > 100), (BLUE_CLASS_ID, (blue - np.maximum(green, red)) > 100)):
+            count, _, stats, _ = cv2.connectedComponentsWithStats(mask.astype(np.uint8), connectivity=8)
+            for x, y, width, height, area in stats[1:count]:
+                if area >= MIN_BLOB_AREA:
+                    # Fuller blobs look more like a sign
+                    confidence = 0.5 + 0.5 * min(1.0, area / (width * height))
+                    if confidence >= conf:
+                        detections.append((x, y, x + width, y + height, class_id, confidence))
+        return np.array(detections, dtype=np.float32).reshape(-1, 6)
+
+
+def install(latency_per_image: float = 0.0) -> None:
+    """The function making `from ultralytics import YOLO` load the stub model.
+
+    Only models loaded in this process are replaced, the stub needs the
+    thread inference executor.
+
+    Args:
+        latency_per_image (float): The seconds spent per image.
+    """
+
+    StubModel.latency_per_image = latency_per_image
+    module = types.ModuleType("ultralytics")
+    module.YOLO = StubModel
+    sys.modules["ultralytics"] = module
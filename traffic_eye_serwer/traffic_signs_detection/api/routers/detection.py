@@ -1,31 +1,229 @@
+import asyncio
+from typing import List, Literal
 from dependency_injector.wiring import inject, Provide
-from fastapi import APIRouter, UploadFile, File, Depends, HTTPException
+from fastapi import APIRouter, UploadFile, File, Depends, HTTPException, Query, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from api.utils.ndjson import batch_lines, frame_lines, ndjson_response
 from container import Container
 from infrastructure.services.idetection import IDetectionService
 from infrastructure.services.ivideo_detection import IVideoDetectionService
-from core.domain.detection import DetectionResponse
+from infrastructure.services.istream import IStreamService
+from infrastructure.services.ivideo_job import IVideoJobService, JobQueueFullError
+from core.domain.detection import DetectionResponse, RenderMode
+from core.domain.job import VideoJob
+from config import config
+from utils.admission import AdmissionController
+from utils.batching import get_scheduler
+from utils.upload import UploadRejectedError
 import logging
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
+
+# Per-frame detections of a video: left out, parallel arrays in the response or NDJSON lines
+FramesMode = Literal["none", "columnar", "ndjson"]
+
+
+def check_profile(profile: str | None) -> None:
+    """Reject a detection profile which is not defined in the config."""
+    if profile is not None and profile not in config.DETECTION_PROFILES:
+        raise HTTPException(status_code=400, detail=f"Unknown detection profile: {profile}.")
+
 
 @router.post("/detect-signs/", response_model=DetectionResponse, status_code=201)
 @inject
 async def detect_sign(
     file: UploadFile = File(...),
+    profile: str | None = Query(None),
+    render: RenderMode = Query("eager"),
     service: IDetectionService = Depends(Provide[Container.detection_service]),
 ) -> DetectionResponse:
-    logging.info(f"Received file: {file.filename}")
-    return await service.detect_signs_from_file(file)
+    logger.info("Received file: %s", file.filename)
+    check_profile(profile)
+    try:
+        result = await service.detect_signs_from_file(file, profile, render)
+    except UploadRejectedError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    if result is None:
+        raise HTTPException(status_code=400, detail="Uploaded image could not be decoded.")
+    return result
+
+
+@router.post("/detect-signs-batch/", response_class=StreamingResponse, status_code=200)
+@inject
+async def detect_signs_batch(
+    files: List[UploadFile] = File(...),
+    profile: str | None = Query(None),
+    render: RenderMode = Query("eager"),
+    service: IDetectionService = Depends(Provide[Container.detection_service]),
+) -> StreamingResponse:
+    """Detect traffic signs in many uploaded images and stream an NDJSON line per image as each one is done."""
+    check_profile(profile)
+    if len(files) > config.BATCH_MAX_IMAGES:
+        raise HTTPException(status_code=400, detail=f"At most {config.BATCH_MAX_IMAGES} images per batch.")
+    results = await service.detect_signs_from_files(files, profile, render)
+    return ndjson_response(batch_lines(results, [file.filename for file in files]))
 
 
 @router.post("/detect-signs-video/", response_model=DetectionResponse, status_code=201)
 @inject
 async def detect_signs_video(
     file: UploadFile = File(...),
+    frames: FramesMode = Query("none"),
+    profile: str | None = Query(None),
+    render: RenderMode = Query("eager"),
     video_service: IVideoDetectionService = Depends(Provide[Container.video_detection_service])
-) -> DetectionResponse:
+) -> DetectionResponse | StreamingResponse:
     """Detect traffic signs from an uploaded video file and return annotated video."""
-    result = await video_service.detect_signs_from_video(file)
+    check_profile(profile)
+    try:
+        result = await video_service.detect_signs_from_video(file, frames != "none", profile, render)
+    except UploadRejectedError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    if result is None:
+        raise HTTPException(status_code=400, detail="Uploaded video could not be processed.")
+    if frames == "ndjson":
+        return ndjson_response(frame_lines(result), status_code=201)
+    return result
+
+
+@router.websocket("/stream/")
+@inject
+async def stream_detection(
+    websocket: WebSocket,
+    profile: str | None = Query(None),
+    stream_service: IStreamService = Depends(Provide[Container.stream_service]),
+) -> None:
+    """Detect and track traffic signs on JPEG frames streamed as binary messages.
+
+    Every processed frame is answered with a JSON message of its tracked
+    boxes, latency and the stream stats. Frames arriving while the model
+    is busy replace each other, so only the latest one is processed. A text
+    message closes the stream with 1003, a frame over `MAX_IMAGE_UPLOAD_MB`
+    with 1009.
+    """
+    await websocket.accept()
+    if profile is not None and profile not in config.DETECTION_PROFILES:
+        await websocket.close(code=1008, reason=f"Unknown detection profile: {profile}.")
+        return
+    session = stream_service.open_session(profile)
+    if session is None:
+        await websocket.close(code=1013, reason="Too many streams.")
+        return
+
+    max_frame_bytes = config.MAX_IMAGE_UPLOAD_MB * 1024 * 1024
+
+    async def receive() -> None:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                return
+            content = message.get("bytes")
+            if content is None:
+                await websocket.close(code=1003, reason="Expected binary JPEG frames.")
+                return
+            if len(content) > max_frame_bytes:
+                await websocket.close(code=1009, reason=f"Frame exceeds {config.MAX_IMAGE_UPLOAD_MB} MB.")
+                return
+            session.offer(content)
+
+    receiver = asyncio.create_task(receive())
+    try:
+        while True:
+            frame = asyncio.create_task(session.take())
+            await asyncio.wait({frame, receiver}, return_when=asyncio.FIRST_COMPLETED)
+            # The receiver ends when the client leaves or the socket was closed on a bad message
+            if receiver.done():
+                frame.cancel()
+                break
+            await websocket.send_json(await session.detect(*frame.result()))
+    except WebSocketDisconnect:
+        pass
+    finally:
+        if not receiver.done():
+            receiver.cancel()
+        elif not receiver.cancelled() and receiver.exception() is not None:
+            logger.error("Error receiving stream frames", exc_info=receiver.exception())
+        stream_service.close_session(session)
+
+
+@router.post("/video-jobs/", response_model=VideoJob, status_code=202)
+@inject
+async def submit_video_job(
+    file: UploadFile = File(...),
+    profile: str | None = Query(None),
+    render: RenderMode = Query("eager"),
+    job_service: IVideoJobService = Depends(Provide[Container.video_job_service]),
+) -> VideoJob:
+    """Queue an uploaded video for detection and return the job to poll."""
+    check_profile(profile)
+    try:
+        job = await job_service.submit(file, profile, render)
+    except JobQueueFullError:
+        raise HTTPException(status_code=503, detail="Video job queue is full.")
+    except UploadRejectedError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    return job
+
+
+@router.get("/video-jobs/{job_id}", response_model=VideoJob, status_code=200)
+@inject
+async def get_video_job(
+    job_id: str,
+    job_service: IVideoJobService = Depends(Provide[Container.video_job_service]),
+) -> VideoJob:
+    """Return the progress of a video detection job."""
+    job = await job_service.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Video job not found.")
+    return job
+
+
+@router.get("/video-jobs/{job_id}/result", response_model=DetectionResponse, status_code=200)
+@inject
+async def get_video_job_result(
+    job_id: str,
+    frames: FramesMode = Query("none"),
+    job_service: IVideoJobService = Depends(Provide[Container.video_job_service]),
+) -> DetectionResponse | StreamingResponse:
+    """Return the detection result of a finished video job."""
+    job = await job_service.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Video job not found.")
+    result = await job_service.get_result(job_id, frames != "none")
     if result is None:
-        return DetectionResponse(signs=[], total_boxes=0, image_url="", boxes=[])
-    return result
\ No newline at end of file
+        raise HTTPException(status_code=409, detail=f"Video job is {job.status}.")
+    if frames == "ndjson":
+        return ndjson_response(frame_lines(result))
+    return result
+
+
+@router.delete("/video-jobs/{job_id}", response_model=VideoJob, status_code=200)
+@inject
+async def cancel_video_job(
+    job_id: str,
+    job_service: IVideoJobService = Depends(Provide[Container.video_job_service]),
+) -> VideoJob:
+    """Cancel a queued or running video detection job."""
+    job = await job_service.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Video job not found.")
+    return job
+
+
+@router.get("/batching-stats/", status_code=200)
+async def batching_stats() -> dict:
+    """Return latency accounting of the cross-request micro-batching scheduler."""
+    if not config.MICRO_BATCHING:
+        raise HTTPException(status_code=404, detail="Micro-batching is disabled.")
+    return get_scheduler().stats()
+
+
+@router.get("/admission-stats/", status_code=200)
+@inject
+async def admission_stats(
+    image_admission: AdmissionController = Depends(Provide[Container.image_admission]),
+    video_admission: AdmissionController = Depends(Provide[Container.video_admission]),
+) -> dict:
+    """Return queue depth and rejection counts of the image and video admission budgets."""
+    return {"image": image_admission.stats(), "video": video_admission.stats()}
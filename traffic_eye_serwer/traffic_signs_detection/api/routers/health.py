@@ -0,0 +1,35 @@
+"""A module containing health check endpoints"""
+
+from fastapi import APIRouter, Request
+from fastapi.responses import JSONResponse
+
+from core.domain.health import Readiness
+
+router = APIRouter()
+
+@router.get("/live", status_code=200)
+async def live() -> dict:
+    """An endpoint reporting that the API process is running.
+
+    Returns:
+        dict: The status of the process.
+    """
+
+    return {"status": "ok"}
+
+@router.get("/ready", response_model=Readiness, status_code=200, responses={503: {"model": Readiness}})
+async def ready(request: Request) -> Readiness | JSONResponse:
+    """An endpoint reporting whether the model is loaded and warmed up.
+
+    Args:
+        request (Request): The request, giving access to the app state.
+
+    Returns:
+        Readiness | JSONResponse: The model state, with status 503 until the model is ready.
+    """
+
+    readiness: Readiness = request.app.state.readiness
+    if readiness.status == "ready":
+        return readiness
+
+    return JSONResponse(status_code=503, content=readiness.model_dump())
@@ -0,0 +1,21 @@
+"""A module containing the Prometheus metrics endpoint"""
+
+from fastapi import APIRouter, Response
+
+from utils.metrics import CONTENT_TYPE_LATEST, metrics_text
+
+router = APIRouter()
+
+@router.get("", status_code=200)
+async def metrics() -> Response:
+    """An endpoint exposing the stage timings and request durations in the Prometheus text format.
+
+    Returns:
+        Response: The metrics, with status 503 if prometheus_client is not installed.
+    """
+
+    text = metrics_text()
+    if text is None:
+        return Response("prometheus_client is not installed\n", status_code=503, media_type="text/plain")
+
+    return Response(text, media_type=CONTENT_TYPE_LATEST)
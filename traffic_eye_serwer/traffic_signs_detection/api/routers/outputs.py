@@ -0,0 +1,41 @@
+"""A module containing the endpoint serving annotated files"""
+
+from dependency_injector.wiring import inject, Provide
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import FileResponse
+
+from container import Container
+from utils.executor import InferenceExecutor
+from utils.rendering import OUTPUTS_DIR, has_pending, render_pending
+
+router = APIRouter()
+
+@router.get("/{filename}", response_class=FileResponse, status_code=200)
+@inject
+async def get_output(
+        filename: str,
+        executor: InferenceExecutor = Depends(Provide[Container.inference_executor]),
+) -> FileResponse:
+    """An endpoint downloading an annotated file, rendering it on the first download if it was deferred.
+
+    Args:
+        filename (str): The name of the annotated file.
+        executor (InferenceExecutor): The injected executor running the render.
+
+    Raises:
+        HTTPException: 404 if the file does not exist and cannot be rendered.
+
+    Returns:
+        FileResponse: The annotated image or video.
+    """
+
+    output_file = OUTPUTS_DIR / filename
+    if output_file.name != filename or filename.startswith("."):
+        raise HTTPException(status_code=404, detail="File not found.")
+
+    if not output_file.exists() and has_pending(filename):
+        await executor.run_local(render_pending, filename)
+
+    if not output_file.exists():
+        raise HTTPException(status_code=404, detail="File not found.")
+    return FileResponse(output_file)
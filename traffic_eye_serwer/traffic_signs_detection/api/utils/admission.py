@@ -0,0 +1,43 @@
+"""A module containing the middleware shedding detection requests under load."""
+
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from utils.admission import AdmissionController, AdmissionRejectedError
+
+
+class AdmissionMiddleware:
+    """A middleware admitting requests to the given paths through their admission controllers.
+
+    A request holds a slot of its controller until its response, including
+    a streamed one, is sent. Rejected requests get 503 with `Retry-After`
+    before their body is read.
+    """
+
+    def __init__(self, app: ASGIApp, budgets: dict[str, AdmissionController]) -> None:
+        """The initializer of the 'admission middleware'.
+
+        Args:
+            app (ASGIApp): The wrapped application.
+            budgets (dict[str, AdmissionController]): The controller of every request path.
+        """
+
+        self.app = app
+        self.budgets = budgets
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        controller = self.budgets.get(scope["path"]) if scope["type"] == "http" else None
+        if controller is None or scope["method"] != "POST":
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            async with controller.admit():
+                await self.app(scope, receive, send)
+        except AdmissionRejectedError as e:
+            response = JSONResponse(
+                {"detail": "Server is busy, retry later."},
+                status_code=503,
+                headers={"Retry-After": str(e.retry_after)},
+            )
+            await response(scope, receive, send)
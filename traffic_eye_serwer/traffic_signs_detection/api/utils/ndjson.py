@@ -0,0 +1,78 @@
+"""Module providing newline delimited JSON streaming of detection results."""
+
+import json
+from typing import AsyncIterator, Iterator, List
+
+from fastapi.responses import StreamingResponse
+
+from core.domain.detection import DetectionResponse
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+ROWS_PER_CHUNK = 1000
+
+
+def frame_lines(response: DetectionResponse) -> Iterator[str]:
+    """The function writing a video detection as NDJSON lines.
+
+    The first line is the response without the per-frame arrays, every
+    following line is a single per-frame detection.
+
+    Args:
+        response (DetectionResponse): The response with the per-frame detections.
+
+    Yields:
+        str: Chunks of up to `ROWS_PER_CHUNK` lines.
+    """
+
+    frames = response.frames
+    yield response.model_copy(update={"frames": None}).model_dump_json() + "\n"
+    if frames is None:
+        return
+
+    keys = ("time", "track_id", "class_id", "confidence", "x1", "y1", "x2", "y2")
+    rows = zip(*(getattr(frames, key) for key in keys))
+    while True:
+        chunk = [json.dumps(dict(zip(keys, row)), separators=(",", ":")) for _, row in zip(range(ROWS_PER_CHUNK), rows)]
+        if not chunk:
+            return
+        yield "\n".join(chunk) + "\n"
+
+
+async def batch_lines(
+        results: AsyncIterator[tuple[int, DetectionResponse | None]],
+        filenames: List[str | None],
+) -> AsyncIterator[str]:
+    """The function writing the detections of a batch of images as NDJSON lines.
+
+    Every line holds the index and name of an uploaded image with its
+    response, or with an error if it could not be processed.
+
+    Args:
+        results (AsyncIterator[tuple[int, DetectionResponse | None]]): The detections as each image is done.
+        filenames (List[str | None]): The names of the uploaded images.
+
+    Yields:
+        str: A line per image.
+    """
+
+    async for index, response in results:
+        line = {"index": index, "filename": filenames[index]}
+        if response is None:
+            line["error"] = "Invalid image upload."
+        else:
+            line["response"] = json.loads(response.model_dump_json())
+        yield json.dumps(line, separators=(",", ":")) + "\n"
+
+
+def ndjson_response(lines: Iterator[str] | AsyncIterator[str], status_code: int = 200) -> StreamingResponse:
+    """The function streaming NDJSON lines to the client.
+
+    Args:
+        lines (Iterator[str] | AsyncIterator[str]): The lines to send.
+        status_code (int): The status code of the response.
+
+    Returns:
+        StreamingResponse: The streamed response.
+    """
+
+    return StreamingResponse(lines, status_code=status_code, media_type=NDJSON_MEDIA_TYPE)
@@ -0,0 +1,102 @@
+"""Tests of the early rejection of oversized and non-multipart uploads."""
+
+import asyncio
+
+import pytest
+from fastapi import FastAPI, File, HTTPException, UploadFile
+from fastapi.testclient import TestClient
+from starlette.types import Message, Receive, Scope, Send
+
+from api.utils.upload_limit import UploadLimitMiddleware
+
+LIMIT = 1024
+
+
+@pytest.fixture
+def client() -> TestClient:
+    app = FastAPI()
+
+    @app.post("/upload/")
+    async def upload(file: UploadFile = File(...)) -> dict:
+        return {"size": len(await file.read())}
+
+    @app.post("/unlimited/")
+    async def unlimited(file: UploadFile = File(...)) -> dict:
+        return {"size": len(await file.read())}
+
+    app.add_middleware(UploadLimitMiddleware, limits={"/upload/": LIMIT})
+    return TestClient(app)
+
+
+def multipart(size: int) -> tuple[bytes, str]:
+    boundary = "limit-test"
+    body = (
+        f"--{boundary}\r\n"
+        'Content-Disposition: form-data; name="file"; filename="a.jpg"\r\n'
+        "Content-Type: image/jpeg\r\n\r\n"
+    ).encode() + b"x" * size + f"\r\n--{boundary}--\r\n".encode()
+    return body, f"multipart/form-data; boundary={boundary}"
+
+
+def test_accepts_upload_within_limit(client: TestClient) -> None:
+    response = client.post("/upload/", files={"file": ("a.jpg", b"x" * 100, "image/jpeg")})
+
+    assert response.status_code == 200
+    assert response.json() == {"size": 100}
+
+
+def test_rejects_non_multipart_body_with_415(client: TestClient) -> None:
+    response = client.post("/upload/", content=b"x" * 10, headers={"content-type": "image/jpeg"})
+
+    assert response.status_code == 415
+
+
+def test_rejects_declared_oversized_body_with_413(client: TestClient) -> None:
+    response = client.post("/upload/", files={"file": ("a.jpg", b"x" * (2 * LIMIT), "image/jpeg")})
+
+    assert response.status_code == 413
+
+
+def test_rejects_undeclared_oversized_body_with_413(client: TestClient) -> None:
+    body, content_type = multipart(8 * LIMIT)
+
+    # An iterator body is sent chunked, without a Content-Length
+    response = client.post("/upload/", content=iter([body]), headers={"content-type": content_type})
+
+    assert response.status_code == 413
+
+
+def test_aborts_undeclared_oversized_body_mid_stream() -> None:
+    body, content_type = multipart(8 * LIMIT)
+    chunks = [body[start:start + 256] for start in range(0, len(body), 256)]
+    received = []
+
+    async def receive() -> Message:
+        index = len(received)
+        received.append(index)
+        return {"type": "http.request", "body": chunks[index], "more_body": index + 1 < len(chunks)}
+
+    async def app(scope: Scope, receive: Receive, send: Send) -> None:
+        while (await receive()).get("more_body"):
+            pass
+
+    scope = {
+        "type": "http",
+        "method": "POST",
+        "path": "/upload/",
+        "headers": [(b"content-type", content_type.encode())],
+    }
+    middleware = UploadLimitMiddleware(app, limits={"/upload/": LIMIT})
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(middleware(scope, receive, None))
+
+    assert error.value.status_code == 413
+    # Reading stops at the first chunk crossing the limit
+    assert len(received) == LIMIT // 256 + 1
+
+
+def test_leaves_other_paths_alone(client: TestClient) -> None:
+    response = client.post("/unlimited/", files={"file": ("a.jpg", b"x" * (2 * LIMIT), "image/jpeg")})
+
+    assert response.status_code == 200
@@ -0,0 +1,57 @@
+"""A module containing the middleware timing requests and reporting their stage breakdown."""
+
+import time
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from utils.metrics import observe_request, start_request
+
+
+class TimingMiddleware:
+    """A middleware recording the duration of every request and, optionally, its stages.
+
+    The duration is labelled with the route template, so requests of
+    e.g. different jobs share a series. With `header` set, the stages
+    measured before the response starts are sent in a `Server-Timing`
+    header, a streamed response only reports the stages finished by then.
+    """
+
+    def __init__(self, app: ASGIApp, header: bool = False) -> None:
+        """The initializer of the 'timing middleware'.
+
+        Args:
+            app (ASGIApp): The wrapped application.
+            header (bool): Whether to add the `Server-Timing` header to the responses.
+        """
+
+        self.app = app
+        self.header = header
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        stages = start_request()
+        status = 500
+
+        async def send_timed(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if self.header:
+                    total = time.perf_counter() - started
+                    entries = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in stages.items()]
+                    entries.append(f"total;dur={total * 1000:.1f}")
+                    MutableHeaders(scope=message).append("Server-Timing", ", ".join(entries))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_timed)
+        finally:
+            # The router stores the matched route in the shared scope
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "unmatched"
+            observe_request(scope["method"], path, status, time.perf_counter() - started)
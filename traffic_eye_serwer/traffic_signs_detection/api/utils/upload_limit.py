@@ -0,0 +1,58 @@
+"""A module containing the middleware rejecting oversized uploads early."""
+
+from fastapi import HTTPException
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+class UploadLimitMiddleware:
+    """A middleware limiting the size of uploads sent to the given paths.
+
+    Requests which are not multipart or declare a too large Content-Length
+    are rejected before their body is read. Bodies without a declared length
+    are counted while streaming and cut off at the limit.
+    """
+
+    def __init__(self, app: ASGIApp, limits: dict[str, int]) -> None:
+        """The initializer of the 'upload limit middleware'.
+
+        Args:
+            app (ASGIApp): The wrapped application.
+            limits (dict[str, int]): The maximal body size in bytes by request path.
+        """
+
+        self.app = app
+        self.limits = limits
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        limit = self.limits.get(scope["path"]) if scope["type"] == "http" else None
+        if limit is None or scope["method"] != "POST":
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        if not headers.get("content-type", "").startswith("multipart/form-data"):
+            response = JSONResponse({"detail": "Expected a multipart/form-data upload."}, status_code=415)
+            await response(scope, receive, send)
+            return
+
+        content_length = headers.get("content-length", "")
+        if content_length.isdigit() and int(content_length) > limit:
+            response = JSONResponse({"detail": "Uploaded file is too large."}, status_code=413)
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    # FastAPI re-raises HTTP exceptions coming from the body parsing
+                    raise HTTPException(status_code=413, detail="Uploaded file is too large.")
+            return message
+
+        await self.app(scope, limited_receive, send)
@@ -1,8 +1,24 @@
 """A module providing configuration variables."""
 
+from typing import Dict, List, Optional
+
+from pydantic import BaseModel, model_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
+class DetectionProfile(BaseModel):
+    """A class containing the detection parameters traded between accuracy and latency."""
+    tile_size: int = 640
+    overlap: float = 0.2
+    pyramid_scales: List[float] = [0.5, 0.25]
+    conf_threshold: float = 0.5
+    iou_threshold: float = 0.5
+    keyframe_interval: Optional[int] = None  # None uses VIDEO_KEYFRAME_INTERVAL
+    persistence_frames: int = 5  # Frames a track is kept after detection stops
+    draw_labels: bool = True
+    jpeg_quality: int = 95
+
+
 class BaseConfig(BaseSettings):
     """A class containing base settings configuration."""
     model_config = SettingsConfigDict(env_file=".env", extra="ignore")
@@ -14,10 +30,124 @@ class AppConfig(BaseConfig):
     DB_NAME: str
     DB_USER: str
     DB_PASSWORD: str
+    DETECTION_BATCH_SIZE: int = 8
+    BOX_MERGE_METHOD: str = "nms"
+    INFERENCE_EXECUTOR: str = "thread"
+    INFERENCE_WORKERS: int = 2
+    INFERENCE_QUEUE_SIZE: int = 8
+    MICRO_BATCHING: bool = False
+    MICRO_BATCH_MAX_TILES: int = 32
+    MICRO_BATCH_MAX_WAIT_MS: float = 10
+    MODEL_WORKERS: int = 0
+    MODEL_WORKER_THREADS: int = 0
+    SHARED_MEMORY_SLOTS: int = 8
+    SHARED_MEMORY_SLOT_MB: int = 32
+    MODEL_WORKER_TASK_TIMEOUT_SECONDS: float = 120
+    REDUCED_DECODE: bool = False
+    MIN_SIGN_SIZE_PX: int = 48
+    MODEL_MIN_SIGN_PX: int = 12
+    MAX_IMAGE_UPLOAD_MB: int = 50
+    MAX_VIDEO_UPLOAD_MB: int = 1024
+    MAX_BATCH_UPLOAD_MB: int = 500
+    BATCH_MAX_IMAGES: int = 100
+    BATCH_CONCURRENCY: int = 4
+    MAX_STREAMS: int = 4
+    IMAGE_CONCURRENCY_LIMIT: int = 4
+    IMAGE_ADMISSION_QUEUE: int = 16
+    VIDEO_CONCURRENCY_LIMIT: int = 1
+    VIDEO_ADMISSION_QUEUE: int = 2
+    ADMISSION_RETRY_AFTER_SECONDS: float = 5
+    LOG_LEVEL: str = "INFO"
+    LOG_RATE_LIMIT_BURST: int = 20
+    LOG_RATE_LIMIT_INTERVAL_SECONDS: float = 60
+    METRICS_ENABLED: bool = True
+    TIMING_HEADER: bool = False
+    VIDEO_JOB_CONCURRENCY: int = 1
+    VIDEO_JOB_QUEUE_SIZE: int = 16
+    VIDEO_JOB_HISTORY: int = 100
+    VIDEO_JOB_CHUNK_FRAMES: int = 30
+    VIDEO_KEYFRAME_INTERVAL: int = 1
+    VIDEO_SCENE_CHANGE_THRESHOLD: float = 0
+    VIDEO_PIPELINE_DEPTH: int = 8
+    VIDEO_INFERENCE_BATCH: int = 4
+    TRACK_LOW_CONFIDENCE: float = 0.25
+    ROAD_SIGN_CACHE_TTL_SECONDS: float = 3600
+    RESULT_CACHE_ENTRIES: int = 256
+    RESULT_CACHE_DIR: str = ""
+    PENDING_RENDER_TTL_SECONDS: float = 86400
+    PENDING_RENDER_CLEANUP_INTERVAL_SECONDS: float = 3600
+    MODEL_PATH: str = "yolo_model/sdv4.pt"
+    MODEL_BACKEND: str = "torch"
+    MODEL_PRECISION: str = "fp32"
+    MODEL_CALIBRATION_DATA: str = ""
+    MODEL_SELF_CHECK: bool = True
+    MODEL_SELF_CHECK_TOLERANCE: float = 0.1
+    MODEL_SELF_CHECK_IMAGES: str = ""  # Glob of images with signs, assets/self_check if empty
+    MODEL_PRELOAD: bool = True
+    MODEL_WARMUP_ITERATIONS: int = 2
+    TILE_PREFILTER: bool = False
+    TILE_PREFILTER_MIN_SCORE: float = 0.002
+    DETECTION_PROFILE: str = "balanced"
+    DETECTION_PROFILES: Dict[str, DetectionProfile] = {
+        # Larger tiles are downscaled by the model, a 12 MP photo needs a handful of passes
+        "fast": DetectionProfile(
+            tile_size=1280,
+            overlap=0.1,
+            pyramid_scales=[0.25],
+            keyframe_interval=3,
+            persistence_frames=3,
+            draw_labels=False,
+            jpeg_quality=80,
+        ),
+        "balanced": DetectionProfile(),
+        "thorough": DetectionProfile(
+            overlap=0.3,
+            pyramid_scales=[0.75, 0.5, 0.25],
+            conf_threshold=0.4,
+            keyframe_interval=1,
+            persistence_frames=8,
+        ),
+    }
 
     class Config:
         env_file = ".env"
 
+    @model_validator(mode="after")
+    def check_model_workers(self) -> "AppConfig":
+        """The validator rejecting a model worker pool behind process executors.
+
+        Every executor process would start its own pool, multiplying the
+        model copies instead of sharing one set of workers.
+
+        Raises:
+            ValueError: If `MODEL_WORKERS` is set with the process executor.
+
+        Returns:
+            AppConfig: The validated configuration.
+        """
+
+        if self.MODEL_WORKERS > 0 and self.INFERENCE_EXECUTOR == "process":
+            raise ValueError("MODEL_WORKERS requires INFERENCE_EXECUTOR=thread, the pool already runs the model in processes")
+        return self
+
+    def detection_profile(self, name: str | None = None) -> DetectionProfile:
+        """The method getting a detection profile by name.
+
+        Args:
+            name (str | None): The name of the profile, `DETECTION_PROFILE` if None.
+
+        Raises:
+            ValueError: If the profile is not defined.
+
+        Returns:
+            DetectionProfile: The parameters of the profile.
+        """
+
+        name = name or self.DETECTION_PROFILE
+        if name not in self.DETECTION_PROFILES:
+            raise ValueError(f"Unknown detection profile: {name}")
+        return self.DETECTION_PROFILES[name]
+
 
 config = AppConfig()
 
@@ -3,15 +3,55 @@
 from dependency_injector.containers import DeclarativeContainer
 from dependency_injector.providers import Factory, Singleton
 
+from config import config
+from infrastructure.repositories.roadsigncache import RoadSignCacheRepository
 from infrastructure.repositories.roadsigndb import RoadSignRepository
 from infrastructure.services.roadsign import RoadSignService
 from infrastructure.services.detection import DetectionService
+from infrastructure.services.stream import StreamService
 from infrastructure.services.video_detection import VideoDetectionService
+from infrastructure.services.video_job import VideoJobService
+from utils.admission import AdmissionController
+from utils.executor import InferenceExecutor
+from utils.result_cache import ResultCache
 
 
 class Container(DeclarativeContainer):
     """Container class for dependency injecting purposes."""
-    road_sign_repository = Singleton(RoadSignRepository)
+    road_sign_db_repository = Singleton(RoadSignRepository)
+
+    road_sign_repository = Singleton(
+        RoadSignCacheRepository,
+        repository=road_sign_db_repository,
+        ttl_seconds=config.ROAD_SIGN_CACHE_TTL_SECONDS,
+    )
+
+    inference_executor = Singleton(
+        InferenceExecutor,
+        kind=config.INFERENCE_EXECUTOR,
+        workers=config.INFERENCE_WORKERS,
+        queue_size=config.INFERENCE_QUEUE_SIZE,
+    )
+
+    image_admission = Singleton(
+        AdmissionController,
+        limit=config.IMAGE_CONCURRENCY_LIMIT,
+        queue_size=config.IMAGE_ADMISSION_QUEUE,
+        retry_after_seconds=config.ADMISSION_RETRY_AFTER_SECONDS,
+    )
+
+    video_admission = Singleton(
+        AdmissionController,
+        limit=config.VIDEO_CONCURRENCY_LIMIT,
+        queue_size=config.VIDEO_ADMISSION_QUEUE,
+        retry_after_seconds=config.ADMISSION_RETRY_AFTER_SECONDS,
+    )
+
+    result_cache = Singleton(
+        ResultCache,
+        max_entries=config.RESULT_CACHE_ENTRIES,
+        directory=config.RESULT_CACHE_DIR or None,
+    )
 
     road_sign_service = Factory(
         RoadSignService,
@@ -21,9 +61,27 @@ class Container(DeclarativeContainer):
     detection_service = Factory(
         DetectionService,
         repository=road_sign_repository,
+        executor=inference_executor,
+        result_cache=result_cache,
     )
 
     video_detection_service = Factory(
         VideoDetectionService,
-        repository=road_sign_repository
-    )
\ No newline at end of file
+        repository=road_sign_repository,
+        executor=inference_executor,
+    )
+
+    stream_service = Singleton(
+        StreamService,
+        max_streams=config.MAX_STREAMS,
+    )
+
+    video_job_service = Singleton(
+        VideoJobService,
+        video_service=video_detection_service,
+        executor=inference_executor,
+        concurrency=config.VIDEO_JOB_CONCURRENCY,
+        queue_size=config.VIDEO_JOB_QUEUE_SIZE,
+        history=config.VIDEO_JOB_HISTORY,
+        chunk_frames=config.VIDEO_JOB_CHUNK_FRAMES,
+    )
@@ -1,18 +1,37 @@
-from ultralytics import YOLO
+from config import config
+from core.model_backend import model_path as backend_model_path
+import logging
 import os
+import threading
 
 # Завантаження моделі
 # model = YOLO("../yolo_model/best.pt") - stary
-_model = None
+# Predyktory ultralytics nie są bezpieczne wątkowo, więc każdy wątek inferencji ma własny model
+_models = threading.local()
+logger = logging.getLogger(__name__)
 
 def get_model():
-    global _model
-    if _model is None:
-        model_path = "yolo_model/sdv4.pt"
-        print("Current working directory:", os.getcwd())
-        print("Trying to load model from:", os.path.abspath(model_path))
-        _model = YOLO(model_path)
-    return _model
+    model = getattr(_models, "model", None)
+    if model is None:
+        # Import ultralytics (i torch) dopiero przy ładowaniu modelu, żeby API startowało szybko
+        from ultralytics import YOLO
+
+        # Model wybranego backendu (torch, onnx, openvino), eksportowany przy pierwszym użyciu
+        model_path = backend_model_path()
+        logger.debug("Current working directory: %s", os.getcwd())
+        logger.info("Trying to load model from: %s", os.path.abspath(model_path))
+        model = YOLO(model_path, task="detect")
+        _models.model = model
+    return model
+
+def model_identity() -> str:
+    """Identify the loaded weights by their path, size, modification time and backend."""
+    backend = f"{config.MODEL_BACKEND}:{config.MODEL_PRECISION}"
+    try:
+        stat = os.stat(config.MODEL_PATH)
+    except OSError:
+        return f"{config.MODEL_PATH}:{backend}"
+    return f"{config.MODEL_PATH}:{stat.st_size}:{stat.st_mtime_ns}:{backend}"
 
 class_names = [
         "A-1", "A-2", "A-3", "A-4", "A-5", "A-6a", "A-6b", "A-6c", "A-6d", "A-7", 
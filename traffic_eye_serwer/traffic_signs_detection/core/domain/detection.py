@@ -1,9 +1,12 @@
 """Module containing detection related domain models"""
 
-from pydantic import BaseModel, ConfigDict
-from typing import List, Optional
+from pydantic import BaseModel
+from typing import List, Literal, Optional
 from core.domain.roadsign import RoadSign
 
+# Annotated file: rendered with the detection, on its first download or not at all
+RenderMode = Literal["eager", "lazy", "none"]
+
 class Box(BaseModel):
     x1: int
     y1: int
@@ -12,10 +15,29 @@ class Box(BaseModel):
     class_id: str
     confidence: float
     time_detected: Optional[float] = None
+    last_seen: Optional[float] = None
+    track_id: Optional[int] = None
+
+class FrameDetections(BaseModel):
+    """Model representing per-frame video detections as parallel arrays."""
+    time: List[float]
+    track_id: List[int]
+    class_id: List[str]
+    confidence: List[float]
+    x1: List[int]
+    y1: List[int]
+    x2: List[int]
+    y2: List[int]
 
 class DetectionResponse(BaseModel):
     """Model representing detection DTO attributes."""
     signs: List[RoadSign]
     total_boxes: int
     file_url: str
-    boxes: List[Box]
\ No newline at end of file
+    boxes: List[Box]
+    frames_decoded: Optional[int] = None
+    frames_inferred: Optional[int] = None
+    tiles_total: Optional[int] = None
+    tiles_skipped: Optional[int] = None
+    profile: Optional[str] = None
+    frames: Optional[FrameDetections] = None
@@ -0,0 +1,14 @@
+"""Module containing service health related domain models"""
+
+from pydantic import BaseModel
+from typing import Optional
+
+
+class Readiness(BaseModel):
+    """Model representing whether the model is loaded and warmed up."""
+    status: str = "loading"
+    backend: str
+    precision: str
+    warmup_iterations: int = 0
+    warmup_seconds: Optional[float] = None
+    error: Optional[str] = None
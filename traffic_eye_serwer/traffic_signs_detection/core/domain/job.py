@@ -0,0 +1,15 @@
+"""Module containing asynchronous job related domain models"""
+
+from pydantic import BaseModel
+from typing import Optional
+
+
+class VideoJob(BaseModel):
+    """Model representing the state of an asynchronous video detection job."""
+    id: str
+    status: str
+    frames_processed: int = 0
+    frames_total: int = 0
+    frames_inferred: int = 0
+    eta_seconds: Optional[float] = None
+    error: Optional[str] = None
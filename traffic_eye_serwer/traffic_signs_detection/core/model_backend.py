@@ -0,0 +1,208 @@
+"""Module providing the selectable inference backends of the sign model."""
+
+import glob
+import importlib.util
+import logging
+import os
+import shutil
+import threading
+from pathlib import Path
+from typing import List
+
+import cv2
+import numpy as np
+
+from config import config
+from utils.boxes import iou_matrix
+from utils.tiling import result_to_array
+
+# Precisions each backend can run on CPU
+BACKENDS = {
+    "torch": {"fp32"},
+    "onnx": {"fp32"},
+    "openvino": {"fp32", "fp16", "int8"},
+}
+BACKEND_PACKAGES = {
+    "onnx": ("onnx", "onnxruntime"),
+    "openvino": ("openvino",),
+}
+# Detections weaker than this are compared but not required to match
+SELF_CHECK_MIN_CONFIDENCE = 0.25
+SELF_CHECK_IOU = 0.8
+# Clean photos of real signs shipped with the server, compared on when MODEL_SELF_CHECK_IMAGES is not set
+DEFAULT_SELF_CHECK_IMAGES = Path(__file__).resolve().parents[1] / "assets" / "self_check" / "*.jpg"
+
+_export_lock = threading.Lock()
+logger = logging.getLogger(__name__)
+
+
+def exported_path(weights: str, backend: str, precision: str) -> Path:
+    """The function naming the exported model kept next to the PyTorch weights.
+
+    Args:
+        weights (str): The path of the `.pt` weights.
+        backend (str): The inference backend, `torch`, `onnx` or `openvino`.
+        precision (str): The precision of the model, `fp32`, `fp16` or `int8`.
+
+    Returns:
+        Path: The file or directory the backend loads.
+    """
+
+    weights = Path(weights)
+    if backend == "onnx":
+        return weights.with_suffix(".onnx")
+    if backend == "openvino":
+        return weights.with_name(f"{weights.stem}_{precision}_openvino_model")
+    return weights
+
+
+def ensure_exported(weights: str, backend: str, precision: str) -> str:
+    """The function exporting the weights for a backend unless an up-to-date export exists.
+
+    Args:
+        weights (str): The path of the `.pt` weights.
+        backend (str): The inference backend, `torch`, `onnx` or `openvino`.
+        precision (str): The precision of the model, `fp32`, `fp16` or `int8`.
+
+    Raises:
+        ValueError: If the backend or its precision is not supported.
+        RuntimeError: If the packages of the backend are not installed.
+
+    Returns:
+        str: The path of the model to load.
+    """
+
+    if precision not in BACKENDS.get(backend, ()):
+        raise ValueError(f"Unsupported model backend {backend} with precision {precision}")
+    if backend == "torch":
+        return weights
+
+    missing = [package for package in BACKEND_PACKAGES[backend] if importlib.util.find_spec(package) is None]
+    if missing:
+        raise RuntimeError(f"Model backend {backend} requires missing packages: {', '.join(missing)}")
+
+    target = exported_path(weights, backend, precision)
+    with _export_lock:
+        if target.exists() and target.stat().st_mtime >= os.stat(weights).st_mtime:
+            return str(target)
+
+        from ultralytics import YOLO
+
+        logger.info("Exporting %s to %s (%s)", weights, backend, precision)
+        options = {"format": backend, "dynamic": True, "half": precision == "fp16", "int8": precision == "int8"}
+        if precision == "int8" and config.MODEL_CALIBRATION_DATA:
+            options["data"] = config.MODEL_CALIBRATION_DATA
+        exported = YOLO(weights).export(**options)
+
+        # Variants of one backend share the default export name
+        if Path(exported) != target:
+            if target.exists():
+                _remove(target)
+            os.replace(exported, target)
+        return str(target)
+
+
+def model_path() -> str:
+    """The function returning the model of the configured backend, exporting it if needed.
+
+    Returns:
+        str: The path of the model to load.
+    """
+
+    return ensure_exported(config.MODEL_PATH, config.MODEL_BACKEND, config.MODEL_PRECISION)
+
+
+def detections_match(reference: np.ndarray, candidate: np.ndarray, tolerance: float) -> bool:
+    """The function checking whether every confident detection is found by the other model.
+
+    Args:
+        reference (np.ndarray): The (N, 6) detections of one model.
+        candidate (np.ndarray): The (N, 6) detections of the other model.
+        tolerance (float): The largest allowed confidence difference.
+
+    Returns:
+        bool: True if the confident detections of both sides have a counterpart.
+    """
+
+    for expected, found in ((reference, candidate), (candidate, reference)):
+        expected = expected[expected[:, 5] >= SELF_CHECK_MIN_CONFIDENCE]
+        matches = (iou_matrix(expected, found) >= SELF_CHECK_IOU) & (expected[:, None, 4] == found[None, :, 4])
+        matches &= np.abs(expected[:, None, 5] - found[None, :, 5]) <= tolerance
+        if not matches.any(axis=1).all():
+            return False
+    return True
+
+
+def self_check_images() -> List[np.ndarray]:
+    """The function loading the images with signs the backends are compared on.
+
+    Returns:
+        List[np.ndarray]: The BGR images matching `MODEL_SELF_CHECK_IMAGES`, the bundled sample photos if not set.
+    """
+
+    pattern = config.MODEL_SELF_CHECK_IMAGES or str(DEFAULT_SELF_CHECK_IMAGES)
+    images = [cv2.imread(path) for path in sorted(glob.glob(pattern))]
+    return [image for image in images if image is not None]
+
+
+def self_check(images: List[np.ndarray] | None = None) -> bool:
+    """The function comparing the configured backend with the PyTorch reference.
+
+    The check fails if the reference finds no confident sign, empty
+    detections of both models would prove nothing.
+
+    Args:
+        images (List[np.ndarray] | None): The BGR images with signs to compare on, `self_check_images()` if None.
+
+    Returns:
+        bool: True if both models find the same signs.
+    """
+
+    if config.MODEL_BACKEND == "torch":
+        return True
+
+    from ultralytics import YOLO
+
+    if images is None:
+        images = self_check_images()
+    if not images:
+        logger.warning("No self-check images found, set MODEL_SELF_CHECK_IMAGES or disable MODEL_SELF_CHECK")
+        return False
+
+    reference = YOLO(config.MODEL_PATH)
+    candidate = YOLO(model_path(), task="detect")
+    conf = max(0.01, SELF_CHECK_MIN_CONFIDENCE - config.MODEL_SELF_CHECK_TOLERANCE)
+    signs = 0
+    for image in images:
+        expected = result_to_array(reference(image, conf=conf, verbose=False)[0])
+        found = result_to_array(candidate(image, conf=conf, verbose=False)[0])
+        signs += int((expected[:, 5] >= SELF_CHECK_MIN_CONFIDENCE).sum())
+        if not detections_match(expected, found, config.MODEL_SELF_CHECK_TOLERANCE):
+            logger.warning("Model backend %s (%s) differs from the PyTorch reference", config.MODEL_BACKEND, config.MODEL_PRECISION)
+            return False
+
+    if not signs:
+        logger.warning("The PyTorch reference finds no sign on the self-check images, the backend cannot be verified")
+        return False
+
+    logger.info("Model backend %s (%s) matches the PyTorch reference", config.MODEL_BACKEND, config.MODEL_PRECISION)
+    return True
+
+
+def prepare_backend() -> None:
+    """The function exporting and verifying the configured backend at startup.
+
+    Raises:
+        RuntimeError: If the self-check is enabled and fails.
+    """
+
+    model_path()
+    if config.MODEL_SELF_CHECK and not self_check():
+        raise RuntimeError(f"Model backend {config.MODEL_BACKEND} failed the self-check")
+
+
+def _remove(path: Path) -> None:
+    if path.is_dir():
+        shutil.rmtree(path)
+    else:
+        path.unlink()
@@ -1,7 +1,7 @@
 """Module containing road sign repository abstractions."""
 
 from abc import ABC, abstractmethod
-from typing import Any
+from typing import Any, Iterable
 
 
 class IRoadSignRepository(ABC):
@@ -18,3 +18,24 @@ class IRoadSignRepository(ABC):
             Any | None: the road sign data if exists.
 
         """
+
+    @abstractmethod
+    async def get_road_signs_by_ids(self, road_sign_ids: Iterable[str]) -> dict[str, Any]:
+        """The abstract getting several road signs from the data storage at once.
+
+        Args:
+            road_sign_ids: The ids of the road signs.
+
+        Returns:
+            dict[str, Any]: The road sign data of the existing ids by id.
+
+        """
+
+    @abstractmethod
+    async def get_all_road_signs(self) -> Iterable[Any]:
+        """The abstract getting all road signs from the data storage.
+
+        Returns:
+            Iterable[Any]: The road sign data.
+
+        """
@@ -1,6 +1,7 @@
 """"A module providing database access."""
 
 import asyncio
+import logging
 import databases
 import sqlalchemy
 from sqlalchemy.exc import OperationalError, DatabaseError
@@ -8,6 +9,8 @@ from asyncpg.exceptions import CannotConnectNowError, ConnectionDoesNotExistErro
 
 from config import config
 
+logger = logging.getLogger(__name__)
+
 
 metadata = sqlalchemy.MetaData()
 
@@ -31,13 +34,13 @@ async def init_db(retries: int = 5, delay: int = 5) -> None:
     """Function to initialize DB connection with retry logic."""
     for attempt in range(retries):
         try:
-            print(f"Attempting to connect to the database... (Attempt {attempt + 1})")
+            logger.info("Attempting to connect to the database... (Attempt %d)", attempt + 1)
             await database.connect()
             await database.fetch_all(road_sign_table.select().limit(1))
-            print("Connected successfully to the database.")
+            logger.info("Connected successfully to the database.")
             return
         except (OperationalError, DatabaseError, CannotConnectNowError, ConnectionDoesNotExistError) as e:
-            print(f"Attempt {attempt + 1} failed: {e}")
+            logger.warning("Attempt %d failed: %s", attempt + 1, e)
             await asyncio.sleep(delay)
         finally:
             if database.is_connected:
@@ -0,0 +1,114 @@
+"""Module containing the caching road sign repository implementation."""
+
+import asyncio
+import logging
+import time
+from typing import Iterable
+
+from core.domain.roadsign import RoadSign
+from core.repositories.iroadsign import IRoadSignRepository
+
+logger = logging.getLogger(__name__)
+
+
+class RoadSignCacheRepository(IRoadSignRepository):
+    """A class implementing the road sign repository served from memory.
+
+    The whole road sign catalogue is small and nearly static, so it is
+    loaded at once from the wrapped repository and every lookup is
+    answered from memory. The catalogue is loaded again after `ttl_seconds`
+    or after `invalidate` was called.
+    """
+
+    _repository: IRoadSignRepository
+
+    def __init__(self, repository: IRoadSignRepository, ttl_seconds: float = 3600) -> None:
+        """The initializer of the 'road sign cache repository'.
+
+        Args:
+            repository (IRoadSignRepository): The repository holding the road signs.
+            ttl_seconds (float): The time after which the catalogue is loaded again, 0 keeps it forever.
+        """
+
+        self._repository = repository
+        self.ttl_seconds = ttl_seconds
+        self._road_signs: dict[str, RoadSign] | None = None
+        self._loaded_at = 0.0
+        self._lock = asyncio.Lock()
+
+    async def preload(self) -> bool:
+        """The method loading the road sign catalogue into memory.
+
+        Returns:
+            bool: True if the catalogue was loaded.
+        """
+
+        try:
+            await self._load()
+        except Exception as e:
+            logger.exception("Error preloading road signs: %s", e)
+            return False
+        return True
+
+    def invalidate(self) -> None:
+        """The method dropping the cached catalogue, the next lookup loads it again."""
+
+        self._road_signs = None
+
+    async def get_road_sign_by_id(self, road_sign_id: str) -> RoadSign | None:
+        """The method getting a road sign from the cached catalogue.
+
+        Args:
+            road_sign_id (str): The id of the road sign.
+
+        Returns:
+            RoadSign | None: The road sign data if exists.
+        """
+
+        road_signs = await self._catalogue()
+        return road_signs.get(str(road_sign_id))
+
+    async def get_road_signs_by_ids(self, road_sign_ids: Iterable[str]) -> dict[str, RoadSign]:
+        """The method getting several road signs from the cached catalogue.
+
+        Args:
+            road_sign_ids (Iterable[str]): The ids of the road signs.
+
+        Returns:
+            dict[str, RoadSign]: The existing road signs by id.
+        """
+
+        road_signs = await self._catalogue()
+        return {
+            road_sign_id: road_signs[road_sign_id]
+            for road_sign_id in map(str, road_sign_ids)
+            if road_sign_id in road_signs
+        }
+
+    async def get_all_road_signs(self) -> Iterable[RoadSign]:
+        """The method getting all road signs from the cached catalogue.
+
+        Returns:
+            Iterable[RoadSign]: The road signs.
+        """
+
+        return list((await self._catalogue()).values())
+
+    def _expired(self) -> bool:
+        if self._road_signs is None:
+            return True
+        return bool(self.ttl_seconds) and time.monotonic() - self._loaded_at > self.ttl_seconds
+
+    async def _catalogue(self) -> dict[str, RoadSign]:
+        road_signs = self._road_signs
+        if self._expired():
+            async with self._lock:
+                # Another request may have loaded it while this one waited
+                road_signs = await self._load() if self._expired() else self._road_signs
+        return road_signs
+
+    async def _load(self) -> dict[str, RoadSign]:
+        road_signs = await self._repository.get_all_road_signs()
+        self._road_signs = {str(road_sign.id): road_sign for road_sign in road_signs}
+        self._loaded_at = time.monotonic()
+        return self._road_signs
@@ -1,6 +1,6 @@
 """Module containing road sign database repository implementation"""
 
-from typing import Any
+from typing import Any, Iterable
 from core.domain.roadsign import RoadSign
 from core.repositories.iroadsign import IRoadSignRepository
 from db import road_sign_table, database
@@ -24,3 +24,29 @@ class RoadSignRepository(IRoadSignRepository):
 
         return RoadSign(**dict(road_sign)) if road_sign else None
 
+    async def get_road_signs_by_ids(self, road_sign_ids: Iterable[str]) -> dict[str, RoadSign]:
+        """The method getting several road signs from the data storage in one query.
+
+        Args:
+            road_sign_ids (Iterable[str]): The ids of the road signs.
+
+        Returns:
+            dict[str, RoadSign]: The existing road signs by id.
+        """
+
+        query = road_sign_table.select().where(road_sign_table.c.id.in_(list(road_sign_ids)))
+        road_signs = await database.fetch_all(query)
+
+        return {road_sign.id: road_sign for road_sign in (RoadSign(**dict(row)) for row in road_signs)}
+
+    async def get_all_road_signs(self) -> Iterable[RoadSign]:
+        """The method getting all road signs from the data storage.
+
+        Returns:
+            Iterable[RoadSign]: The road signs.
+        """
+
+        road_signs = await database.fetch_all(road_sign_table.select())
+
+        return [RoadSign(**dict(road_sign)) for road_sign in road_signs]
+
@@ -1,5 +1,7 @@
 """Module containing road sign repository implementation."""
 
+from typing import Iterable
+
 from core.domain.roadsign import RoadSign
 from core.repositories.iroadsign import IRoadSignRepository
 from infrastructure.repositories.db import road_signs
@@ -22,3 +24,23 @@ class RoadSignMockRepository(IRoadSignRepository):
             None,
         )
 
+    async def get_road_signs_by_ids(self, road_sign_ids: Iterable[str]) -> dict[str, RoadSign]:
+        """The method getting several road signs from the data storage at once.
+
+        Args:
+            road_sign_ids: The ids of the road signs.
+
+        Returns:
+            dict[str, RoadSign]: The existing road signs by id.
+        """
+        ids = set(road_sign_ids)
+        return {obj.id: obj for obj in road_signs if obj.id in ids}
+
+    async def get_all_road_signs(self) -> Iterable[RoadSign]:
+        """The method getting all road signs from the data storage.
+
+        Returns:
+            Iterable[RoadSign]: The road signs.
+        """
+        return list(road_signs)
+
@@ -1,183 +1,389 @@
 from fastapi import UploadFile
-from core.config_model import get_model, class_names
-from core.domain.detection import DetectionResponse, Box
+from core.config_model import class_names, model_identity
+from core.domain.detection import DetectionResponse, Box, RenderMode
 from infrastructure.services.idetection import IDetectionService
 from core.repositories.iroadsign import IRoadSignRepository
+from config import DetectionProfile, config
+from utils.boxes import merge_boxes
+from utils.executor import InferenceExecutor
+from utils.image_io import decode_image, pick_reduction
+from utils.inference import predict
+from utils.metrics import StageTimer, record_stages, timed
+from utils.rendering import draw_boxes, save_pending_image
+from utils.result_cache import ResultCache, result_key
+from utils.saliency import filter_tiles
+from utils.tiling import build_tiles
+from utils.upload import UploadRejectedError, has_allowed_type, read_upload, spool_upload
+from dataclasses import dataclass, field
 from pathlib import Path
+from typing import AsyncIterator, Dict, List
+import asyncio
 import cv2
+import logging
 import numpy as np
-from PIL import Image
-import io
 import uuid
-import os
-from pillow_heif import register_heif_opener  # Dodano obsługę HEIC
+
+logger = logging.getLogger(__name__)
+
+ALLOWED_IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".heic", ".heif", ".webp", ".bmp", ".tif", ".tiff"}
+
+
+def detection_parameters(profile_name: str, profile: DetectionProfile, render: RenderMode = "eager") -> dict:
+    """Collect every setting which changes the detections or the output of an image.
+
+    Args:
+        profile_name (str): The name of the detection profile, echoed in the response.
+        profile (DetectionProfile): The parameters of the detection profile.
+        render (RenderMode): When the annotated image is rendered.
+
+    Returns:
+        dict: The parameters, part of the result cache key.
+    """
+    return {
+        "profile": profile_name,
+        "render": render,
+        **profile.model_dump(),
+        "merge_method": config.BOX_MERGE_METHOD,
+        "reduction": pick_reduction(config.MIN_SIGN_SIZE_PX, config.MODEL_MIN_SIGN_PX) if config.REDUCED_DECODE else 1,
+        "prefilter_min_score": config.TILE_PREFILTER_MIN_SCORE if config.TILE_PREFILTER else None,
+    }
+
+
+@dataclass
+class ImageResult:
+    """A class representing the outcome of processing an image."""
+    boxes: list  # (x1, y1, x2, y2, class_id, confidence) tuples
+    tiles_total: int
+    tiles_skipped: int
+    timings: Dict[str, float] = field(default_factory=dict)  # Seconds spent in every stage
+
+
+def detect_image(
+        content: bytes,
+        filename: str,
+        unique_filename: str,
+        profile: DetectionProfile,
+        render: RenderMode = "eager",
+        shared_batching: bool = False,
+) -> ImageResult | None:
+    """Detect traffic signs in an image and save the annotated copy.
+
+    The function is blocking and is meant to run on the inference executor.
+
+    Args:
+        content (bytes): The uploaded image.
+        filename (str): The name of the uploaded file.
+        unique_filename (str): The name of the annotated output file.
+        profile (DetectionProfile): The tiling, thresholds and rendering of the detection.
+        render (RenderMode): Whether the annotated image is saved now, kept to be rendered on download or skipped.
+        shared_batching (bool): Whether the tiles share forward passes with other images.
+
+    Returns:
+        ImageResult | None: The boxes and tile counts if the image was processed.
+    """
+    timer = StageTimer()
+
+    # Dekodowanie obrazu w pamięci (obsługa .heic i orientacji EXIF)
+    # Zmniejszenie ograniczone tak, żeby dłuższy bok nie był krótszy niż kafelek
+    reduction = pick_reduction(config.MIN_SIGN_SIZE_PX, config.MODEL_MIN_SIGN_PX) if config.REDUCED_DECODE else 1
+    with timer.stage("decode"):
+        decoded = decode_image(content, filename, reduction, profile.tile_size)
+    if decoded is None:
+        logger.error("Failed to decode uploaded image %s", filename)
+        return None
+    img = decoded.image
+    reduction = decoded.reduction
+
+    # Kafelki i zmniejszone kopie przetwarzane wsadowo
+    with timer.stage("tiling"):
+        tiles = build_tiles(img, profile.tile_size, profile.overlap, profile.pyramid_scales)
+        tiles_total = len(tiles)
+        tiles_skipped = 0
+
+        # Pominięcie kafelków bez kolorów znaków (niebo, asfalt, elewacje)
+        if config.TILE_PREFILTER:
+            tiles, tiles_skipped = filter_tiles(img, tiles, config.TILE_PREFILTER_MIN_SCORE)
+    if config.TILE_PREFILTER:
+        logger.debug("Tiles skipped: %d/%d", tiles_skipped, tiles_total)
+
+    with timer.stage("inference"):
+        detections = predict(tiles, profile.conf_threshold, shared_batching) if tiles else np.empty((0, 6), dtype=np.float32)
+
+    # Usunięcie duplikatów z nakładających się kafelków i skal
+    with timer.stage("merge"):
+        detections = merge_boxes(detections, profile.iou_threshold, config.BOX_MERGE_METHOD)
+        recognized_boxes = [
+            (int(x1), int(y1), int(x2), int(y2), int(class_id), confidence)
+            for x1, y1, x2, y2, class_id, confidence in detections.tolist()
+        ]
+
+    if render == "eager":
+        # Rysowanie boxów na obrazie
+        with timer.stage("render"):
+            draw_boxes(img, recognized_boxes, profile.draw_labels)
+
+        # Zapisanie wyjściowego obrazu
+        outputs_dir = Path("outputs")
+        outputs_dir.mkdir(exist_ok=True)
+        output_file = outputs_dir / unique_filename
+        with timer.stage("encode"):
+            saved = cv2.imwrite(str(output_file), img, [cv2.IMWRITE_JPEG_QUALITY, profile.jpeg_quality])
+        if not saved:
+            logger.error("Failed to save output image to %s", output_file)
+            return None
+
+    # Obraz z boxami zostanie narysowany przy pierwszym pobraniu, z tego samego zmniejszonego dekodowania
+    if render == "lazy":
+        with timer.stage("render"):
+            save_pending_image(
+                unique_filename, content, filename, recognized_boxes, profile.draw_labels, profile.jpeg_quality, reduction
+            )
+
+    # Współrzędne w odpowiedzi odnoszą się do oryginalnej rozdzielczości zdjęcia
+    if reduction > 1:
+        recognized_boxes = [
+            (
+                int(x1 * decoded.scale_x),
+                int(y1 * decoded.scale_y),
+                int(x2 * decoded.scale_x),
+                int(y2 * decoded.scale_y),
+                class_id,
+                confidence,
+            )
+            for x1, y1, x2, y2, class_id, confidence in recognized_boxes
+        ]
+
+    return ImageResult(recognized_boxes, tiles_total, tiles_skipped, timer.stages)
+
 
 class DetectionService(IDetectionService):
     """A class implementing the detection service."""
 
     sign_repository: IRoadSignRepository
+    executor: InferenceExecutor
+    result_cache: ResultCache | None
 
-    def __init__(self, repository: IRoadSignRepository) -> None:
+    def __init__(
+            self,
+            repository: IRoadSignRepository,
+            executor: InferenceExecutor,
+            result_cache: ResultCache | None = None,
+    ) -> None:
         """The initializer of the 'detection service'."""
         self.sign_repository = repository
-        register_heif_opener()  # Rejestracja obsługi HEIC w PIL
-
-    async def iou(self, box1, box2):
-        x1 = max(box1[0], box2[0])
-        y1 = max(box1[1], box2[1])
-        x2 = min(box1[2], box2[2])
-        y2 = min(box1[3], box2[3])
-        
-        intersection = max(0, x2 - x1) * max(0, y2 - y1)
-        area1 = (box1[2] - box1[0]) * (box1[3] - box1[1])
-        area2 = (box2[2] - box2[0]) * (box2[3] - box2[1])
-        union = area1 + area2 - intersection
-        return intersection / union if union != 0 else 0
-
-    async def is_duplicate(self, new_box, existing_boxes, iou_threshold=0.5):
-        for box in existing_boxes:
-            if await self.iou(new_box[:4], box[:4]) > iou_threshold and new_box[4] == box[4]:
-                return True
-        return False
-
-    async def detect_signs_from_file(self, file: UploadFile) -> DetectionResponse | None:
-        model = get_model()
-        # Stworzenie unikalnego imienia dla tymczasowego i wyjściowego pliku
-        unique_filename = f"{uuid.uuid4()}.jpg"
-        temp_dir = Path("temp")
-        outputs_dir = Path("outputs")
-        temp_dir.mkdir(exist_ok=True)
-        outputs_dir.mkdir(exist_ok=True)
+        self.executor = executor
+        self.result_cache = result_cache
 
-        temp_file = temp_dir / unique_filename
+    def cached_result(self, content: bytes, profile_name: str, render: RenderMode = "eager") -> tuple[str, DetectionResponse | None]:
+        """Look up the response of an identical, already processed upload.
 
-        # Odczyt i konwersja obrazu (obsługa .heic)
-        try:
-            content = await file.read()
-            if not content:
-                print("Error: Uploaded file is empty")
-                return None
-            
-            # Otwarcie obrazu z bufora
-            img_pil = Image.open(io.BytesIO(content)).convert("RGB")
-            
-            # Sprawdzenie rozszerzenia pliku i konwersja .heic
-            file_extension = file.filename.split('.')[-1].lower()
-            if file_extension in ['heic', 'heif']:
-                img_pil.save(temp_file, "JPEG", quality=95)
-            else:
-                img_pil.save(temp_file, "JPEG", quality=95)  # Dla innych formatów (np. jpg, png)
-            
-        except Exception as e:
-            print(f"Error processing image: {e}")
-            return None
+        Args:
+            content (bytes): The uploaded image.
+            profile_name (str): The name of the detection profile.
+            render (RenderMode): When the annotated image is rendered.
 
-        # Weryfikacja pliku
-        if not temp_file.exists() or temp_file.stat().st_size == 0:
-            print(f"Error: Temporary file {temp_file} does not exist or is empty")
-            return None
+        Returns:
+            tuple[str, DetectionResponse | None]: The cache key and the stored response if any.
+        """
+        parameters = detection_parameters(profile_name, config.detection_profile(profile_name), render)
+        key = result_key(content, model_identity(), parameters)
+        return key, self.result_cache.get(key)
 
-        # Załadowanie obrazu
-        img = cv2.imread(str(temp_file))
-        if img is None:
-            print(f"Error: Failed to load image from {temp_file}")
-            temp_file.unlink(missing_ok=True)
-            return None
+    async def detect_signs_from_file(
+            self,
+            file: UploadFile,
+            profile: str | None = None,
+            render: RenderMode = "eager",
+    ) -> DetectionResponse | None:
+        content = await self.read_image(file)
+        return await self.detect_signs_from_content(content, file.filename, profile, render)
 
-        try:
-            height, width, _ = img.shape
-        except Exception as e:
-            print(f"Error accessing image shape: {e}")
-            temp_file.unlink(missing_ok=True)
-            return None
+    async def read_image(self, file: UploadFile) -> bytes:
+        """Validate an uploaded image and read it into memory.
 
-        recognized_boxes = []
-
-        # Parametry
-        tile_size = 640
-        overlap = 0.2
-        conf_threshold = 0.5
-
-        # Tiling
-        step = int(tile_size * (1 - overlap))
-        for y in range(0, height, step):
-            for x in range(0, width, step):
-                x_end = min(x + tile_size, width)
-                y_end = min(y + tile_size, height)
-                tile = img[y:y_end, x:x_end]
-
-                results = model(tile, conf=conf_threshold)
-
-                for result in results:
-                    for box in result.boxes:
-                        class_id = int(box.cls.item())
-                        confidence = box.conf.item()
-                        x1, y1_, x2, y2 = map(int, box.xyxy[0].tolist())
-                        x1_global, y1_global = x + x1, y + y1_
-                        x2_global, y2_global = x + x2, y + y2
-
-                        new_box = (x1_global, y1_global, x2_global, y2_global, class_id, confidence)
-                        print(f"New box: {new_box}")
-                        if not await self.is_duplicate(new_box, recognized_boxes):
-                            recognized_boxes.append(new_box)
-
-        # Zmniejszone kopie
-        for scale_factor in [0.5, 0.25]:
-            small_img = cv2.resize(img, (0, 0), fx=scale_factor, fy=scale_factor)
-            results = model(small_img, conf=conf_threshold)
-
-            for result in results:
-                for box in result.boxes:
-                    class_id = int(box.cls.item())
-                    confidence = box.conf.item()
-                    x1, y1_, x2, y2 = map(int, box.xyxy[0].tolist())
-                    x1 = int(x1 / scale_factor)
-                    y1_ = int(y1_ / scale_factor)
-                    x2 = int(x2 / scale_factor)
-                    y2 = int(y2 / scale_factor)
-
-                    new_box = (x1, y1_, x2, y2, class_id, confidence)
-                    print(f"New box (scaled): {new_box}")
-                    if not await self.is_duplicate(new_box, recognized_boxes):
-                        recognized_boxes.append(new_box)
+        Args:
+            file (UploadFile): The file uploaded by user.
 
-        # Rysowanie boxów na obrazie
-        for box in recognized_boxes:
-            x1, y1, x2, y2, class_id, confidence = box
-            label = f"{class_names[class_id]} ({int(confidence * 100)}%)" if class_id < len(class_names) else "Unknown"
-            color = (0, 255, 0)
-            thickness = 3
-            cv2.rectangle(img, (x1, y1), (x2, y2), color, thickness)
-            cv2.putText(img, label, (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.7, color, 3)
+        Raises:
+            UploadRejectedError: If the upload is not an image, is too large or is empty.
 
-        # Zapisanie wyjściowego obrazu
-        output_file = outputs_dir / unique_filename
-        if not cv2.imwrite(str(output_file), img):
-            print(f"Error: Failed to save output image to {output_file}")
-            temp_file.unlink(missing_ok=True)
+        Returns:
+            bytes: The content of the image.
+        """
+        # Odrzucenie pliku przed odczytem jego zawartości
+        if not has_allowed_type(file, "image/", ALLOWED_IMAGE_EXTENSIONS):
+            logger.warning("Uploaded file is not an image. Detected MIME type: %s", file.content_type)
+            raise UploadRejectedError(415, f"Uploaded file is not an image: {file.content_type}.")
+
+        with timed("image", "upload_read"):
+            content = await read_upload(file, config.MAX_IMAGE_UPLOAD_MB * 1024 * 1024)
+        if content is None:
+            logger.warning("Uploaded image is too large")
+            raise UploadRejectedError(413, f"Uploaded image exceeds {config.MAX_IMAGE_UPLOAD_MB} MB.")
+        if not content:
+            logger.warning("Uploaded file is empty")
+            raise UploadRejectedError(400, "Uploaded file is empty.")
+        return content
+
+    async def detect_signs_from_content(
+            self,
+            content: bytes,
+            filename: str | None,
+            profile: str | None = None,
+            render: RenderMode = "eager",
+            shared_batching: bool = False,
+    ) -> DetectionResponse | None:
+        """Detect traffic signs in an already read image.
+
+        Args:
+            content (bytes): The uploaded image.
+            filename (str | None): The name of the uploaded file.
+            profile (str | None): The name of the detection profile, the default one if None.
+            render (RenderMode): When the annotated image is rendered.
+            shared_batching (bool): Whether the tiles share forward passes with other images.
+
+        Returns:
+            DetectionResponse | None: The detection response if the image was processed.
+        """
+        # Profil detekcji wybrany w zapytaniu lub domyślny
+        profile_name = profile or config.DETECTION_PROFILE
+        detection_profile = config.detection_profile(profile_name)
+
+        # Stworzenie unikalnego imienia dla tymczasowego i wyjściowego pliku
+        unique_filename = f"{uuid.uuid4()}.jpg"
+
+        # Ten sam plik przetworzony wcześniej z tym samym modelem i parametrami
+        cache_key = None
+        if self.result_cache is not None and self.result_cache.enabled:
+            with timed("image", "cache_lookup"):
+                cache_key, cached = await asyncio.to_thread(self.cached_result, content, profile_name, render)
+            if cached is not None:
+                logger.debug("Cached result: %s", cached.file_url)
+                return cached
+
+        # Detekcja poza pętlą zdarzeń
+        result = await self.executor.run(
+            detect_image, content, filename, unique_filename, detection_profile, render, shared_batching
+        )
+        if result is None:
             return None
+        record_stages("image", result.timings)
+        recognized_boxes = result.boxes
 
         # Przygotowanie odpowiedzi
         recognized_ids = [class_names[box[4]] if box[4] < len(class_names) else None for box in recognized_boxes]
         unique_ids = list(set(filter(None, recognized_ids)))
 
-        sign_objects = []
-        for sign_id in unique_ids:
-            sign = await self.sign_repository.get_road_sign_by_id(sign_id)
-            if sign:
-                sign_objects.append(sign)
+        with timed("image", "db_lookup"):
+            sign_objects = list((await self.sign_repository.get_road_signs_by_ids(unique_ids)).values())
+
+        # Bez pliku wynikowego klient rysuje boxy sam
+        file_url = f"/static/{unique_filename}" if render != "none" else ""
+
+        logger.debug("Recognized signs: %s", sign_objects)
+        logger.debug("Boxes: %s", recognized_boxes)
+        logger.debug("File URL: %s", file_url)
+
+        with timed("image", "response_build"):
+            response = DetectionResponse(
+                signs=sign_objects,
+                total_boxes=len(recognized_boxes),
+                file_url=file_url,
+                boxes=[Box(x1=box[0], y1=box[1], x2=box[2], y2=box[3], class_id=class_names[box[4]], confidence=box[5]) for box in recognized_boxes],
+                tiles_total=result.tiles_total,
+                tiles_skipped=result.tiles_skipped,
+                profile=profile_name,
+            )
+
+        if cache_key is not None:
+            await asyncio.to_thread(self.result_cache.put, cache_key, response)
+        return response
+
+    async def detect_signs_from_files(
+            self,
+            files: List[UploadFile],
+            profile: str | None = None,
+            render: RenderMode = "eager",
+    ) -> AsyncIterator[tuple[int, DetectionResponse | None]]:
+        # Pliki są zamykane po odpowiedzi endpointu, więc trafiają na dysk, a do pamięci dopiero przy detekcji
+        images = []
+        try:
+            for file in files:
+                try:
+                    path = await self.spool_image(file)
+                except UploadRejectedError as e:
+                    logger.warning("Skipping %s in batch: %s", file.filename, e.detail)
+                    path = None
+                images.append((file.filename, path))
+        except BaseException:
+            for _, path in images:
+                if path is not None:
+                    path.unlink(missing_ok=True)
+            raise
+        return self._detect_images(images, profile, render)
 
-        temp_file.unlink(missing_ok=True)
+    async def spool_image(self, file: UploadFile) -> Path:
+        """Validate an uploaded image and copy it to a temporary file.
 
-        file_url = f"/static/{unique_filename}"
+        Args:
+            file (UploadFile): The file uploaded by user.
 
-        print(f"Recognized signs: {sign_objects}")
-        print(f"Boxes: {recognized_boxes}")
-        print(f"File URL: {file_url}")
+        Raises:
+            UploadRejectedError: If the upload is not an image, is too large or is empty.
 
-        return DetectionResponse(
-            signs=sign_objects,
-            total_boxes=len(recognized_boxes),
-            file_url=file_url,
-            boxes=[Box(x1=box[0], y1=box[1], x2=box[2], y2=box[3], class_id=class_names[box[4]], confidence=box[5]) for box in recognized_boxes],
-        )
\ No newline at end of file
+        Returns:
+            Path: The temporary file, removed by the caller.
+        """
+        if not has_allowed_type(file, "image/", ALLOWED_IMAGE_EXTENSIONS):
+            raise UploadRejectedError(415, f"Uploaded file is not an image: {file.content_type}.")
+
+        temp_dir = Path("temp")
+        temp_dir.mkdir(exist_ok=True)
+        path = temp_dir / f"{uuid.uuid4()}{Path(file.filename or '').suffix.lower()}"
+        try:
+            with timed("image", "upload_read"):
+                size = await spool_upload(file, path, config.MAX_IMAGE_UPLOAD_MB * 1024 * 1024)
+        except Exception:
+            path.unlink(missing_ok=True)
+            raise
+        if size is None:
+            raise UploadRejectedError(413, f"Uploaded image exceeds {config.MAX_IMAGE_UPLOAD_MB} MB.")
+        if not size:
+            path.unlink(missing_ok=True)
+            raise UploadRejectedError(400, "Uploaded file is empty.")
+        return path
+
+    async def _detect_images(
+            self,
+            images: List[tuple[str | None, Path | None]],
+            profile: str | None,
+            render: RenderMode,
+    ) -> AsyncIterator[tuple[int, DetectionResponse | None]]:
+        # Ograniczona liczba zdjęć w pamięci naraz, ich kafelki trafiają do wspólnych wsadów
+        slots = asyncio.Semaphore(max(1, config.BATCH_CONCURRENCY))
+
+        async def detect(index: int, filename: str | None, path: Path | None) -> tuple[int, DetectionResponse | None]:
+            if path is None:
+                return index, None
+            try:
+                async with slots:
+                    content = await asyncio.to_thread(path.read_bytes)
+                    return index, await self.detect_signs_from_content(content, filename, profile, render, shared_batching=True)
+            except Exception as e:
+                logger.exception("Error detecting signs in %s: %s", filename, e)
+                return index, None
+            finally:
+                path.unlink(missing_ok=True)
+
+        tasks = [asyncio.create_task(detect(index, filename, path)) for index, (filename, path) in enumerate(images)]
+        try:
+            # Wyniki w kolejności zakończenia
+            for task in asyncio.as_completed(tasks):
+                yield await task
+        finally:
+            for task in tasks:
+                task.cancel()
+            # Zadania anulowane przed startem nie usuwają swoich plików
+            for _, path in images:
+                if path is not None:
+                    path.unlink(missing_ok=True)
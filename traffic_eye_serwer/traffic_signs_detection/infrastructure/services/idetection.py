@@ -2,20 +2,53 @@
 
 from fastapi import UploadFile
 from abc import ABC, abstractmethod
+from typing import AsyncIterator, List
 
-from core.domain.detection import DetectionResponse
+from core.domain.detection import DetectionResponse, RenderMode
 
 
 class IDetectionService(ABC):
     """An abstract class representing protocol of detection repository."""
 
     @abstractmethod
-    async def detect_signs_from_file(self, file: UploadFile) -> DetectionResponse | None:
+    async def detect_signs_from_file(
+            self,
+            file: UploadFile,
+            profile: str | None = None,
+            render: RenderMode = "eager",
+    ) -> DetectionResponse | None:
         """The abstract getting a detection from the repository.
 
         Args:
             file: The file uploaded by user.
+            profile: The name of the detection profile, the default one if None.
+            render: When the annotated image is rendered.
+
+        Raises:
+            UploadRejectedError: If the upload is not an image, is too large or is empty.
+
+        Returns:
+            DetectionResponse | None: The detection, None if the image cannot be decoded.
+        """
+
+    @abstractmethod
+    async def detect_signs_from_files(
+            self,
+            files: List[UploadFile],
+            profile: str | None = None,
+            render: RenderMode = "eager",
+    ) -> AsyncIterator[tuple[int, DetectionResponse | None]]:
+        """The abstract reading several images and getting their detections as each one is done.
+
+        The files are copied to temporary files before the method returns,
+        each one is read into memory only when its detection starts, while
+        the returned iterator is consumed.
+
+        Args:
+            files: The files uploaded by user.
+            profile: The name of the detection profile, the default one if None.
+            render: When the annotated images are rendered.
 
         Returns:
-            DetectionResponse | None: The detection if exists.
+            AsyncIterator[tuple[int, DetectionResponse | None]]: The index of every file with its detection if exists.
         """
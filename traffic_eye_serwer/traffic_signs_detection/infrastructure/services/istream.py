@@ -0,0 +1,28 @@
+"""Module containing live stream service abstractions."""
+
+from abc import ABC, abstractmethod
+
+from infrastructure.services.video_detection import StreamSession
+
+
+class IStreamService(ABC):
+    """An abstract class representing protocol of live stream service."""
+
+    @abstractmethod
+    def open_session(self, profile: str | None = None) -> StreamSession | None:
+        """The abstract opening the detection session of a new stream.
+
+        Args:
+            profile: The name of the detection profile, the default one if None.
+
+        Returns:
+            StreamSession | None: The session if the stream limit allows another stream.
+        """
+
+    @abstractmethod
+    def close_session(self, session: StreamSession) -> None:
+        """The abstract closing the session of a finished stream.
+
+        Args:
+            session: The session opened for the stream.
+        """
@@ -3,19 +3,31 @@
 from fastapi import UploadFile
 from abc import ABC, abstractmethod
 
-from core.domain.detection import DetectionResponse
+from core.domain.detection import DetectionResponse, RenderMode
 
 
 class IVideoDetectionService(ABC):
     """An abstract class representing protocol of video detection service."""
 
     @abstractmethod
-    async def detect_signs_from_video(self, file: UploadFile) -> DetectionResponse | None:
+    async def detect_signs_from_video(
+            self,
+            file: UploadFile,
+            frames: bool = False,
+            profile: str | None = None,
+            render: RenderMode = "eager",
+    ) -> DetectionResponse | None:
         """The abstract getting a detection from the video detection service.
 
         Args:
             file: The file uploaded by user.
+            frames: Whether to add the per-frame detections to the tracks.
+            profile: The name of the detection profile, the default one if None.
+            render: When the annotated video is rendered.
+
+        Raises:
+            UploadRejectedError: If the upload is not a supported video, is too large or is empty.
 
         Returns:
-            DetectionResponse | None: The detection if exists.
+            DetectionResponse | None: The detection, None if the video cannot be processed.
         """
\ No newline at end of file
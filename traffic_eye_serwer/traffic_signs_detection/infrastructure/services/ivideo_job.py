@@ -0,0 +1,66 @@
+"""Module containing video job service abstractions."""
+
+from fastapi import UploadFile
+from abc import ABC, abstractmethod
+
+from core.domain.detection import DetectionResponse, RenderMode
+from core.domain.job import VideoJob
+
+
+class JobQueueFullError(Exception):
+    """An exception raised when no more video jobs can be queued."""
+
+
+class IVideoJobService(ABC):
+    """An abstract class representing protocol of video job service."""
+
+    @abstractmethod
+    async def submit(self, file: UploadFile, profile: str | None = None, render: RenderMode = "eager") -> VideoJob:
+        """The abstract submitting a video for asynchronous detection.
+
+        Args:
+            file: The file uploaded by user.
+            profile: The name of the detection profile, the default one if None.
+            render: When the annotated video is rendered.
+
+        Raises:
+            JobQueueFullError: If the job queue is full.
+            UploadRejectedError: If the upload is not a supported video, is too large or is empty.
+
+        Returns:
+            VideoJob: The queued job.
+        """
+
+    @abstractmethod
+    async def get_job(self, job_id: str) -> VideoJob | None:
+        """The abstract getting the state of a job.
+
+        Args:
+            job_id: The id of the job.
+
+        Returns:
+            VideoJob | None: The job if exists.
+        """
+
+    @abstractmethod
+    async def get_result(self, job_id: str, frames: bool = False) -> DetectionResponse | None:
+        """The abstract getting the result of a finished job.
+
+        Args:
+            job_id: The id of the job.
+            frames: Whether to add the per-frame detections to the tracks.
+
+        Returns:
+            DetectionResponse | None: The result if the job is done.
+        """
+
+    @abstractmethod
+    async def cancel(self, job_id: str) -> VideoJob | None:
+        """The abstract cancelling a queued or running job.
+
+        Args:
+            job_id: The id of the job.
+
+        Returns:
+            VideoJob | None: The job if exists.
+        """
@@ -0,0 +1,59 @@
+"""Module containing live stream service implementation."""
+
+import logging
+
+from config import config
+from infrastructure.services.istream import IStreamService
+from infrastructure.services.video_detection import StreamSession
+
+logger = logging.getLogger(__name__)
+
+
+class StreamService(IStreamService):
+    """A class implementing the live stream service.
+
+    It opens a tracking session per connected stream and caps the number
+    of streams running at the same time.
+    """
+
+    def __init__(self, max_streams: int = 4) -> None:
+        """The initializer of the 'stream service'.
+
+        Args:
+            max_streams (int): The number of streams allowed at the same time.
+        """
+
+        self.max_streams = max_streams
+        self._sessions: set[StreamSession] = set()
+
+    @property
+    def active_streams(self) -> int:
+        """The number of open streams."""
+        return len(self._sessions)
+
+    def open_session(self, profile: str | None = None) -> StreamSession | None:
+        """The method opening the detection session of a new stream.
+
+        Args:
+            profile (str | None): The name of the detection profile, the default one if None.
+
+        Returns:
+            StreamSession | None: The session if the stream limit allows another stream.
+        """
+
+        if len(self._sessions) >= self.max_streams:
+            return None
+
+        session = StreamSession(config.detection_profile(profile))
+        self._sessions.add(session)
+        return session
+
+    def close_session(self, session: StreamSession) -> None:
+        """The method closing the session of a finished stream.
+
+        Args:
+            session (StreamSession): The session opened for the stream.
+        """
+
+        self._sessions.discard(session)
+        logger.info("Stream closed: %s", session.stats())
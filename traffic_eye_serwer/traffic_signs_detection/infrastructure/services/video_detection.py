@@ -1,53 +1,665 @@
 from fastapi import UploadFile
-from core.config_model import get_model, class_names
-from core.domain.detection import DetectionResponse, Box
+from core.config_model import class_names
+from core.domain.detection import DetectionResponse, Box, FrameDetections, RenderMode
 from core.repositories.iroadsign import IRoadSignRepository
+from config import DetectionProfile, config
+from utils.boxes import merge_boxes
+from utils.executor import InferenceExecutor, run_on_every_thread
+from utils.inference import predict_groups
+from utils.metrics import StageTimer, record_stages, timed
+from utils.rendering import class_colors, draw_boxes, save_pending_video
+from utils.tiling import image_tile
+from utils.tracking import TrackSummary, Tracker
+from utils.upload import UploadRejectedError, spool_upload
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from pathlib import Path
+from typing import Dict, List
+import asyncio
+import logging
+import queue
+import threading
+import time
 import cv2
 import numpy as np
-from PIL import Image
-import io
 import uuid
-import os
-from colorsys import hsv_to_rgb
+
+logger = logging.getLogger(__name__)
+
+
+# Size of the grayscale thumbnails compared by the scene change metric
+SCENE_THUMBNAIL_SIZE = (64, 36)
+# How often blocked pipeline stages check whether the processor was closed
+QUEUE_POLL_SECONDS = 0.1
+_END = object()  # Marks the end of the frames passed between the pipeline stages
+
+# Stage threads live as long as a video, the model runs on long-lived threads keeping their models loaded
+_model_threads = ThreadPoolExecutor(max_workers=config.INFERENCE_WORKERS, thread_name_prefix="video-model")
+
+
+@dataclass
+class VideoResult:
+    """A class representing the outcome of processing a video."""
+    frame_boxes: np.ndarray  # (N, 8) time, track_id, x1, y1, x2, y2, class_id, confidence
+    tracks: List[TrackSummary]
+    frames_decoded: int
+    frames_inferred: int
+    timings: Dict[str, float] = field(default_factory=dict)  # Seconds spent in every stage, summed over the frames
+
+
+class VideoProcessor:
+    """A class running the resumable detection and tracking loop over a saved video.
+
+    `process` can be called repeatedly with a frame budget, so the caller
+    can report progress or stop between calls.
+
+    Decoding, inference, tracking with drawing and encoding run as
+    concurrent stages: a decoder thread, an inference thread batching the
+    keyframes, the thread calling `process` and an encoder thread. The
+    stages are connected by bounded queues, which cap the frames held in
+    memory and make faster stages wait for the slowest one. Without an
+    eagerly rendered output there is no drawing and no encoder stage.
+
+    The model runs on keyframes only. A frame is a keyframe when
+    `keyframe_interval` frames passed since the last one or, with a
+    positive `scene_change_threshold`, when the mean absolute difference
+    of downscaled grayscale frames since the last keyframe exceeds it.
+    The tracked boxes are carried over the frames in between.
+    """
+
+    def __init__(
+            self,
+            temp_file: Path,
+            output_file: Path,
+            keyframe_interval: int | None = None,
+            scene_change_threshold: float | None = None,
+            pipeline_depth: int | None = None,
+            inference_batch: int | None = None,
+            profile: DetectionProfile | None = None,
+            render: RenderMode = "eager",
+    ) -> None:
+        """Initialize the processor of a saved video.
+
+        Args:
+            temp_file (Path): The saved upload, removed when the processor is closed.
+            output_file (Path): The path of the annotated output video.
+            keyframe_interval (int | None): The largest number of frames between detections, 1 detects on every frame.
+            scene_change_threshold (float | None): The mean pixel difference, 0-255, forcing a detection, 0 disables it.
+            pipeline_depth (int | None): The number of frames each queue between the stages holds.
+            inference_batch (int | None): The largest number of keyframes passed to the model at once.
+            profile (DetectionProfile | None): The thresholds, sampling and rendering, the default profile if None.
+            render (RenderMode): Whether the annotated video is encoded now, kept to be rendered on download or skipped.
+        """
+        self.profile = profile or config.detection_profile()
+        self.render = render
+        self.temp_file = temp_file
+        self.output_file = output_file
+        self.cap = None
+        self.out = None
+        self.fps = 0.0
+        self.frames_total = 0
+        self.frames_processed = 0
+        self.frames_inferred = 0
+        self.finished = False
+
+        # Keyframe sampling
+        self.keyframe_interval = max(1, keyframe_interval or self.profile.keyframe_interval or config.VIDEO_KEYFRAME_INTERVAL)
+        self.scene_change_threshold = (
+            config.VIDEO_SCENE_CHANGE_THRESHOLD if scene_change_threshold is None else scene_change_threshold
+        )
+        self.last_keyframe = None  # Thumbnail of the last frame the model ran on
+        self.frames_since_keyframe = None
+
+        # Pipeline stages
+        self.pipeline_depth = max(1, pipeline_depth or config.VIDEO_PIPELINE_DEPTH)
+        self.inference_batch = max(1, inference_batch or config.VIDEO_INFERENCE_BATCH)
+        self._decoded = queue.Queue(maxsize=self.pipeline_depth)  # (frame, is keyframe)
+        self._inferred = queue.Queue(maxsize=self.pipeline_depth)  # (frame, detections or None)
+        self._encoded = queue.Queue(maxsize=self.pipeline_depth)  # annotated frames
+        self._threads = []
+        self._stop = threading.Event()
+        self._error = None
+        # Each stage thread adds to its own entries
+        self.timer = StageTimer()
+
+        # Detection parameters
+        self.conf_threshold = self.profile.conf_threshold
+        self.iou_threshold = self.profile.iou_threshold
+        self.persistence_frames = self.profile.persistence_frames  # Keep label for a few frames after detection stops
+        self.frame_boxes = []
+        self.drawn_boxes = []  # Boxes of every frame kept for a lazy render
+        self.tracker = Tracker(
+            high_threshold=self.conf_threshold,
+            low_threshold=config.TRACK_LOW_CONFIDENCE,
+            iou_threshold=self.iou_threshold,
+            max_age=self.persistence_frames,
+        )
+
+        # Generate unique colors for classes
+        self.class_colors = class_colors()
+
+    def open(self) -> bool:
+        """Open the input video and the output writer.
+
+        Returns:
+            bool: True if both the input and the output could be opened.
+        """
+
+        # Open video
+        self.cap = cv2.VideoCapture(str(self.temp_file))
+        if not self.cap.isOpened():
+            logger.error("Failed to open video %s", self.temp_file)
+            self.close()
+            return False
+
+        # Video properties
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS)
+        width = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        self.frames_total = int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        if self.render != "eager":
+            return True
+
+        # Output video
+        fourcc = cv2.VideoWriter_fourcc(*"mp4v")
+        self.out = cv2.VideoWriter(str(self.output_file), fourcc, self.fps, (width, height))
+
+        if not self.out.isOpened():
+            logger.error("Failed to create output video %s", self.output_file)
+            self.close()
+            return False
+
+        return True
+
+    def process(self, max_frames: int | None = None) -> bool:
+        """Process the next frames of the video.
+
+        The decoder, inference and encoder stages are started on the first call.
+
+        Args:
+            max_frames (int | None): The number of frames to process in this call, all if None.
+
+        Raises:
+            Exception: The error which stopped one of the stages.
+
+        Returns:
+            bool: True if the whole video has been processed.
+        """
+
+        if not self._threads and not self.finished:
+            self._start()
+
+        processed = 0
+        while not self.finished and (max_frames is None or processed < max_frames):
+            item = self._get(self._inferred)
+            if item is _END:
+                # Let the encoder flush the remaining frames
+                if self.render == "eager":
+                    self._put(self._encoded, _END)
+                self._join()
+                if self._error is not None:
+                    raise self._error
+                self.finished = True
+                break
+
+            frame, detections = item
+            self.process_frame(frame, detections)
+            processed += 1
+
+        return self.finished
+
+    def is_keyframe(self, frame: np.ndarray) -> bool:
+        """Decide whether the model runs on a frame.
+
+        Args:
+            frame (np.ndarray): The decoded BGR frame.
+
+        Returns:
+            bool: True if the signs on the frame have to be detected.
+        """
+
+        if self.keyframe_interval == 1:
+            return True
+
+        thumbnail = None
+        if self.scene_change_threshold > 0:
+            thumbnail = cv2.cvtColor(cv2.resize(frame, SCENE_THUMBNAIL_SIZE, interpolation=cv2.INTER_AREA), cv2.COLOR_BGR2GRAY)
+
+        keyframe = self.frames_since_keyframe is None or self.frames_since_keyframe + 1 >= self.keyframe_interval
+        if not keyframe and thumbnail is not None:
+            change = cv2.absdiff(thumbnail, self.last_keyframe).mean()
+            keyframe = change > self.scene_change_threshold
+
+        if keyframe:
+            self.last_keyframe = thumbnail
+            self.frames_since_keyframe = 0
+        else:
+            self.frames_since_keyframe += 1
+        return keyframe
+
+    def process_frame(self, frame: np.ndarray, detections: np.ndarray | None) -> None:
+        """Track and draw signs on a single frame and pass it to the encoder.
+
+        Between keyframes the tracked boxes are drawn without new detections.
+
+        Args:
+            frame (np.ndarray): The decoded BGR frame.
+            detections (np.ndarray | None): The (N, 6) detections of a keyframe, None for other frames.
+        """
+
+        current_time = self.frames_processed / self.fps  # Time in seconds
+        self.frames_processed += 1
+
+        if detections is not None:
+            self.frames_inferred += 1
+            with self.timer.stage("track"):
+                updated = self.tracker.update(detections, self.frames_processed - 1, current_time)
+
+            # Store new or updated detections
+            if len(updated):
+                self.frame_boxes.append(np.column_stack([
+                    np.full(len(updated), current_time),
+                    self.tracker.ids[updated],
+                    self.tracker.boxes[updated],
+                ]))
+
+        if self.render == "lazy" and len(self.tracker.boxes):
+            self.drawn_boxes.append(np.column_stack([
+                np.full(len(self.tracker.boxes), self.frames_processed - 1),
+                self.tracker.boxes,
+            ]))
+        if self.render != "eager":
+            return
+
+        # Draw boxes and labels
+        with self.timer.stage("render"):
+            draw_boxes(frame, self.tracker.boxes.tolist(), self.profile.draw_labels, self.class_colors)
+        self._put(self._encoded, frame)
+
+    def result(self) -> VideoResult:
+        """Summarise the processed part of the video.
+
+        Returns:
+            VideoResult: The per-frame boxes, the tracks, the frame counters and the stage timings.
+        """
+
+        frame_boxes = np.concatenate(self.frame_boxes) if self.frame_boxes else np.empty((0, 8))
+        return VideoResult(frame_boxes, self.tracker.tracks(), self.frames_processed, self.frames_inferred, dict(self.timer.stages))
+
+    def close(self) -> None:
+        """Stop the pipeline stages, release the video handles and remove the saved upload.
+
+        A fully processed video rendered lazily keeps its upload for the render.
+        """
+
+        self._stop.set()
+        self._join()
+        if self.cap is not None:
+            self.cap.release()
+        if self.out is not None:
+            self.out.release()
+        if self.render == "lazy" and self.finished and self.temp_file.exists():
+            drawn_boxes = np.concatenate(self.drawn_boxes) if self.drawn_boxes else np.empty((0, 7))
+            save_pending_video(self.output_file.name, self.temp_file, drawn_boxes, self.profile.draw_labels)
+        self.temp_file.unlink(missing_ok=True)
+
+    def _start(self) -> None:
+        self._threads = [
+            threading.Thread(target=self._decode, name="video-decode", daemon=True),
+            threading.Thread(target=self._infer, name="video-inference", daemon=True),
+        ]
+        if self.render == "eager":
+            self._threads.append(threading.Thread(target=self._encode, name="video-encode", daemon=True))
+        for thread in self._threads:
+            thread.start()
+
+    def _join(self) -> None:
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def _fail(self, error: Exception) -> None:
+        # Remember the first error and unblock every other stage
+        if self._error is None:
+            self._error = error
+        self._stop.set()
+
+    def _put(self, channel: queue.Queue, item) -> bool:
+        while not self._stop.is_set():
+            try:
+                channel.put(item, timeout=QUEUE_POLL_SECONDS)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def _get(self, channel: queue.Queue):
+        while not self._stop.is_set():
+            try:
+                return channel.get(timeout=QUEUE_POLL_SECONDS)
+            except queue.Empty:
+                pass
+        return _END
+
+    def _decode(self) -> None:
+        try:
+            while True:
+                with self.timer.stage("decode"):
+                    ret, frame = self.cap.read()
+                if not ret:
+                    break
+                if not self._put(self._decoded, (frame, self.is_keyframe(frame))):
+                    return
+            self._put(self._decoded, _END)
+        except Exception as e:
+            self._fail(e)
+
+    def _infer(self) -> None:
+        try:
+            ended = False
+            while not ended:
+                # Take what the decoder has ready, up to a full batch of keyframes
+                batch = []
+                item = self._get(self._decoded)
+                while item is not _END:
+                    batch.append(item)
+                    keyframes = sum(keyframe for _, keyframe in batch)
+                    if keyframes >= self.inference_batch or len(batch) >= self.pipeline_depth:
+                        break
+                    try:
+                        item = self._decoded.get_nowait()
+                    except queue.Empty:
+                        break
+                ended = item is _END
+
+                keyframes = [frame for frame, keyframe in batch if keyframe]
+                groups = [[image_tile(frame)] for frame in keyframes]
+                with self.timer.stage("inference"):
+                    detections = iter(_model_threads.submit(predict_groups, groups, self.tracker.low_threshold).result())
+                for frame, keyframe in batch:
+                    frame_detections = None
+                    if keyframe:
+                        with self.timer.stage("merge"):
+                            frame_detections = merge_boxes(next(detections), self.iou_threshold, config.BOX_MERGE_METHOD)
+                    if not self._put(self._inferred, (frame, frame_detections)):
+                        return
+            self._put(self._inferred, _END)
+        except Exception as e:
+            self._fail(e)
+
+    def _encode(self) -> None:
+        try:
+            while True:
+                frame = self._get(self._encoded)
+                if frame is _END:
+                    break
+                with self.timer.stage("encode"):
+                    self.out.write(frame)
+        except Exception as e:
+            self._fail(e)
+
+
+def detect_video(
+        temp_file: Path,
+        output_file: Path,
+        profile: DetectionProfile | None = None,
+        render: RenderMode = "eager",
+) -> VideoResult | None:
+    """Detect traffic signs in a saved video and write the annotated copy.
+
+    The function is blocking and is meant to run on the inference executor.
+
+    Args:
+        temp_file (Path): The saved upload, removed once processed.
+        output_file (Path): The path of the annotated output video.
+        profile (DetectionProfile | None): The thresholds, sampling and rendering, the default profile if None.
+        render (RenderMode): Whether the annotated video is encoded now, kept to be rendered on download or skipped.
+
+    Returns:
+        VideoResult | None: The per-frame boxes, tracks and frame counters if the video was processed.
+    """
+
+    processor = VideoProcessor(temp_file, output_file, profile=profile, render=render)
+    if not processor.open():
+        return None
+
+    try:
+        processor.process()
+    finally:
+        # Cleanup
+        processor.close()
+
+    return processor.result()
+
+
+class StreamSession:
+    """A class detecting and tracking signs on the frames of one live stream.
+
+    Frames arriving while the previous one is processed replace each
+    other, only the latest one is processed next and the replaced ones
+    are counted as dropped. The model runs on the video inference threads.
+    """
+
+    def __init__(self, profile: DetectionProfile | None = None) -> None:
+        """Initialize the session of a stream.
+
+        Args:
+            profile (DetectionProfile | None): The thresholds and track persistence, the default profile if None.
+        """
+        self.profile = profile or config.detection_profile()
+        self.tracker = Tracker(
+            high_threshold=self.profile.conf_threshold,
+            low_threshold=config.TRACK_LOW_CONFIDENCE,
+            iou_threshold=self.profile.iou_threshold,
+            max_age=self.profile.persistence_frames,
+        )
+        self.started = time.monotonic()
+        self.frames_received = 0
+        self.frames_processed = 0
+        self.frames_dropped = 0
+        self.latency_total = 0.0
+        self._pending = None  # (index, content, received) of the latest unprocessed frame
+        self._ready = asyncio.Event()
+
+    def offer(self, content: bytes) -> None:
+        """Take a received encoded frame, replacing the unprocessed one.
+
+        Args:
+            content (bytes): The JPEG encoded frame.
+        """
+        if self._pending is not None:
+            self.frames_dropped += 1
+        self._pending = (self.frames_received, content, time.monotonic())
+        self.frames_received += 1
+        self._ready.set()
+
+    async def take(self) -> tuple[int, bytes, float]:
+        """Wait for the latest unprocessed frame.
+
+        Returns:
+            tuple[int, bytes, float]: The index of the frame, its content and the time it was received.
+        """
+        await self._ready.wait()
+        self._ready.clear()
+        pending, self._pending = self._pending, None
+        return pending
+
+    async def detect(self, index: int, content: bytes, received: float) -> dict:
+        """Detect and track the signs on a frame.
+
+        Args:
+            index (int): The index of the frame in the stream.
+            content (bytes): The JPEG encoded frame.
+            received (float): The monotonic time the frame was received.
+
+        Returns:
+            dict: The message with the tracked boxes, the latency and the stream stats.
+        """
+        tracked = await asyncio.wrap_future(_model_threads.submit(self._track, content, index, received - self.started))
+        latency = time.monotonic() - received
+        if tracked is None:
+            return {"frame": index, "error": "Invalid frame.", "stats": self.stats()}
+
+        self.frames_processed += 1
+        self.latency_total += latency
+        return {
+            "frame": index,
+            "boxes": [
+                Box(
+                    x1=int(x1),
+                    y1=int(y1),
+                    x2=int(x2),
+                    y2=int(y2),
+                    class_id=class_names[int(class_id)] if int(class_id) < len(class_names) else "Unknown",
+                    confidence=confidence,
+                    track_id=int(track_id),
+                ).model_dump(exclude_none=True)
+                for track_id, x1, y1, x2, y2, class_id, confidence in tracked.tolist()
+            ],
+            "latency_ms": round(latency * 1000, 1),
+            "stats": self.stats(),
+        }
+
+    def stats(self) -> dict:
+        """Summarise the throughput of the stream.
+
+        Returns:
+            dict: The frame counters, the processed frames per second and the mean latency.
+        """
+        elapsed = time.monotonic() - self.started
+        return {
+            "frames_received": self.frames_received,
+            "frames_processed": self.frames_processed,
+            "frames_dropped": self.frames_dropped,
+            "fps": round(self.frames_processed / elapsed, 2) if elapsed > 0 else 0.0,
+            "avg_latency_ms": round(self.latency_total / self.frames_processed * 1000, 1) if self.frames_processed else 0.0,
+        }
+
+    def _track(self, content: bytes, index: int, timestamp: float) -> np.ndarray | None:
+        timer = StageTimer()
+        with timer.stage("decode"):
+            frame = cv2.imdecode(np.frombuffer(content, dtype=np.uint8), cv2.IMREAD_COLOR)
+        if frame is None:
+            return None
+
+        with timer.stage("inference"):
+            detections = predict_groups([[image_tile(frame)]], self.tracker.low_threshold)[0]
+        with timer.stage("merge"):
+            detections = merge_boxes(detections, self.profile.iou_threshold, config.BOX_MERGE_METHOD)
+        with timer.stage("track"):
+            self.tracker.update(detections, index, timestamp)
+        record_stages("stream", timer.stages)
+        return np.column_stack([self.tracker.ids, self.tracker.boxes])
+
+
+def warm_up_video(iterations: int) -> None:
+    """Load the model of every video inference thread and run blank frames through it.
+
+    Args:
+        iterations (int): The number of dummy batches each thread runs.
+    """
+
+    def warm_up_thread() -> None:
+        frames = [[image_tile(np.zeros((640, 640, 3), dtype=np.uint8))] for _ in range(config.VIDEO_INFERENCE_BATCH)]
+        for _ in range(iterations):
+            predict_groups(frames, 1.0)
+
+    run_on_every_thread(_model_threads, config.INFERENCE_WORKERS, warm_up_thread)
+
+
+def frame_detections(frame_boxes: np.ndarray) -> FrameDetections:
+    """Convert the per-frame boxes of a video into parallel arrays.
+
+    Args:
+        frame_boxes (np.ndarray): The (N, 8) time, track_id, x1, y1, x2, y2, class_id, confidence rows.
+
+    Returns:
+        FrameDetections: The columns of the boxes.
+    """
+
+    names = np.array(list(class_names) + ["Unknown"])
+    class_ids = np.minimum(frame_boxes[:, 6].astype(int), len(class_names))
+    coordinates = frame_boxes[:, 2:6].astype(int)
+
+    # The columns are built from plain lists, validating every value again would cost more than building them
+    return FrameDetections.model_construct(
+        time=frame_boxes[:, 0].tolist(),
+        track_id=frame_boxes[:, 1].astype(int).tolist(),
+        class_id=names[class_ids].tolist(),
+        confidence=frame_boxes[:, 7].tolist(),
+        x1=coordinates[:, 0].tolist(),
+        y1=coordinates[:, 1].tolist(),
+        x2=coordinates[:, 2].tolist(),
+        y2=coordinates[:, 3].tolist(),
+    )
+
 
 class VideoDetectionService:
     """A class implementing the video detection service."""
 
     sign_repository: IRoadSignRepository
+    executor: InferenceExecutor
 
-    def __init__(self, repository: IRoadSignRepository) -> None:
+    def __init__(self, repository: IRoadSignRepository, executor: InferenceExecutor) -> None:
         """Initialize the video detection service."""
         self.sign_repository = repository
+        self.executor = executor
+
+    async def detect_signs_from_video(
+            self,
+            file: UploadFile,
+            frames: bool = False,
+            profile: str | None = None,
+            render: RenderMode = "eager",
+    ) -> DetectionResponse | None:
+        """Detect traffic signs in a video and save annotated video.
+
+        Args:
+            file (UploadFile): The file uploaded by user.
+            frames (bool): Whether to add the per-frame detections to the tracks.
+            profile (str | None): The name of the detection profile, the default one if None.
+            render (RenderMode): When the annotated video is rendered.
+
+        Returns:
+            DetectionResponse | None: The detection response if the video was processed.
+        """
+
+        profile_name = profile or config.DETECTION_PROFILE
+        detection_profile = config.detection_profile(profile_name)
+
+        temp_file, unique_filename = await self.save_video(file)
+
+        # Process video outside of the event loop
+        result = await self.executor.run(detect_video, temp_file, Path("outputs") / unique_filename, detection_profile, render)
+        if result is None:
+            return None
+
+        return await self.prepare_response(result, unique_filename, frames, profile_name, render)
+
+    async def save_video(self, file: UploadFile) -> tuple[Path, str]:
+        """Validate an uploaded video and save it to the temporary directory.
 
-    async def iou(self, box1, box2):
-        """Calculate IoU between two boxes."""
-        x1 = max(box1[0], box2[0])
-        y1 = max(box1[1], box2[1])
-        x2 = min(box1[2], box2[2])
-        y2 = min(box1[3], box2[3])
-        
-        intersection = max(0, x2 - x1) * max(0, y2 - y1)
-        area1 = (box1[2] - box1[0]) * (box1[3] - box1[1])
-        area2 = (box2[2] - box2[0]) * (box2[3] - box2[1])
-        union = area1 + area2 - intersection
-        return intersection / union if union != 0 else 0
-
-    async def detect_signs_from_video(self, file: UploadFile) -> DetectionResponse | None:
-        """Detect traffic signs in a video and save annotated video."""
+        Args:
+            file (UploadFile): The file uploaded by user.
+
+        Raises:
+            UploadRejectedError: If the upload is not a supported video, is too large or is empty.
+
+        Returns:
+            tuple[Path, str]: The saved file and the name of its output.
+        """
 
         # Check if uploaded file is a video
-        if not file.content_type.startswith("video/"):
-            print(f"Error: Uploaded file is not a video. Detected MIME type: {file.content_type}")
-            return None
+        if not (file.content_type or "").startswith("video/"):
+            logger.warning("Uploaded file is not a video. Detected MIME type: %s", file.content_type)
+            raise UploadRejectedError(415, f"Uploaded file is not a video: {file.content_type}.")
 
         allowed_extensions = {".mp4", ".avi", ".mov", ".mkv"}
-        file_extension = Path(file.filename).suffix.lower()
+        file_extension = Path(file.filename or "").suffix.lower()
         if file_extension not in allowed_extensions:
-            print(f"Error: Unsupported video file extension: {file_extension}")
-            return None
+            logger.warning("Unsupported video file extension: %s", file_extension)
+            raise UploadRejectedError(415, f"Unsupported video file extension: {file_extension}.")
 
-        model = get_model()
         unique_filename = f"{uuid.uuid4()}.mp4"
         temp_dir = Path("temp")
         outputs_dir = Path("outputs")
@@ -56,158 +668,85 @@ class VideoDetectionService:
 
         temp_file = temp_dir / unique_filename
 
-        # Save uploaded video
+        # Save uploaded video in fixed-size chunks
         try:
-            content = await file.read()
-            if not content:
-                print("Error: Uploaded video is empty")
-                return None
-            with open(temp_file, "wb") as f:
-                f.write(content)
+            with timed("video", "upload_read"):
+                size = await spool_upload(file, temp_file, config.MAX_VIDEO_UPLOAD_MB * 1024 * 1024)
         except Exception as e:
-            print(f"Error saving video: {e}")
-            return None
-
-        # Verify file
-        if not temp_file.exists() or temp_file.stat().st_size == 0:
-            print(f"Error: Temporary video {temp_file} does not exist or is empty")
-            return None
-
-        # Open video
-        cap = cv2.VideoCapture(str(temp_file))
-        if not cap.isOpened():
-            print(f"Error: Failed to open video {temp_file}")
+            logger.exception("Error saving video: %s", e)
             temp_file.unlink(missing_ok=True)
-            return None
-
-        # Video properties
-        fps = cap.get(cv2.CAP_PROP_FPS)
-        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-
-        # Output video
-        output_file = outputs_dir / unique_filename
-        fourcc = cv2.VideoWriter_fourcc(*"mp4v")
-        out = cv2.VideoWriter(str(output_file), fourcc, fps, (width, height))
-
-        if not out.isOpened():
-            print(f"Error: Failed to create output video {output_file}")
-            cap.release()
+            raise
+        if size is None:
+            logger.warning("Uploaded video is too large")
+            raise UploadRejectedError(413, f"Uploaded video exceeds {config.MAX_VIDEO_UPLOAD_MB} MB.")
+        if not size:
+            logger.warning("Uploaded video is empty")
             temp_file.unlink(missing_ok=True)
-            return None
-
-        # Detection parameters
-        conf_threshold = 0.5
-        iou_threshold = 0.5
-        persistence_frames = 5  # Keep label for 5 frames after detection stops
-        recognized_boxes = []
-        tracked_signs = {}  # {track_id: (box, class_id, confidence, frame_count, color)}
-        track_id_counter = 0
-
-        # Generate unique colors for classes
-        class_colors = {}
-        for i, class_id in enumerate(range(len(class_names))):
-            hue = i / len(class_names)
-            rgb = hsv_to_rgb(hue, 0.7, 1.0)
-            class_colors[class_id] = tuple(int(c * 255) for c in rgb)
-
-        frame_idx = 0
-        while cap.isOpened():
-            ret, frame = cap.read()
-            if not ret:
-                break
-
-            current_time = frame_idx / fps  # Time in seconds
-            frame_idx += 1
-
-            # Detect signs
-            results = model(frame, conf=conf_threshold)
-            current_boxes = []
-
-            for result in results:
-                for box in result.boxes:
-                    class_id = int(box.cls.item())
-                    confidence = box.conf.item()
-                    x1, y1, x2, y2 = map(int, box.xyxy[0].tolist())
-                    current_boxes.append((x1, y1, x2, y2, class_id, confidence))
-
-            # Track signs
-            new_tracked_signs = {}
-            used_track_ids = set()
-
-            for box in current_boxes:
-                x1, y1, x2, y2, class_id, confidence = box
-                matched = False
-
-                # Match with existing tracks
-                for track_id, (prev_box, prev_class_id, prev_conf, frame_count, color) in tracked_signs.items():
-                    if class_id == prev_class_id and await self.iou((x1, y1, x2, y2), prev_box[:4]) > iou_threshold:
-                        new_tracked_signs[track_id] = ((x1, y1, x2, y2, class_id, confidence), class_id, confidence, 0, color)
-                        used_track_ids.add(track_id)
-                        matched = True
-                        break
+            raise UploadRejectedError(400, "Uploaded video is empty.")
 
-                if not matched:
-                    # New track
-                    track_id_counter += 1
-                    color = class_colors.get(class_id, (0, 255, 0))  # Default green if class_id out of range
-                    new_tracked_signs[track_id_counter] = ((x1, y1, x2, y2, class_id, confidence), class_id, confidence, 0, color)
-                    used_track_ids.add(track_id_counter)
+        return temp_file, unique_filename
 
-            # Update persistence for unmatched tracks
-            for track_id, (prev_box, prev_class_id, prev_conf, frame_count, color) in tracked_signs.items():
-                if track_id not in used_track_ids and frame_count < persistence_frames:
-                    new_tracked_signs[track_id] = (prev_box, prev_class_id, prev_conf, frame_count + 1, color)
+    async def prepare_response(
+            self,
+            result: VideoResult,
+            unique_filename: str,
+            frames: bool = False,
+            profile: str | None = None,
+            render: RenderMode = "eager",
+    ) -> DetectionResponse:
+        """Build the detection response of a processed video.
 
-            tracked_signs = new_tracked_signs
+        The response holds one box per track, so its size depends on the
+        number of signs and not on the length of the video.
 
-            # Draw boxes and labels
-            for track_id, (box, class_id, confidence, frame_count, color) in tracked_signs.items():
-                x1, y1, x2, y2, _, _ = box
-                label = f"{class_names[class_id]} ({int(confidence * 100)}%)" if class_id < len(class_names) else "Unknown"
-                thickness = 3
-                cv2.rectangle(frame, (x1, y1), (x2, y2), color, thickness)
-                cv2.putText(frame, label, (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.7, color, 3)
+        Args:
+            result (VideoResult): The tracked signs and frame counters.
+            unique_filename (str): The name of the annotated output video.
+            frames (bool): Whether to add the per-frame detections as parallel arrays.
+            profile (str | None): The name of the detection profile the video was processed with.
+            render (RenderMode): When the annotated video is rendered, no file is linked for `none`.
 
-                # Store detection
-                if frame_count == 0:  # Only store new or updated detections
-                    recognized_boxes.append((x1, y1, x2, y2, class_id, confidence, current_time))
+        Returns:
+            DetectionResponse: The detection response.
+        """
 
-            out.write(frame)
-
-        # Cleanup
-        cap.release()
-        out.release()
-        temp_file.unlink(missing_ok=True)
+        record_stages("video", result.timings)
+        tracks = result.tracks
 
         # Prepare response
-        recognized_ids = [class_names[box[4]] if box[4] < len(class_names) else None for box in recognized_boxes]
+        recognized_ids = [class_names[track.class_id] if track.class_id < len(class_names) else None for track in tracks]
         unique_ids = list(set(filter(None, recognized_ids)))
 
-        sign_objects = []
-        for sign_id in unique_ids:
-            sign = await self.sign_repository.get_road_sign_by_id(sign_id)
-            if sign:
-                sign_objects.append(sign)
-
-        file_url = f"/static/{unique_filename}"
-
-        print(f"Recognized signs: {sign_objects}")
-        print(f"Boxes: {recognized_boxes}")
-        print(f"File URL: {file_url}")
-
-        return DetectionResponse(
-            signs=sign_objects,
-            total_boxes=len(recognized_boxes),
-            file_url=file_url,
-            boxes=[Box(
-                x1=box[0],
-                y1=box[1],
-                x2=box[2],
-                y2=box[3],
-                class_id=class_names[box[4]],
-                confidence=box[5],
-                time_detected=box[6]
-            ) for box in recognized_boxes],
-        )
\ No newline at end of file
+        with timed("video", "db_lookup"):
+            sign_objects = list((await self.sign_repository.get_road_signs_by_ids(unique_ids)).values())
+
+        file_url = f"/static/{unique_filename}" if render != "none" else ""
+
+        logger.debug("Recognized signs: %s", sign_objects)
+        logger.debug("Tracks: %s", tracks)
+        logger.debug("File URL: %s", file_url)
+        logger.info("Frames inferred: %d/%d", result.frames_inferred, result.frames_decoded)
+
+        with timed("video", "response_build"):
+            response = DetectionResponse(
+                signs=sign_objects,
+                total_boxes=len(tracks),
+                file_url=file_url,
+                # One box per physical sign, where it was detected with the highest confidence
+                boxes=[Box(
+                    x1=track.box[0],
+                    y1=track.box[1],
+                    x2=track.box[2],
+                    y2=track.box[3],
+                    class_id=class_names[track.class_id],
+                    confidence=track.confidence,
+                    time_detected=track.first_seen,
+                    last_seen=track.last_seen,
+                    track_id=track.track_id,
+                ) for track in tracks],
+                frames_decoded=result.frames_decoded,
+                frames_inferred=result.frames_inferred,
+                frames=frame_detections(result.frame_boxes) if frames else None,
+                profile=profile,
+            )
+        return response
@@ -0,0 +1,265 @@
+"""Module containing asynchronous video job service implementation."""
+
+import asyncio
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+
+from fastapi import UploadFile
+
+from config import config
+from core.domain.detection import DetectionResponse, RenderMode
+from core.domain.job import VideoJob
+from infrastructure.services.ivideo_job import IVideoJobService, JobQueueFullError
+from infrastructure.services.video_detection import (
+    VideoDetectionService,
+    VideoProcessor,
+    VideoResult,
+    frame_detections,
+)
+from utils.executor import InferenceExecutor
+
+FINISHED_STATUSES = {"done", "failed", "cancelled"}
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _Job:
+    id: str
+    temp_file: Path
+    unique_filename: str
+    profile: str
+    render: RenderMode = "eager"
+    status: str = "queued"
+    processor: VideoProcessor | None = None
+    started: float | None = None
+    cancel_requested: bool = False
+    video_result: VideoResult | None = None
+    result: DetectionResponse | None = None
+    error: str | None = None
+
+    def to_model(self) -> VideoJob:
+        frames_processed = self.processor.frames_processed if self.processor else 0
+        frames_total = self.processor.frames_total if self.processor else 0
+        frames_inferred = self.processor.frames_inferred if self.processor else 0
+        eta_seconds = None
+        if self.status == "running" and self.started is not None and frames_processed:
+            per_frame = (time.monotonic() - self.started) / frames_processed
+            eta_seconds = max(0, frames_total - frames_processed) * per_frame
+
+        return VideoJob(
+            id=self.id,
+            status=self.status,
+            frames_processed=frames_processed,
+            frames_total=frames_total,
+            frames_inferred=frames_inferred,
+            eta_seconds=eta_seconds,
+            error=self.error,
+        )
+
+
+class VideoJobService(IVideoJobService):
+    """A class implementing the asynchronous video job service.
+
+    Jobs wait in a bounded queue and are processed by a fixed number of
+    worker tasks. Each worker runs the video in chunks of frames on the
+    inference executor, so progress is updated and cancellation is
+    checked between the chunks.
+    """
+
+    _video_service: VideoDetectionService
+    _executor: InferenceExecutor
+
+    def __init__(
+            self,
+            video_service: VideoDetectionService,
+            executor: InferenceExecutor,
+            concurrency: int = 1,
+            queue_size: int = 16,
+            history: int = 100,
+            chunk_frames: int = 30,
+    ) -> None:
+        """The initializer of the 'video job service'.
+
+        Args:
+            video_service (VideoDetectionService): The service validating uploads and building responses.
+            executor (InferenceExecutor): The executor running the frame loop.
+            concurrency (int): The number of videos processed at the same time.
+            queue_size (int): The number of jobs allowed to wait.
+            history (int): The number of finished jobs kept for polling.
+            chunk_frames (int): The number of frames processed between progress updates.
+        """
+
+        self._video_service = video_service
+        self._executor = executor
+        self.concurrency = concurrency
+        self.queue_size = queue_size
+        self.history = history
+        self.chunk_frames = chunk_frames
+        self._jobs: OrderedDict[str, _Job] = OrderedDict()
+        self._queue: asyncio.Queue | None = None
+        self._workers: list[asyncio.Task] = []
+
+    async def submit(self, file: UploadFile, profile: str | None = None, render: RenderMode = "eager") -> VideoJob:
+        """The method saving an uploaded video and queueing its detection.
+
+        Args:
+            file (UploadFile): The file uploaded by user.
+            profile (str | None): The name of the detection profile, the default one if None.
+            render (RenderMode): When the annotated video is rendered.
+
+        Raises:
+            JobQueueFullError: If the job queue is full.
+            ValueError: If the detection profile is not defined.
+            UploadRejectedError: If the upload is not a supported video, is too large or is empty.
+
+        Returns:
+            VideoJob: The queued job.
+        """
+
+        self._start_workers()
+        if self._queue.full():
+            raise JobQueueFullError()
+
+        profile = profile or config.DETECTION_PROFILE
+        config.detection_profile(profile)  # Unknown profiles fail before the upload is saved
+
+        temp_file, unique_filename = await self._video_service.save_video(file)
+
+        job = _Job(id=str(uuid.uuid4()), temp_file=temp_file, unique_filename=unique_filename, profile=profile, render=render)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            temp_file.unlink(missing_ok=True)
+            raise JobQueueFullError()
+
+        self._jobs[job.id] = job
+        self._evict_finished()
+        return job.to_model()
+
+    async def get_job(self, job_id: str) -> VideoJob | None:
+        """The method getting the state of a job.
+
+        Args:
+            job_id (str): The id of the job.
+
+        Returns:
+            VideoJob | None: The job if exists.
+        """
+
+        job = self._jobs.get(job_id)
+        return job.to_model() if job else None
+
+    async def get_result(self, job_id: str, frames: bool = False) -> DetectionResponse | None:
+        """The method getting the result of a finished job.
+
+        Args:
+            job_id (str): The id of the job.
+            frames (bool): Whether to add the per-frame detections to the tracks.
+
+        Returns:
+            DetectionResponse | None: The result if the job is done.
+        """
+
+        job = self._jobs.get(job_id)
+        if job is None or job.result is None:
+            return None
+        if frames:
+            return job.result.model_copy(update={"frames": frame_detections(job.video_result.frame_boxes)})
+        return job.result
+
+    async def cancel(self, job_id: str) -> VideoJob | None:
+        """The method cancelling a queued or running job.
+
+        Args:
+            job_id (str): The id of the job.
+
+        Returns:
+            VideoJob | None: The job if exists.
+        """
+
+        job = self._jobs.get(job_id)
+        if job is None:
+            return None
+
+        if job.status not in FINISHED_STATUSES:
+            job.cancel_requested = True
+            if job.status == "queued":
+                job.status = "cancelled"
+        return job.to_model()
+
+    def shutdown(self) -> None:
+        """The method stopping the worker tasks."""
+
+        for worker in self._workers:
+            worker.cancel()
+        self._workers = []
+
+    def _start_workers(self) -> None:
+        if self._workers:
+            return
+
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._workers = [asyncio.create_task(self._work()) for _ in range(self.concurrency)]
+
+    def _evict_finished(self) -> None:
+        finished = [job_id for job_id, job in self._jobs.items() if job.status in FINISHED_STATUSES]
+        for job_id in finished[:max(0, len(finished) - self.history)]:
+            del self._jobs[job_id]
+
+    async def _work(self) -> None:
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._run(job)
+            except Exception as e:
+                logger.exception("Error processing video job %s: %s", job.id, e)
+                job.status = "failed"
+                job.error = str(e)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: _Job) -> None:
+        output_file = Path("outputs") / job.unique_filename
+
+        if job.cancel_requested:
+            job.temp_file.unlink(missing_ok=True)
+            return
+
+        job.processor = VideoProcessor(
+            job.temp_file,
+            output_file,
+            profile=config.detection_profile(job.profile),
+            render=job.render,
+        )
+        if not await self._executor.run_local(job.processor.open):
+            job.status = "failed"
+            job.error = "Failed to open the video."
+            return
+
+        job.status = "running"
+        job.started = time.monotonic()
+        try:
+            while not await self._executor.run_local(job.processor.process, self.chunk_frames):
+                if job.cancel_requested:
+                    break
+        finally:
+            await self._executor.run_local(job.processor.close)
+
+        if job.cancel_requested:
+            job.status = "cancelled"
+            output_file.unlink(missing_ok=True)
+            return
+
+        job.video_result = job.processor.result()
+        job.result = await self._video_service.prepare_response(
+            job.video_result,
+            job.unique_filename,
+            profile=job.profile,
+            render=job.render,
+        )
+        job.status = "done"
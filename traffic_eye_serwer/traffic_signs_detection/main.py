@@ -1,5 +1,8 @@
 """Main module of the app"""
 
+import asyncio
+import logging
+import time
 from contextlib import asynccontextmanager
 from typing import AsyncGenerator
 
@@ -7,23 +10,102 @@ from fastapi import FastAPI, HTTPException, Request, Response
 from fastapi.exception_handlers import http_exception_handler
 from api.routers.roadsign import router as road_sign_router
 from api.routers.detection import router as detection_router
+from api.routers.health import router as health_router
+from api.routers.outputs import router as outputs_router
+from api.routers.metrics import router as metrics_router
+from api.utils.admission import AdmissionMiddleware
+from api.utils.timing import TimingMiddleware
+from api.utils.upload_limit import UploadLimitMiddleware
+from config import config
 from container import Container
+from core.domain.health import Readiness
+from core.model_backend import prepare_backend
 from db import database, init_db
+from infrastructure.services.video_detection import warm_up_video
+from utils.batching import shutdown_scheduler
+from utils.inference import warm_up
+from utils.log import configure_logging, shutdown_logging
+from utils.metrics import register_admission
+from utils.rendering import cleanup_pending
+from utils.worker_pool import shutdown_worker_pool, start_worker_pool
 
 
+logger = logging.getLogger(__name__)
+
 container = Container()
 container.wire(modules=[
     "api.routers.roadsign",
-    "api.routers.detection"
+    "api.routers.detection",
+    "api.routers.outputs",
 ])
 
+async def warm_up_models(readiness: Readiness) -> None:
+    """Prepare the model backend, load the models of all inference workers and warm them up.
+
+    Args:
+        readiness (Readiness): The state reported by the readiness endpoint.
+    """
+
+    started = time.monotonic()
+    try:
+        await asyncio.to_thread(prepare_backend)
+        tile_size = config.detection_profile().tile_size
+        await container.inference_executor().run_on_all(warm_up, config.MODEL_WARMUP_ITERATIONS, tile_size)
+        await asyncio.to_thread(warm_up_video, config.MODEL_WARMUP_ITERATIONS)
+    except Exception as e:
+        logger.exception("Error warming up the model: %s", e)
+        readiness.status = "failed"
+        readiness.error = str(e)
+        return
+
+    readiness.warmup_seconds = round(time.monotonic() - started, 3)
+    readiness.status = "ready"
+    logger.info("Model ready after %s s of warmup", readiness.warmup_seconds)
+
+async def clean_pending_renders() -> None:
+    """Remove the deferred renders nobody downloaded in time, at startup and then periodically."""
+
+    while True:
+        try:
+            await asyncio.to_thread(cleanup_pending, config.PENDING_RENDER_TTL_SECONDS)
+        except Exception as e:
+            logger.exception("Error removing expired deferred renders: %s", e)
+        await asyncio.sleep(config.PENDING_RENDER_CLEANUP_INTERVAL_SECONDS)
+
 @asynccontextmanager
-async def lifespan(_: FastAPI) -> AsyncGenerator:
+async def lifespan(app: FastAPI) -> AsyncGenerator:
     """Lifespan function working on app startup."""
+    configure_logging(config.LOG_LEVEL, config.LOG_RATE_LIMIT_BURST, config.LOG_RATE_LIMIT_INTERVAL_SECONDS)
     await init_db()
     await database.connect()
+    await container.road_sign_repository().preload()
+    cleanup = asyncio.create_task(clean_pending_renders())
+    if config.MODEL_WORKERS:
+        # One pool for the whole app, the inference threads share its workers
+        start_worker_pool()
+
+    # The model is loaded in the background, the readiness endpoint reports when it is done
+    app.state.readiness = Readiness(
+        backend=config.MODEL_BACKEND,
+        precision=config.MODEL_PRECISION,
+        warmup_iterations=config.MODEL_WARMUP_ITERATIONS,
+    )
+    warmup = None
+    if config.MODEL_PRELOAD:
+        warmup = asyncio.create_task(warm_up_models(app.state.readiness))
+    else:
+        app.state.readiness.status = "ready"
+
     yield
+    cleanup.cancel()
+    if warmup is not None:
+        warmup.cancel()
     await database.disconnect()
+    container.video_job_service().shutdown()
+    container.inference_executor().shutdown()
+    shutdown_scheduler()
+    shutdown_worker_pool()
+    shutdown_logging()
 
 # FastAPI app
 app = FastAPI(lifespan=lifespan)
@@ -31,6 +113,34 @@ app.container = container
 
 app.include_router(road_sign_router, prefix="/roadsign")
 app.include_router(detection_router, prefix="/detection")
+app.include_router(health_router, prefix="/health")
+app.include_router(outputs_router, prefix="/static")
+app.include_router(metrics_router, prefix="/metrics")
+
+app.add_middleware(
+    UploadLimitMiddleware,
+    limits={
+        "/detection/detect-signs/": config.MAX_IMAGE_UPLOAD_MB * 1024 * 1024,
+        "/detection/detect-signs-batch/": config.MAX_BATCH_UPLOAD_MB * 1024 * 1024,
+        "/detection/detect-signs-video/": config.MAX_VIDEO_UPLOAD_MB * 1024 * 1024,
+        "/detection/video-jobs/": config.MAX_VIDEO_UPLOAD_MB * 1024 * 1024,
+    },
+)
+
+# Added last, so a request is admitted or shed before anything else reads it
+app.add_middleware(
+    AdmissionMiddleware,
+    budgets={
+        "/detection/detect-signs/": container.image_admission(),
+        "/detection/detect-signs-batch/": container.image_admission(),
+        "/detection/detect-signs-video/": container.video_admission(),
+    },
+)
+
+# Outermost, the request duration includes the wait for admission
+if config.METRICS_ENABLED:
+    app.add_middleware(TimingMiddleware, header=config.TIMING_HEADER)
+    register_admission({"image": container.image_admission(), "video": container.video_admission()})
 
 @app.exception_handler(HTTPException)
 async def http_exception_handle_logging(
@@ -0,0 +1,110 @@
+"""Module providing admission control of concurrent detection work."""
+
+import asyncio
+import math
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+# Weight of the latest request in the moving average of the service time
+SERVICE_TIME_SMOOTHING = 0.2
+
+
+class AdmissionRejectedError(Exception):
+    """An exception raised when neither a slot nor a place in the queue is free."""
+
+    def __init__(self, retry_after: int) -> None:
+        super().__init__(f"Admission rejected, retry after {retry_after} s")
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """A class limiting the number of requests of one kind running at the same time.
+
+    Up to `limit` requests run, up to `queue_size` more wait for a slot and
+    any further request is rejected at once, so a burst is shed instead of
+    slowing every request down.
+    """
+
+    def __init__(self, limit: int = 4, queue_size: int = 16, retry_after_seconds: float = 5) -> None:
+        """The initializer of the 'admission controller'.
+
+        Args:
+            limit (int): The number of requests running at the same time.
+            queue_size (int): The number of requests allowed to wait for a slot.
+            retry_after_seconds (float): The retry delay suggested before any request finished.
+        """
+
+        self.limit = max(1, limit)
+        self.queue_size = max(0, queue_size)
+        self.retry_after_seconds = retry_after_seconds
+        self._slots = asyncio.Semaphore(self.limit)
+        self.active = 0
+        self.waiting = 0
+        self.admitted_total = 0
+        self.rejected_total = 0
+        self._wait_total = 0.0
+        self._service_time: float | None = None
+
+    @asynccontextmanager
+    async def admit(self) -> AsyncIterator[None]:
+        """The method holding a slot for the duration of a request.
+
+        Raises:
+            AdmissionRejectedError: If all slots are taken and the queue is full.
+        """
+
+        if self._slots.locked() and self.waiting >= self.queue_size:
+            self.rejected_total += 1
+            raise AdmissionRejectedError(self.retry_after())
+
+        queued = time.monotonic()
+        self.waiting += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self.waiting -= 1
+
+        started = time.monotonic()
+        self.active += 1
+        self.admitted_total += 1
+        self._wait_total += started - queued
+        try:
+            yield
+        finally:
+            self.active -= 1
+            self._slots.release()
+            elapsed = time.monotonic() - started
+            if self._service_time is None:
+                self._service_time = elapsed
+            else:
+                self._service_time += SERVICE_TIME_SMOOTHING * (elapsed - self._service_time)
+
+    def retry_after(self) -> int:
+        """The method estimating when a place in the queue frees up.
+
+        Returns:
+            int: The suggested delay in whole seconds.
+        """
+
+        if self._service_time is None:
+            return max(1, math.ceil(self.retry_after_seconds))
+        return max(1, math.ceil(self._service_time * (self.waiting + 1) / self.limit))
+
+    def stats(self) -> dict:
+        """The method summarising the load of the controller.
+
+        Returns:
+            dict: The limits, the current queue depth and the admission counters.
+        """
+
+        return {
+            "limit": self.limit,
+            "queue_size": self.queue_size,
+            "active": self.active,
+            "waiting": self.waiting,
+            "admitted_total": self.admitted_total,
+            "rejected_total": self.rejected_total,
+            "avg_wait_ms": self._wait_total / self.admitted_total * 1000 if self.admitted_total else 0.0,
+            "avg_service_ms": (self._service_time or 0.0) * 1000,
+        }
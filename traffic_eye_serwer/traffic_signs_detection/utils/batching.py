@@ -0,0 +1,200 @@
+"""Module providing cross-request micro-batching of tile inference."""
+
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from dataclasses import asdict, dataclass, field
+from typing import List
+
+import numpy as np
+
+from config import config
+from core.config_model import get_model
+from utils.tiling import Tile, join_detections, predict_tile_arrays
+
+
+@dataclass
+class RequestTiming:
+    """A class representing latency accounting of one batched request."""
+    tiles: int
+    batch_tiles: int
+    wait_ms: float
+    inference_ms: float
+    total_ms: float
+
+
+@dataclass
+class _PendingRequest:
+    tiles: List[Tile]
+    conf_threshold: float
+    future: Future = field(default_factory=Future)
+    submitted: float = field(default_factory=time.monotonic)
+
+
+class MicroBatchScheduler:
+    """A class collecting tiles of concurrent requests into shared forward passes.
+
+    Callers block in `predict` while a single scheduler thread gathers
+    pending requests for up to `max_wait_ms` or `max_tiles` tiles, runs
+    them through the model together and routes the detections back.
+    """
+
+    def __init__(self, max_tiles: int = 32, max_wait_ms: float = 10, history: int = 100) -> None:
+        """The initializer of the 'micro-batch scheduler'.
+
+        Args:
+            max_tiles (int): The number of tiles which closes a batch immediately.
+            max_wait_ms (float): The longest time a batch waits for more requests.
+            history (int): The number of recent request timings kept for stats.
+        """
+
+        self.max_tiles = max(1, max_tiles)
+        self.max_wait = max_wait_ms / 1000
+        self._queue: queue.Queue[_PendingRequest | None] = queue.Queue()
+        self._lock = threading.Lock()
+        self._timings: deque[RequestTiming] = deque(maxlen=history)
+        self._requests_total = 0
+        self._batches_total = 0
+        self._tiles_total = 0
+        self._thread = threading.Thread(target=self._run, name="micro-batching", daemon=True)
+        self._thread.start()
+
+    def predict(self, tiles: List[Tile], conf_threshold: float) -> np.ndarray:
+        """The method running tiles of one request through the shared batches.
+
+        Args:
+            tiles (List[Tile]): The tiles of the request.
+            conf_threshold (float): The minimal confidence of a detection.
+
+        Returns:
+            np.ndarray: The (N, 6) detections in the source image coordinates.
+        """
+
+        if not tiles:
+            return join_detections([])
+
+        request = _PendingRequest(tiles, conf_threshold)
+        self._queue.put(request)
+        return request.future.result()
+
+    def stats(self) -> dict:
+        """The method summarising the scheduler activity.
+
+        Returns:
+            dict: The totals and the timings of the most recent requests.
+        """
+
+        with self._lock:
+            timings = list(self._timings)
+            requests_total = self._requests_total
+            batches_total = self._batches_total
+            tiles_total = self._tiles_total
+
+        return {
+            "requests_total": requests_total,
+            "batches_total": batches_total,
+            "tiles_total": tiles_total,
+            "avg_batch_tiles": tiles_total / batches_total if batches_total else 0.0,
+            "avg_wait_ms": float(np.mean([t.wait_ms for t in timings])) if timings else 0.0,
+            "avg_total_ms": float(np.mean([t.total_ms for t in timings])) if timings else 0.0,
+            "recent": [asdict(timing) for timing in timings],
+        }
+
+    def shutdown(self) -> None:
+        """The method stopping the scheduler thread after the pending batch."""
+
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self) -> None:
+        while True:
+            request = self._queue.get()
+            if request is None:
+                return
+
+            batch = [request]
+            tile_count = len(request.tiles)
+            deadline = time.monotonic() + self.max_wait
+            stopping = False
+
+            while tile_count < self.max_tiles:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    request = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if request is None:
+                    stopping = True
+                    break
+                batch.append(request)
+                tile_count += len(request.tiles)
+
+            self._process(batch)
+            if stopping:
+                return
+
+    def _process(self, batch: List[_PendingRequest]) -> None:
+        started = time.monotonic()
+        tiles = [tile for request in batch for tile in request.tiles]
+        conf_threshold = min(request.conf_threshold for request in batch)
+
+        try:
+            detections = predict_tile_arrays(get_model(), tiles, conf_threshold, self.max_tiles)
+        except Exception as e:
+            for request in batch:
+                request.future.set_exception(e)
+            return
+
+        finished = time.monotonic()
+        start = 0
+        for request in batch:
+            request_detections = join_detections(detections[start:start + len(request.tiles)])
+            start += len(request.tiles)
+            # Requests with a higher threshold drop detections admitted for the others
+            request.future.set_result(request_detections[request_detections[:, 5] >= request.conf_threshold])
+
+            with self._lock:
+                self._timings.append(RequestTiming(
+                    tiles=len(request.tiles),
+                    batch_tiles=len(tiles),
+                    wait_ms=(started - request.submitted) * 1000,
+                    inference_ms=(finished - started) * 1000,
+                    total_ms=(finished - request.submitted) * 1000,
+                ))
+                self._requests_total += 1
+
+        with self._lock:
+            self._batches_total += 1
+            self._tiles_total += len(tiles)
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> MicroBatchScheduler:
+    """The function returning the scheduler of the current process.
+
+    Returns:
+        MicroBatchScheduler: The lazily started scheduler.
+    """
+
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = MicroBatchScheduler(config.MICRO_BATCH_MAX_TILES, config.MICRO_BATCH_MAX_WAIT_MS)
+    return _scheduler
+
+
+def shutdown_scheduler() -> None:
+    """The function stopping the scheduler of the current process if it was started."""
+
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is not None:
+            _scheduler.shutdown()
+            _scheduler = None
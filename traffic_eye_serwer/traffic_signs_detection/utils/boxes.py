@@ -0,0 +1,94 @@
+"""Module providing vectorized operations on detection boxes."""
+
+import numpy as np
+
+
+def iou_matrix(boxes1: np.ndarray, boxes2: np.ndarray) -> np.ndarray:
+    """The function computing IoU between every pair of boxes.
+
+    Args:
+        boxes1 (np.ndarray): The (N, 4+) array of x1, y1, x2, y2 boxes.
+        boxes2 (np.ndarray): The (M, 4+) array of x1, y1, x2, y2 boxes.
+
+    Returns:
+        np.ndarray: The (N, M) IoU matrix.
+    """
+
+    # float64 boxes keep their precision, e.g. the class-offset boxes of `merge_boxes`
+    boxes1 = np.asarray(boxes1)
+    boxes1 = boxes1.astype(np.promote_types(boxes1.dtype, np.float32), copy=False)[:, :4]
+    boxes2 = np.asarray(boxes2)
+    boxes2 = boxes2.astype(np.promote_types(boxes2.dtype, np.float32), copy=False)[:, :4]
+
+    x1 = np.maximum(boxes1[:, None, 0], boxes2[None, :, 0])
+    y1 = np.maximum(boxes1[:, None, 1], boxes2[None, :, 1])
+    x2 = np.minimum(boxes1[:, None, 2], boxes2[None, :, 2])
+    y2 = np.minimum(boxes1[:, None, 3], boxes2[None, :, 3])
+
+    intersection = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area1 = (boxes1[:, 2] - boxes1[:, 0]) * (boxes1[:, 3] - boxes1[:, 1])
+    area2 = (boxes2[:, 2] - boxes2[:, 0]) * (boxes2[:, 3] - boxes2[:, 1])
+    union = area1[:, None] + area2[None, :] - intersection
+
+    return np.divide(intersection, union, out=np.zeros_like(intersection), where=union > 0)
+
+
+def merge_boxes(
+        detections: np.ndarray,
+        iou_threshold: float = 0.5,
+        method: str = "nms",
+) -> np.ndarray:
+    """The function merging duplicated detections of the same class.
+
+    Boxes are ordered by confidence, so the strongest box of every cluster
+    always survives. With the `wbf` method the surviving box coordinates are
+    the confidence-weighted average of the whole cluster.
+
+    Args:
+        detections (np.ndarray): The (N, 6) array of x1, y1, x2, y2, class_id, confidence rows.
+        iou_threshold (float): The IoU above which two boxes of one class are duplicates.
+        method (str): The merging method, `nms` or `wbf`.
+
+    Raises:
+        ValueError: If the merging method is unknown.
+
+    Returns:
+        np.ndarray: The merged detections sorted by descending confidence.
+    """
+
+    if method not in ("nms", "wbf"):
+        raise ValueError(f"Unknown box merging method: {method}")
+
+    detections = np.asarray(detections, dtype=np.float32).reshape(-1, 6)
+    if len(detections) < 2:
+        return detections
+
+    detections = detections[np.argsort(-detections[:, 5], kind="stable")]
+
+    # Boxes of different classes never merge, shifting every class to its own
+    # region lets one IoU matrix and one suppression pass serve all classes
+    coords = detections[:, :4].astype(np.float64)
+    coords -= coords.min()
+    offset_boxes = coords + (detections[:, 4:5].astype(np.float64) * (coords.max() + 1))
+    overlaps = iou_matrix(offset_boxes, offset_boxes) > iou_threshold
+
+    keep = np.ones(len(detections), dtype=bool)
+    for i in np.flatnonzero(np.triu(overlaps, 1).any(axis=1)):
+        if keep[i]:
+            keep[i + 1:] &= ~overlaps[i, i + 1:]
+
+    if method == "nms":
+        return detections[keep]
+
+    # Every box belongs to the first (strongest) kept box overlapping it
+    owners = np.triu(overlaps | np.eye(len(detections), dtype=bool)) & keep[:, None]
+    owner = np.argmax(owners, axis=0)
+
+    weights = detections[:, 5]
+    fused = np.zeros((len(detections), 4), dtype=np.float32)
+    np.add.at(fused, owner, detections[:, :4] * weights[:, None])
+    total = np.bincount(owner, weights=weights, minlength=len(detections))
+
+    merged = detections[keep].copy()
+    merged[:, :4] = fused[keep] / total[keep, None]
+    return merged
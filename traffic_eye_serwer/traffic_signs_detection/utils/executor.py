@@ -0,0 +1,157 @@
+"""Module providing the executor running blocking inference work."""
+
+import asyncio
+import functools
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, List
+
+# How long a thread of an idle pool waits for the others when every thread has to run a function
+BARRIER_TIMEOUT_SECONDS = 30
+
+
+def run_on_every_thread(executor: ThreadPoolExecutor, threads: int, func: Callable[..., Any], *args: Any) -> List[Any]:
+    """The function running a blocking function once on each thread of a pool.
+
+    The submitted calls wait for each other on a barrier, so no thread can
+    take two of them. It is meant for per-thread state, e.g. the thread-local
+    models, and has to be called while the pool is idle.
+
+    Args:
+        executor (ThreadPoolExecutor): The thread pool.
+        threads (int): The number of threads of the pool.
+        func (Callable[..., Any]): The blocking function.
+        *args (Any): The positional arguments of the function.
+
+    Returns:
+        List[Any]: The values returned on every thread.
+    """
+
+    barrier = threading.Barrier(threads, timeout=BARRIER_TIMEOUT_SECONDS)
+
+    def call() -> Any:
+        barrier.wait()
+        return func(*args)
+
+    futures = [executor.submit(call) for _ in range(threads)]
+    return [future.result() for future in futures]
+
+
+class InferenceExecutor:
+    """A class running CPU-bound detection work outside of the event loop."""
+
+    _executor: Executor
+    _slots: asyncio.Semaphore
+    _exclusive: asyncio.Lock
+
+    def __init__(self, kind: str = "thread", workers: int = 2, queue_size: int = 8) -> None:
+        """The initializer of the 'inference executor'.
+
+        Args:
+            kind (str): The type of the workers, `thread` or `process`.
+            workers (int): The number of workers running jobs in parallel.
+            queue_size (int): The number of jobs allowed to wait for a free worker.
+
+        Raises:
+            ValueError: If the executor kind is unknown.
+        """
+
+        if kind == "thread":
+            self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="inference")
+        elif kind == "process":
+            self._executor = ProcessPoolExecutor(max_workers=workers)
+        else:
+            raise ValueError(f"Unknown inference executor kind: {kind}")
+
+        self.kind = kind
+        self.workers = workers
+        self.queue_size = queue_size
+        self._slots = asyncio.Semaphore(workers + queue_size)
+        self._exclusive = asyncio.Lock()
+
+    async def run(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """The method running a blocking function on one of the workers.
+
+        When all workers are busy and the queue is full the caller waits
+        for a free slot before its job is submitted.
+
+        Args:
+            func (Callable[..., Any]): The blocking function. It has to be
+                picklable when the executor uses processes.
+            *args (Any): The positional arguments of the function.
+            **kwargs (Any): The keyword arguments of the function.
+
+        Returns:
+            Any: The value returned by the function.
+        """
+
+        async with self._slots:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+
+    async def run_local(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """The method running a blocking function in this process while holding a worker slot.
+
+        It is meant for stateful work, e.g. open video handles, which cannot
+        be pickled for process workers. With thread workers it is `run`.
+
+        Args:
+            func (Callable[..., Any]): The blocking function.
+            *args (Any): The positional arguments of the function.
+            **kwargs (Any): The keyword arguments of the function.
+
+        Returns:
+            Any: The value returned by the function.
+        """
+
+        if self.kind == "thread":
+            return await self.run(func, *args, **kwargs)
+
+        async with self._slots:
+            return await asyncio.to_thread(func, *args, **kwargs)
+
+    async def run_on_all(self, func: Callable[..., Any], *args: Any) -> List[Any]:
+        """The method running a blocking function once on every worker, e.g. to load its model.
+
+        Every slot is taken first, so no other job runs or waits meanwhile.
+        Thread workers are guaranteed to run it once each. Process workers
+        get one call per worker, which the pool usually spreads over all
+        of its processes.
+
+        Args:
+            func (Callable[..., Any]): The blocking function. It has to be
+                picklable when the executor uses processes.
+            *args (Any): The positional arguments of the function.
+
+        Returns:
+            List[Any]: The values returned by the function.
+        """
+
+        async with self._all_slots():
+            if self.kind == "thread":
+                return await asyncio.to_thread(run_on_every_thread, self._executor, self.workers, func, *args)
+
+            loop = asyncio.get_running_loop()
+            return list(await asyncio.gather(*(
+                loop.run_in_executor(self._executor, functools.partial(func, *args)) for _ in range(self.workers)
+            )))
+
+    @asynccontextmanager
+    async def _all_slots(self) -> AsyncIterator[None]:
+        # One caller at a time, two callers holding part of the slots each would wait forever
+        async with self._exclusive:
+            taken = 0
+            try:
+                for _ in range(self.workers + self.queue_size):
+                    await self._slots.acquire()
+                    taken += 1
+                yield
+            finally:
+                for _ in range(taken):
+                    self._slots.release()
+
+    def shutdown(self) -> None:
+        """The method stopping the workers after finishing the running jobs."""
+
+        self._executor.shutdown(wait=True, cancel_futures=True)
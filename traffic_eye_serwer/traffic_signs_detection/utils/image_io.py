@@ -0,0 +1,208 @@
+"""Module providing in-memory decoding of uploaded images."""
+
+import functools
+import io
+import logging
+from dataclasses import dataclass
+
+import cv2
+import numpy as np
+from PIL import Image, ImageOps
+
+HEIF_EXTENSIONS = {"heic", "heif"}
+# OpenCV applies the TIFF orientation tag on its own regardless of the read flags
+PIL_EXTENSIONS = {"tif", "tiff"}
+EXIF_ORIENTATION = 0x0112
+REDUCED_FLAGS = {
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8,
+}
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class DecodedImage:
+    """A class representing a decoded, possibly reduced, upright image."""
+    image: np.ndarray
+    original_width: int
+    original_height: int
+    reduction: int = 1  # The reduction actually applied, capped for small images
+
+    @property
+    def scale_x(self) -> float:
+        """The factor mapping x coordinates of the decoded image to the original."""
+        return self.original_width / self.image.shape[1]
+
+    @property
+    def scale_y(self) -> float:
+        """The factor mapping y coordinates of the decoded image to the original."""
+        return self.original_height / self.image.shape[0]
+
+
+@functools.cache
+def _pillow_heif():
+    """The function importing pillow_heif on the first decode instead of at startup."""
+
+    import pillow_heif
+
+    pillow_heif.register_heif_opener()  # Rejestracja obsługi HEIC w PIL
+    return pillow_heif
+
+
+def pick_reduction(min_sign_size: int, model_min_sign_size: int) -> int:
+    """The function picking the strongest decode reduction keeping signs detectable.
+
+    Args:
+        min_sign_size (int): The smallest sign, in original pixels, which has to be detected.
+        model_min_sign_size (int): The smallest sign, in pixels, the model reliably detects.
+
+    Returns:
+        int: The reduction factor, 1, 2, 4 or 8.
+    """
+
+    for reduction in (8, 4, 2):
+        if min_sign_size / reduction >= model_min_sign_size:
+            return reduction
+    return 1
+
+
+def cap_reduction(reduction: int, size: tuple[int, int] | None, min_long_side: int) -> int:
+    """The function lowering a decode reduction which would shrink an image below a minimal size.
+
+    Args:
+        reduction (int): The requested reduction factor, 1, 2, 4 or 8.
+        size (tuple[int, int] | None): The width and height of the image, the reduction is kept if None.
+        min_long_side (int): The minimal long side of the decoded image, e.g. the tile size.
+
+    Returns:
+        int: The strongest reduction up to the requested one keeping the long side, 1 if none does.
+    """
+
+    if size is None or not min_long_side:
+        return reduction
+    while reduction > 1 and max(size) / reduction < min_long_side:
+        reduction //= 2
+    return reduction
+
+
+def _probe(content: bytes) -> tuple[int, tuple[int, int] | None]:
+    """The function reading the EXIF orientation and size without decoding the pixels."""
+
+    try:
+        with Image.open(io.BytesIO(content)) as img:
+            return int(img.getexif().get(EXIF_ORIENTATION, 1)), img.size
+    except Exception:
+        return 1, None
+
+
+def _upright_size(size: tuple[int, int], orientation: int) -> tuple[int, int]:
+    width, height = size
+    return (height, width) if orientation >= 5 else (width, height)
+
+
+def apply_orientation(img: np.ndarray, orientation: int) -> np.ndarray:
+    """The function rotating and flipping an image according to its EXIF orientation.
+
+    Args:
+        img (np.ndarray): The decoded image.
+        orientation (int): The EXIF orientation value, 1 to 8.
+
+    Returns:
+        np.ndarray: The upright image.
+    """
+
+    if orientation == 2:
+        return cv2.flip(img, 1)
+    if orientation == 3:
+        return cv2.rotate(img, cv2.ROTATE_180)
+    if orientation == 4:
+        return cv2.flip(img, 0)
+    if orientation == 5:
+        return cv2.flip(cv2.rotate(img, cv2.ROTATE_90_CLOCKWISE), 1)
+    if orientation == 6:
+        return cv2.rotate(img, cv2.ROTATE_90_CLOCKWISE)
+    if orientation == 7:
+        return cv2.flip(cv2.rotate(img, cv2.ROTATE_90_COUNTERCLOCKWISE), 1)
+    if orientation == 8:
+        return cv2.rotate(img, cv2.ROTATE_90_COUNTERCLOCKWISE)
+    return img
+
+
+def _decode_heif(content: bytes, reduction: int, min_long_side: int) -> DecodedImage:
+    # libheif applies the rotation and mirroring stored in the container itself
+    heif_file = _pillow_heif().open_heif(content, convert_hdr_to_8bit=True, bgr_mode=True)
+    img = np.asarray(heif_file)
+    if img.shape[2] == 4:
+        img = cv2.cvtColor(img, cv2.COLOR_BGRA2BGR)
+    height, width = img.shape[:2]
+    reduction = cap_reduction(reduction, (width, height), min_long_side)
+    if reduction > 1:
+        # HEIF has no scaled decode, downscaling still bounds the rest of the pipeline
+        img = cv2.resize(img, (-(-width // reduction), -(-height // reduction)), interpolation=cv2.INTER_AREA)
+    return DecodedImage(img, width, height, reduction)
+
+
+def _decode_pil(content: bytes, reduction: int, min_long_side: int) -> DecodedImage:
+    with Image.open(io.BytesIO(content)) as img:
+        orientation = int(img.getexif().get(EXIF_ORIENTATION, 1))
+        raw_width = img.width
+        width, height = _upright_size(img.size, orientation)
+        reduction = cap_reduction(reduction, img.size, min_long_side)
+        if reduction > 1:
+            # JPEG DCT scaling first, whatever is left is reduced after decoding
+            img.draft("RGB", (img.width // reduction, img.height // reduction))
+            img.load()
+            remaining = reduction // max(1, round(raw_width / img.width))
+            if remaining > 1:
+                img = img.reduce(remaining)
+        img = ImageOps.exif_transpose(img).convert("RGB")
+        return DecodedImage(cv2.cvtColor(np.asarray(img), cv2.COLOR_RGB2BGR), width, height, reduction)
+
+
+def decode_image(content: bytes, filename: str, reduction: int = 1, min_long_side: int = 0) -> DecodedImage | None:
+    """The function decoding upload bytes straight into a BGR array.
+
+    JPEG, PNG and other formats supported by OpenCV go through
+    `cv2.imdecode`, HEIC/HEIF through `pillow_heif` and everything else
+    through PIL. The EXIF orientation is applied in every case. With a
+    reduction above 1 JPEGs are decoded at 1/2, 1/4 or 1/8 of the size
+    using DCT scaling. The reduction is lowered when the decoded long side
+    would fall below `min_long_side`.
+
+    Args:
+        content (bytes): The uploaded file.
+        filename (str): The name of the uploaded file.
+        reduction (int): The decode reduction factor, 1, 2, 4 or 8.
+        min_long_side (int): The minimal long side of the decoded image, 0 for no limit.
+
+    Returns:
+        DecodedImage | None: The upright BGR image if it could be decoded.
+    """
+
+    extension = filename.rsplit(".", 1)[-1].lower() if filename else ""
+    _pillow_heif()
+
+    try:
+        if extension in HEIF_EXTENSIONS:
+            return _decode_heif(content, reduction, min_long_side)
+        if extension in PIL_EXTENSIONS:
+            return _decode_pil(content, reduction, min_long_side)
+
+        orientation, size = _probe(content)
+        reduction = cap_reduction(reduction, size, min_long_side)
+        buffer = np.frombuffer(content, dtype=np.uint8)
+        img = cv2.imdecode(buffer, REDUCED_FLAGS.get(reduction, cv2.IMREAD_COLOR) | cv2.IMREAD_IGNORE_ORIENTATION)
+        if img is not None:
+            img = apply_orientation(img, orientation)
+            if size is None:
+                size = (img.shape[1] * reduction, img.shape[0] * reduction)
+            else:
+                size = _upright_size(size, orientation)
+            return DecodedImage(img, *size, reduction)
+
+        return _decode_pil(content, reduction, min_long_side)
+    except Exception as e:
+        logger.warning("Error decoding image: %s", e)
+        return None
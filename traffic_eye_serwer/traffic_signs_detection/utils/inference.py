@@ -0,0 +1,85 @@
+"""Module providing the entry point of tile inference."""
+
+from typing import List
+
+import numpy as np
+
+from config import config
+from core.config_model import get_model
+from utils.batching import get_scheduler
+from utils.tiling import Tile, join_detections, predict_tile_arrays, predict_tiles, to_global
+from utils.worker_pool import get_worker_pool
+
+
+def predict(tiles: List[Tile], conf_threshold: float, shared_batching: bool = False) -> np.ndarray:
+    """The function running tiles through the configured inference path.
+
+    The tiles go to the model worker processes when `MODEL_WORKERS` is set,
+    to the cross-request scheduler when `MICRO_BATCHING` is enabled and to
+    the model of the calling thread otherwise.
+
+    Args:
+        tiles (List[Tile]): The tiles to run the model on.
+        conf_threshold (float): The minimal confidence of a detection.
+        shared_batching (bool): Whether to use the cross-request scheduler even with
+            `MICRO_BATCHING` disabled, e.g. for the images of one batch request.
+
+    Returns:
+        np.ndarray: The (N, 6) detections in the source image coordinates.
+    """
+
+    if config.MODEL_WORKERS:
+        return get_worker_pool().predict(tiles, conf_threshold)
+    if config.MICRO_BATCHING or shared_batching:
+        return get_scheduler().predict(tiles, conf_threshold)
+    return predict_tiles(get_model(), tiles, conf_threshold, config.DETECTION_BATCH_SIZE)
+
+
+def warm_up(iterations: int, tile_size: int = 640) -> None:
+    """The function running blank tiles through the configured inference path.
+
+    The tiles have the production tile size and fill one production batch,
+    so the model of the calling thread is loaded and its first, slowest
+    runs happen before the first request.
+
+    Args:
+        iterations (int): The number of dummy batches to run.
+        tile_size (int): The size of the dummy tiles.
+    """
+
+    tiles = [
+        Tile(np.zeros((tile_size, tile_size, 3), dtype=np.uint8), 0, 0, 1.0, tile_size, tile_size)
+        for _ in range(config.DETECTION_BATCH_SIZE)
+    ]
+    for _ in range(iterations):
+        predict(tiles, 1.0)
+
+
+def predict_groups(groups: List[List[Tile]], conf_threshold: float) -> List[np.ndarray]:
+    """The function running the tiles of several images, e.g. video frames, in shared batches.
+
+    The tiles go to the model worker processes when `MODEL_WORKERS` is set
+    and to the model of the calling thread otherwise. The groups are
+    already a batch, so the cross-request scheduler is not used.
+
+    Args:
+        groups (List[List[Tile]]): The tiles of every image.
+        conf_threshold (float): The minimal confidence of a detection.
+
+    Returns:
+        List[np.ndarray]: The (N, 6) detections of every image in its own coordinates.
+    """
+
+    tiles = [tile for group in groups for tile in group]
+    if config.MODEL_WORKERS:
+        detections = get_worker_pool().predict_images([tile.image for tile in tiles], conf_threshold)
+        detections = [to_global(tile_detections, tile) for tile_detections, tile in zip(detections, tiles)]
+    else:
+        detections = predict_tile_arrays(get_model(), tiles, conf_threshold, config.DETECTION_BATCH_SIZE)
+
+    results = []
+    start = 0
+    for group in groups:
+        results.append(join_detections(detections[start:start + len(group)]))
+        start += len(group)
+    return results
@@ -0,0 +1,93 @@
+"""Module providing the leveled, rate-limited and non-blocking logging of the app."""
+
+import logging
+import queue
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener
+
+LOG_FORMAT = "%(asctime)s %(levelname)s %(name)s: %(message)s"
+
+_listener: QueueListener | None = None
+
+
+class RateLimitFilter(logging.Filter):
+    """A filter letting through at most `burst` records of one message per `interval` seconds.
+
+    Records are grouped by logger, level and message template, so the
+    arguments of a message do not split its group. The number of records
+    dropped in a window is reported with the first record of the next one.
+    """
+
+    def __init__(self, burst: int = 20, interval: float = 60) -> None:
+        """The initializer of the 'rate limit filter'.
+
+        Args:
+            burst (int): The number of records of one message let through per window, 0 disables the limit.
+            interval (float): The length of the window in seconds.
+        """
+
+        super().__init__()
+        self.burst = burst
+        self.interval = interval
+        self._windows: dict[tuple, list] = {}  # [window start, records let through, records dropped]
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.burst <= 0:
+            return True
+
+        key = (record.name, record.levelno, record.msg)
+        now = time.monotonic()
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or now - window[0] >= self.interval:
+                if window is not None and window[2]:
+                    record.msg = f"{record.msg} [{window[2]} similar messages suppressed]"
+                window = [now, 0, 0]
+                self._windows[key] = window
+            if window[1] >= self.burst:
+                window[2] += 1
+                return False
+            window[1] += 1
+        return True
+
+
+def configure_logging(level: str = "INFO", burst: int = 20, interval: float = 60) -> None:
+    """The function routing the app logs through a rate limit to a background writer thread.
+
+    Request handlers only put records on a queue, the formatting and the
+    write to stderr happen on the listener thread.
+
+    Args:
+        level (str): The lowest level logged, e.g. `DEBUG` or `INFO`.
+        burst (int): The number of records of one message let through per window.
+        interval (float): The length of the rate limit window in seconds.
+    """
+
+    global _listener
+    if _listener is not None:
+        return
+
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+
+    records = queue.SimpleQueue()
+    queue_handler = QueueHandler(records)
+    queue_handler.addFilter(RateLimitFilter(burst, interval))
+
+    root = logging.getLogger()
+    root.setLevel(level.upper())
+    root.addHandler(queue_handler)
+
+    _listener = QueueListener(records, stream_handler, respect_handler_level=True)
+    _listener.start()
+
+
+def shutdown_logging() -> None:
+    """The function writing the queued records and stopping the writer thread."""
+
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
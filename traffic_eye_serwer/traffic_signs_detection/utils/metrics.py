@@ -0,0 +1,226 @@
+"""Module providing the per-stage timing of detections and its Prometheus export.
+
+Blocking stages run on executor threads, worker processes and the batching
+thread, where the request context is not available. They are measured with
+a `StageTimer` returned with their result and recorded on the event loop
+with `record_stages`, which feeds both the histograms and the timing
+breakdown of the current request.
+"""
+
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator
+
+from utils.admission import AdmissionController
+
+try:
+    import prometheus_client
+    from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Histogram, generate_latest
+    from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+except ImportError:
+    prometheus_client = None
+    CONTENT_TYPE_LATEST = "text/plain; version=0.0.4; charset=utf-8"
+
+# From a small tile to a long video
+STAGE_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300)
+TILE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128)
+
+# The stage durations of the request being handled, set by the timing middleware
+_request_stages: ContextVar[Dict[str, float] | None] = ContextVar("request_stages", default=None)
+# Collectors of the app state, also added to the joined registry of many processes
+_collectors: list = []
+
+if prometheus_client is not None:
+    STAGE_SECONDS = Histogram(
+        "detection_stage_seconds",
+        "Time spent in a stage of the detection pipeline.",
+        ["kind", "stage"],
+        buckets=STAGE_BUCKETS,
+    )
+    INFERENCE_BATCH_SECONDS = Histogram(
+        "detection_inference_batch_seconds",
+        "Time of a single forward pass over a batch of tiles or frames.",
+        buckets=STAGE_BUCKETS,
+    )
+    INFERENCE_BATCH_TILES = Histogram(
+        "detection_inference_batch_tiles",
+        "Number of tiles or frames in a single forward pass.",
+        buckets=TILE_BUCKETS,
+    )
+    REQUEST_SECONDS = Histogram(
+        "http_request_duration_seconds",
+        "Time from receiving a request to sending the last byte of its response.",
+        ["method", "path", "status"],
+        buckets=STAGE_BUCKETS,
+    )
+
+
+class StageTimer:
+    """A class summing the durations of the stages of one detection."""
+
+    def __init__(self) -> None:
+        """The initializer of the 'stage timer'."""
+
+        self.stages: Dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """The method measuring the block as the given stage.
+
+        Args:
+            name (str): The name of the stage, repeated stages are summed.
+        """
+
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - started)
+
+    def add(self, name: str, seconds: float) -> None:
+        """The method adding a measured duration to a stage.
+
+        Args:
+            name (str): The name of the stage.
+            seconds (float): The duration in seconds.
+        """
+
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+
+def record_stages(kind: str, stages: Dict[str, float]) -> None:
+    """The function recording stage durations in the histograms and the current request breakdown.
+
+    Args:
+        kind (str): The kind of the detection, e.g. `image` or `video`.
+        stages (Dict[str, float]): The duration of every stage in seconds.
+    """
+
+    if prometheus_client is not None:
+        for name, seconds in stages.items():
+            STAGE_SECONDS.labels(kind, name).observe(seconds)
+
+    breakdown = _request_stages.get()
+    if breakdown is not None:
+        for name, seconds in stages.items():
+            breakdown[name] = breakdown.get(name, 0.0) + seconds
+
+
+@contextmanager
+def timed(kind: str, stage: str) -> Iterator[None]:
+    """The function measuring a block running in the request context as a stage.
+
+    Args:
+        kind (str): The kind of the detection, e.g. `image` or `video`.
+        stage (str): The name of the stage.
+    """
+
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stages(kind, {stage: time.perf_counter() - started})
+
+
+def observe_batch(tiles: int, seconds: float) -> None:
+    """The function recording a single forward pass of the model.
+
+    Args:
+        tiles (int): The number of tiles or frames in the batch.
+        seconds (float): The duration of the forward pass.
+    """
+
+    if prometheus_client is not None:
+        INFERENCE_BATCH_SECONDS.observe(seconds)
+        INFERENCE_BATCH_TILES.observe(tiles)
+
+
+def start_request() -> Dict[str, float]:
+    """The function starting the timing breakdown of a request.
+
+    Returns:
+        Dict[str, float]: The breakdown filled by `record_stages` while the request is handled.
+    """
+
+    breakdown: Dict[str, float] = {}
+    _request_stages.set(breakdown)
+    return breakdown
+
+
+def observe_request(method: str, path: str, status: int, seconds: float) -> None:
+    """The function recording the duration of a handled request.
+
+    Args:
+        method (str): The HTTP method.
+        path (str): The route template of the request, e.g. `/detection/video-jobs/{job_id}`.
+        status (int): The status code of the response.
+        seconds (float): The duration of the request.
+    """
+
+    if prometheus_client is not None:
+        REQUEST_SECONDS.labels(method, path, str(status)).observe(seconds)
+
+
+class AdmissionCollector:
+    """A collector exposing the state of the admission controllers at scrape time."""
+
+    def __init__(self, controllers: Dict[str, AdmissionController]) -> None:
+        """The initializer of the 'admission collector'.
+
+        Args:
+            controllers (Dict[str, AdmissionController]): The controller of every budget, e.g. `image`.
+        """
+
+        self.controllers = controllers
+
+    def collect(self) -> Iterator:
+        active = GaugeMetricFamily("admission_active_requests", "Requests being processed.", labels=["budget"])
+        waiting = GaugeMetricFamily("admission_waiting_requests", "Requests waiting for a slot.", labels=["budget"])
+        admitted = CounterMetricFamily("admission_admitted", "Requests admitted.", labels=["budget"])
+        rejected = CounterMetricFamily("admission_rejected", "Requests shed with 503.", labels=["budget"])
+        for budget, controller in self.controllers.items():
+            stats = controller.stats()
+            active.add_metric([budget], stats["active"])
+            waiting.add_metric([budget], stats["waiting"])
+            admitted.add_metric([budget], stats["admitted_total"])
+            rejected.add_metric([budget], stats["rejected_total"])
+        yield from (active, waiting, admitted, rejected)
+
+
+def register_admission(controllers: Dict[str, AdmissionController]) -> None:
+    """The function exposing the admission controllers on the metrics endpoint.
+
+    Args:
+        controllers (Dict[str, AdmissionController]): The controller of every budget, e.g. `image`.
+    """
+
+    if prometheus_client is not None:
+        collector = AdmissionCollector(controllers)
+        prometheus_client.REGISTRY.register(collector)
+        _collectors.append(collector)
+
+
+def metrics_text() -> bytes | None:
+    """The function rendering all metrics in the Prometheus text format.
+
+    With `PROMETHEUS_MULTIPROC_DIR` set, the metrics of all server and
+    model worker processes are joined.
+
+    Returns:
+        bytes | None: The metrics, None if prometheus_client is not installed.
+    """
+
+    if prometheus_client is None:
+        return None
+
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        from prometheus_client import multiprocess
+
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        for collector in _collectors:
+            registry.register(collector)
+        return generate_latest(registry)
+    return generate_latest()
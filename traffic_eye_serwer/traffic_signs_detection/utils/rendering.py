@@ -0,0 +1,278 @@
+"""Module providing the drawing of detections and the deferred rendering of annotated files."""
+
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from colorsys import hsv_to_rgb
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterable, Iterator
+
+import cv2
+import numpy as np
+
+from core.config_model import class_names
+from utils.image_io import decode_image
+
+OUTPUTS_DIR = Path("outputs")
+# Uploads and boxes of the annotated files rendered on their first download
+PENDING_DIR = Path("temp") / "render"
+DEFAULT_COLOR = (0, 255, 0)
+
+logger = logging.getLogger(__name__)
+
+# Lock and number of holders of every file being rendered, removed with the last holder
+_locks: Dict[str, list] = {}
+_locks_guard = threading.Lock()
+
+
+def class_colors() -> Dict[int, tuple]:
+    """The function generating a distinct colour for every class.
+
+    Returns:
+        Dict[int, tuple]: The BGR colour of every class id.
+    """
+
+    colors = {}
+    for class_id in range(len(class_names)):
+        rgb = hsv_to_rgb(class_id / len(class_names), 0.7, 1.0)
+        colors[class_id] = tuple(int(c * 255) for c in rgb)
+    return colors
+
+
+def draw_boxes(img: np.ndarray, boxes: Iterable, draw_labels: bool = True, colors: Dict[int, tuple] | None = None) -> None:
+    """The function drawing boxes and labels on an image in place.
+
+    Args:
+        img (np.ndarray): The BGR image.
+        boxes (Iterable): The (x1, y1, x2, y2, class_id, confidence) boxes.
+        draw_labels (bool): Whether to write the class and confidence above the boxes.
+        colors (Dict[int, tuple] | None): The colour of every class, green for all if None.
+    """
+
+    for x1, y1, x2, y2, class_id, confidence in boxes:
+        x1, y1, x2, y2, class_id = int(x1), int(y1), int(x2), int(y2), int(class_id)
+        color = colors.get(class_id, DEFAULT_COLOR) if colors else DEFAULT_COLOR
+        cv2.rectangle(img, (x1, y1), (x2, y2), color, 3)
+        if draw_labels:
+            label = f"{class_names[class_id]} ({int(confidence * 100)}%)" if class_id < len(class_names) else "Unknown"
+            cv2.putText(img, label, (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.7, color, 3)
+
+
+def save_pending_image(
+        unique_filename: str,
+        content: bytes,
+        filename: str,
+        boxes: list,
+        draw_labels: bool,
+        jpeg_quality: int,
+        reduction: int = 1,
+) -> None:
+    """The function keeping an uploaded image so its annotated copy can be rendered later.
+
+    The image is decoded again with the same reduction, so the rendered
+    copy matches the one an eager render would have saved.
+
+    Args:
+        unique_filename (str): The name of the annotated output file.
+        content (bytes): The uploaded image.
+        filename (str): The name of the uploaded file, used to pick the decoder.
+        boxes (list): The (x1, y1, x2, y2, class_id, confidence) boxes in the decoded resolution.
+        draw_labels (bool): Whether to write the labels above the boxes.
+        jpeg_quality (int): The quality of the annotated JPEG.
+        reduction (int): The decode reduction the boxes were detected with.
+    """
+
+    PENDING_DIR.mkdir(parents=True, exist_ok=True)
+    (PENDING_DIR / f"{unique_filename}.src").write_bytes(content)
+    _write_meta(unique_filename, {
+        "kind": "image",
+        "filename": filename,
+        "boxes": [list(box) for box in boxes],
+        "draw_labels": draw_labels,
+        "jpeg_quality": jpeg_quality,
+        "reduction": reduction,
+    })
+
+
+def save_pending_video(unique_filename: str, video_file: Path, frame_boxes: np.ndarray, draw_labels: bool) -> None:
+    """The function keeping a processed video so its annotated copy can be rendered later.
+
+    Args:
+        unique_filename (str): The name of the annotated output file.
+        video_file (Path): The saved upload, moved into the pending directory.
+        frame_boxes (np.ndarray): The (N, 7) frame index, x1, y1, x2, y2, class_id, confidence boxes drawn on every frame.
+        draw_labels (bool): Whether to write the labels above the boxes.
+    """
+
+    PENDING_DIR.mkdir(parents=True, exist_ok=True)
+    shutil.move(str(video_file), PENDING_DIR / f"{unique_filename}.src")
+    np.save(PENDING_DIR / f"{unique_filename}.npy", frame_boxes)
+    _write_meta(unique_filename, {"kind": "video", "draw_labels": draw_labels})
+
+
+def has_pending(unique_filename: str) -> bool:
+    """The function checking whether an annotated file waits to be rendered.
+
+    Args:
+        unique_filename (str): The name of the annotated output file.
+
+    Returns:
+        bool: True if the file can be rendered.
+    """
+
+    return Path(unique_filename).name == unique_filename and (PENDING_DIR / f"{unique_filename}.json").exists()
+
+
+def render_pending(unique_filename: str) -> bool:
+    """The function rendering a deferred annotated file into the outputs directory.
+
+    The function is blocking. Concurrent calls for the same file render it once.
+
+    Args:
+        unique_filename (str): The name of the annotated output file.
+
+    Returns:
+        bool: True if the annotated file exists afterwards.
+    """
+
+    output_file = OUTPUTS_DIR / unique_filename
+    with _lock(unique_filename):
+        if output_file.exists():
+            return True
+        if not has_pending(unique_filename):
+            return False
+
+        try:
+            meta = json.loads((PENDING_DIR / f"{unique_filename}.json").read_text())
+            OUTPUTS_DIR.mkdir(exist_ok=True)
+            # Rendered under a temporary name, a partial file is never served
+            temp_file = output_file.with_name(f"rendering-{unique_filename}")
+            if meta["kind"] == "image":
+                rendered = _render_image(unique_filename, meta, temp_file)
+            else:
+                rendered = _render_video(unique_filename, meta, temp_file)
+            if not rendered:
+                temp_file.unlink(missing_ok=True)
+                return False
+            os.replace(temp_file, output_file)
+        except Exception as e:
+            logger.exception("Error rendering %s: %s", unique_filename, e)
+            return False
+
+        _remove_pending(unique_filename)
+        return True
+
+
+def cleanup_pending(max_age: float) -> int:
+    """The function removing deferred renders nobody downloaded in time.
+
+    Args:
+        max_age (float): The seconds a deferred render is kept.
+
+    Returns:
+        int: The number of removed renders.
+    """
+
+    if not PENDING_DIR.is_dir():
+        return 0
+
+    deadline = time.time() - max_age
+    removed = 0
+    for path in PENDING_DIR.iterdir():
+        try:
+            if path.stat().st_mtime >= deadline:
+                continue
+        except FileNotFoundError:
+            continue
+        if path.suffix == ".json":
+            unique_filename = path.name[:-len(".json")]
+            with _lock(unique_filename):
+                _remove_pending(unique_filename)
+            removed += 1
+        elif not (PENDING_DIR / f"{path.stem}.json").exists():
+            # Inputs of a render which failed before its metadata was written
+            path.unlink(missing_ok=True)
+
+    if removed:
+        logger.info("Removed %d expired deferred renders", removed)
+    return removed
+
+
+@contextmanager
+def _lock(unique_filename: str) -> Iterator[None]:
+    with _locks_guard:
+        entry = _locks.setdefault(unique_filename, [threading.Lock(), 0])
+        entry[1] += 1
+    try:
+        with entry[0]:
+            yield
+    finally:
+        with _locks_guard:
+            entry[1] -= 1
+            if not entry[1]:
+                del _locks[unique_filename]
+
+
+def _remove_pending(unique_filename: str) -> None:
+    # The metadata goes first, so the render is no longer offered
+    for suffix in (".json", ".src", ".npy"):
+        (PENDING_DIR / f"{unique_filename}{suffix}").unlink(missing_ok=True)
+
+
+def _write_meta(unique_filename: str, meta: dict) -> None:
+    # Written last, the render is only offered once its inputs are complete
+    path = PENDING_DIR / f"{unique_filename}.json"
+    temp_path = path.with_suffix(".tmp")
+    temp_path.write_text(json.dumps(meta))
+    os.replace(temp_path, path)
+
+
+def _render_image(unique_filename: str, meta: dict, output_file: Path) -> bool:
+    decoded = decode_image((PENDING_DIR / f"{unique_filename}.src").read_bytes(), meta["filename"], meta.get("reduction", 1))
+    if decoded is None:
+        logger.error("Failed to decode pending image %s", unique_filename)
+        return False
+
+    img = decoded.image
+    draw_boxes(img, meta["boxes"], meta["draw_labels"])
+    return cv2.imwrite(str(output_file), img, [cv2.IMWRITE_JPEG_QUALITY, meta["jpeg_quality"]])
+
+
+def _render_video(unique_filename: str, meta: dict, output_file: Path) -> bool:
+    frame_boxes = np.load(PENDING_DIR / f"{unique_filename}.npy")
+    cap = cv2.VideoCapture(str(PENDING_DIR / f"{unique_filename}.src"))
+    if not cap.isOpened():
+        logger.error("Failed to open pending video %s", unique_filename)
+        return False
+
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    # The output name keeps the .mp4 suffix OpenCV picks the container by
+    out = cv2.VideoWriter(str(output_file), cv2.VideoWriter_fourcc(*"mp4v"), fps, (width, height))
+    if not out.isOpened():
+        cap.release()
+        logger.error("Failed to create output video %s", output_file)
+        return False
+
+    colors = class_colors()
+    # Rows are in frame order, each frame draws its own slice
+    frame_indices = frame_boxes[:, 0].astype(int)
+    index = 0
+    try:
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            start, end = np.searchsorted(frame_indices, [index, index + 1])
+            draw_boxes(frame, frame_boxes[start:end, 1:].tolist(), meta["draw_labels"], colors)
+            out.write(frame)
+            index += 1
+    finally:
+        cap.release()
+        out.release()
+    return True
@@ -0,0 +1,148 @@
+"""Module providing the content-addressed cache of detection results."""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+from core.domain.detection import DetectionResponse
+from utils.rendering import has_pending
+
+logger = logging.getLogger(__name__)
+
+
+def result_key(content: bytes, model: str, parameters: dict) -> str:
+    """The function building the cache key of a detection.
+
+    Args:
+        content (bytes): The uploaded file.
+        model (str): The identity of the model weights.
+        parameters (dict): The parameters affecting the detections.
+
+    Returns:
+        str: The hex digest identifying the result.
+    """
+
+    digest = hashlib.sha256(content)
+    digest.update(b"\0" + model.encode())
+    digest.update(b"\0" + json.dumps(parameters, sort_keys=True).encode())
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """A class keeping detection responses of already processed uploads.
+
+    Responses live in a bounded in-memory LRU. With a directory they are
+    also written to disk as JSON, so they survive restarts and entries
+    evicted from memory can still be hit. A response is only served while
+    the annotated file it points to still exists or can still be rendered.
+    """
+
+    def __init__(self, max_entries: int = 256, directory: str | Path | None = None, outputs_dir: str | Path = "outputs") -> None:
+        """The initializer of the 'result cache'.
+
+        Args:
+            max_entries (int): The number of responses kept in memory.
+            directory (str | Path | None): The directory of the on-disk tier, None keeps results in memory only.
+            outputs_dir (str | Path): The directory of the annotated files.
+        """
+
+        self.max_entries = max_entries
+        self.directory = Path(directory) if directory else None
+        self.outputs_dir = Path(outputs_dir)
+        self._entries: OrderedDict[str, DetectionResponse] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        if self.directory is not None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+
+    @property
+    def enabled(self) -> bool:
+        """Whether the cache stores anything at all."""
+        return self.max_entries > 0 or self.directory is not None
+
+    def get(self, key: str) -> DetectionResponse | None:
+        """The method getting the response stored for a key.
+
+        Args:
+            key (str): The key built by `result_key`.
+
+        Returns:
+            DetectionResponse | None: The stored response if its annotated file still exists.
+        """
+
+        with self._lock:
+            response = self._entries.get(key)
+            if response is not None:
+                self._entries.move_to_end(key)
+
+        if response is None:
+            response = self._read(key)
+            if response is not None:
+                self._remember(key, response)
+
+        if response is not None and not self._output_exists(response):
+            self._forget(key)
+            response = None
+
+        with self._lock:
+            if response is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return response
+
+    def put(self, key: str, response: DetectionResponse) -> None:
+        """The method storing the response of a key.
+
+        Args:
+            key (str): The key built by `result_key`.
+            response (DetectionResponse): The response to store.
+        """
+
+        self._remember(key, response)
+        if self.directory is not None:
+            try:
+                path = self.directory / f"{key}.json"
+                temp_path = path.with_suffix(".tmp")
+                temp_path.write_text(response.model_dump_json())
+                os.replace(temp_path, path)
+            except OSError as e:
+                logger.error("Error writing cached result: %s", e)
+
+    def _remember(self, key: str, response: DetectionResponse) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = response
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _forget(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+        if self.directory is not None:
+            (self.directory / f"{key}.json").unlink(missing_ok=True)
+
+    def _read(self, key: str) -> DetectionResponse | None:
+        if self.directory is None:
+            return None
+        try:
+            return DetectionResponse.model_validate_json((self.directory / f"{key}.json").read_text())
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.error("Error reading cached result: %s", e)
+            return None
+
+    def _output_exists(self, response: DetectionResponse) -> bool:
+        if not response.file_url:
+            return True
+        name = Path(response.file_url).name
+        return (self.outputs_dir / name).exists() or has_pending(name)
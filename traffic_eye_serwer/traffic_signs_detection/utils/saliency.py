@@ -0,0 +1,86 @@
+"""Module providing the colour-saliency prefilter of image tiles."""
+
+from typing import List, Tuple
+
+import cv2
+import numpy as np
+
+from utils.tiling import Tile
+
+# The mask is computed on a downscaled copy, the palette of a sign survives it
+MASK_SCALE = 0.25
+# HSV ranges (OpenCV hue 0-180) of the red, blue and yellow sign palette
+SIGN_COLOR_RANGES = (
+    ((0, 100, 60), (10, 255, 255)),     # Czerwony
+    ((170, 100, 60), (180, 255, 255)),  # Czerwony
+    ((100, 120, 50), (130, 255, 255)),  # Niebieski
+    ((18, 100, 100), (35, 255, 255)),   # Żółty
+)
+
+
+def sign_color_mask(img: np.ndarray) -> np.ndarray:
+    """The function marking the pixels with a road sign colour.
+
+    Args:
+        img (np.ndarray): The BGR image.
+
+    Returns:
+        np.ndarray: The uint8 mask with 1 for sign coloured pixels.
+    """
+
+    hsv = cv2.cvtColor(img, cv2.COLOR_BGR2HSV)
+    mask = np.zeros(hsv.shape[:2], dtype=np.uint8)
+    for lower, upper in SIGN_COLOR_RANGES:
+        mask |= cv2.inRange(hsv, lower, upper)
+    return mask // 255
+
+
+def tile_scores(img: np.ndarray, tiles: List[Tile]) -> np.ndarray:
+    """The function scoring the tiles by the fraction of their pixels with a sign colour.
+
+    Only full-resolution tiles are scored, downscaled copies of the whole
+    image are cheap and keep the score 1.
+
+    Args:
+        img (np.ndarray): The BGR image the tiles were cut from.
+        tiles (List[Tile]): The tiles of the image.
+
+    Returns:
+        np.ndarray: The score of every tile between 0 and 1.
+    """
+
+    scores = np.ones(len(tiles), dtype=np.float32)
+    indices = [i for i, tile in enumerate(tiles) if tile.scale == 1.0]
+    if not indices:
+        return scores
+
+    small = cv2.resize(img, (0, 0), fx=MASK_SCALE, fy=MASK_SCALE, interpolation=cv2.INTER_AREA)
+    integral = cv2.integral(sign_color_mask(small))
+    mask_height, mask_width = small.shape[:2]
+
+    # Sum of the mask inside every tile from four corners of the integral image
+    regions = np.array([(tiles[i].offset_x, tiles[i].offset_y, tiles[i].width, tiles[i].height) for i in indices], dtype=np.float64)
+    x1 = np.clip(np.floor(regions[:, 0] * MASK_SCALE), 0, mask_width - 1).astype(int)
+    y1 = np.clip(np.floor(regions[:, 1] * MASK_SCALE), 0, mask_height - 1).astype(int)
+    x2 = np.clip(np.ceil((regions[:, 0] + regions[:, 2]) * MASK_SCALE), x1 + 1, mask_width).astype(int)
+    y2 = np.clip(np.ceil((regions[:, 1] + regions[:, 3]) * MASK_SCALE), y1 + 1, mask_height).astype(int)
+    totals = integral[y2, x2] - integral[y1, x2] - integral[y2, x1] + integral[y1, x1]
+    scores[indices] = totals / ((x2 - x1) * (y2 - y1))
+    return scores
+
+
+def filter_tiles(img: np.ndarray, tiles: List[Tile], min_score: float) -> Tuple[List[Tile], int]:
+    """The function dropping the tiles without enough sign coloured pixels, e.g. sky or asphalt.
+
+    Args:
+        img (np.ndarray): The BGR image the tiles were cut from.
+        tiles (List[Tile]): The tiles of the image.
+        min_score (float): The smallest fraction of sign coloured pixels of a kept tile.
+
+    Returns:
+        Tuple[List[Tile], int]: The kept tiles and the number of skipped ones.
+    """
+
+    scores = tile_scores(img, tiles)
+    kept = [tile for tile, score in zip(tiles, scores) if score >= min_score]
+    return kept, len(tiles) - len(kept)
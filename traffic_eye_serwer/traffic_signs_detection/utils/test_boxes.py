@@ -0,0 +1,83 @@
+"""Tests of the box merging against a plain per-class greedy implementation."""
+
+import numpy as np
+import pytest
+
+from utils.boxes import iou_matrix, merge_boxes
+
+
+def reference_merge(detections: np.ndarray, iou_threshold: float, method: str) -> np.ndarray:
+    detections = detections[np.argsort(-detections[:, 5], kind="stable")]
+    kept = []
+    clusters = []
+    for row in detections:
+        for index, kept_row in enumerate(kept):
+            if kept_row[4] == row[4] and iou_matrix(kept_row[None], row[None])[0, 0] > iou_threshold:
+                clusters[index].append(row)
+                break
+        else:
+            kept.append(row)
+            clusters.append([row])
+
+    merged = np.array(kept, dtype=np.float32).reshape(-1, 6)
+    if method == "wbf":
+        for index, cluster in enumerate(clusters):
+            cluster = np.array(cluster)
+            merged[index, :4] = (cluster[:, :4] * cluster[:, 5:6]).sum(axis=0) / cluster[:, 5].sum()
+    return merged
+
+
+def random_detections(seed: int, count: int, classes: int, extent: float = 1000) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    corners = rng.uniform(0, extent, (count, 2))
+    sizes = rng.uniform(10, 120, (count, 2))
+    # Jittered copies of the first boxes make clusters of duplicates
+    corners[count // 2:] = corners[:count - count // 2] + rng.normal(0, 5, (count - count // 2, 2))
+    return np.column_stack([
+        corners,
+        corners + sizes,
+        rng.integers(0, classes, count),
+        rng.uniform(0.3, 1.0, count),
+    ]).astype(np.float32)
+
+
+@pytest.mark.parametrize("method", ["nms", "wbf"])
+@pytest.mark.parametrize("seed", range(5))
+def test_merge_boxes_matches_reference(method: str, seed: int) -> None:
+    detections = random_detections(seed, 200, classes=3)
+
+    merged = merge_boxes(detections, 0.5, method)
+
+    np.testing.assert_allclose(merged, reference_merge(detections, 0.5, method), rtol=1e-5, atol=1e-3)
+
+
+def test_merge_boxes_keeps_overlapping_boxes_of_different_classes() -> None:
+    detections = np.array([
+        [10, 10, 50, 50, 1, 0.9],
+        [10, 10, 50, 50, 2, 0.8],
+        [12, 12, 50, 50, 1, 0.7],
+    ], dtype=np.float32)
+
+    merged = merge_boxes(detections, 0.5, "nms")
+
+    np.testing.assert_array_equal(merged, detections[:2])
+
+
+def test_merge_boxes_separates_classes_far_from_the_origin() -> None:
+    # The class offsets must not lose the precision of large coordinates
+    detections = random_detections(7, 100, classes=100, extent=20000)
+
+    merged = merge_boxes(detections, 0.5, "nms")
+
+    np.testing.assert_allclose(merged, reference_merge(detections, 0.5, "nms"), rtol=1e-5)
+
+
+def test_merge_boxes_passes_through_small_inputs() -> None:
+    assert merge_boxes(np.empty((0, 6)), 0.5).shape == (0, 6)
+    single = np.array([[1, 2, 3, 4, 5, 0.5]], dtype=np.float32)
+    np.testing.assert_array_equal(merge_boxes(single, 0.5, "wbf"), single)
+
+
+def test_merge_boxes_rejects_unknown_method() -> None:
+    with pytest.raises(ValueError):
+        merge_boxes(np.zeros((2, 6)), 0.5, "soft-nms")
@@ -0,0 +1,88 @@
+"""Tests of the LRU and on-disk tiers of the result cache and of its output check."""
+
+from pathlib import Path
+
+import pytest
+
+from core.domain.detection import DetectionResponse
+from utils import rendering
+from utils.result_cache import ResultCache, result_key
+
+
+def response(file_url: str = "") -> DetectionResponse:
+    return DetectionResponse(signs=[], total_boxes=0, file_url=file_url, boxes=[])
+
+
+@pytest.fixture
+def outputs(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    monkeypatch.setattr(rendering, "PENDING_DIR", tmp_path / "render")
+    outputs_dir = tmp_path / "outputs"
+    outputs_dir.mkdir()
+    return outputs_dir
+
+
+def test_result_key_depends_on_content_model_and_parameters() -> None:
+    key = result_key(b"image", "model", {"conf": 0.5})
+
+    assert key == result_key(b"image", "model", {"conf": 0.5})
+    assert key != result_key(b"image2", "model", {"conf": 0.5})
+    assert key != result_key(b"image", "model2", {"conf": 0.5})
+    assert key != result_key(b"image", "model", {"conf": 0.4})
+
+
+def test_least_recently_used_entry_is_evicted(outputs: Path) -> None:
+    cache = ResultCache(max_entries=2, outputs_dir=outputs)
+    cache.put("a", response())
+    cache.put("b", response())
+
+    assert cache.get("a") is not None
+    cache.put("c", response())
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("c") is not None
+    assert (cache.hits, cache.misses) == (3, 1)
+
+
+def test_disk_tier_serves_entries_evicted_from_memory(outputs: Path, tmp_path: Path) -> None:
+    cache = ResultCache(max_entries=1, directory=tmp_path / "cache", outputs_dir=outputs)
+    cache.put("a", response())
+    cache.put("b", response())
+
+    assert cache.get("a") == response()
+    # A new cache reads what the previous one wrote
+    assert ResultCache(max_entries=1, directory=tmp_path / "cache", outputs_dir=outputs).get("b") == response()
+
+
+def test_response_without_its_output_file_is_dropped(outputs: Path, tmp_path: Path) -> None:
+    cache = ResultCache(max_entries=4, directory=tmp_path / "cache", outputs_dir=outputs)
+    (outputs / "kept.jpg").write_bytes(b"jpeg")
+    cache.put("kept", response("/static/kept.jpg"))
+    cache.put("removed", response("/static/removed.jpg"))
+
+    assert cache.get("kept") is not None
+    assert cache.get("removed") is None
+    assert not (tmp_path / "cache" / "removed.json").exists()
+
+
+def test_response_with_pending_render_is_served(outputs: Path) -> None:
+    cache = ResultCache(max_entries=4, outputs_dir=outputs)
+    rendering.save_pending_image("lazy.jpg", b"jpeg", "a.jpg", [], True, 90)
+    cache.put("lazy", response("/static/lazy.jpg"))
+
+    assert cache.get("lazy") is not None
+
+
+def test_response_without_file_url_is_served(outputs: Path) -> None:
+    cache = ResultCache(max_entries=4, outputs_dir=outputs)
+    cache.put("json", response())
+
+    assert cache.get("json") is not None
+
+
+def test_disabled_cache_stores_nothing(outputs: Path) -> None:
+    cache = ResultCache(max_entries=0, outputs_dir=outputs)
+    cache.put("a", response())
+
+    assert not cache.enabled
+    assert cache.get("a") is None
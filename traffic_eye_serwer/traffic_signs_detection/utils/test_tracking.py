@@ -0,0 +1,58 @@
+"""Tests of the track identities and of their expiry by frame index."""
+
+import numpy as np
+
+from utils.tracking import Tracker
+
+
+def frame(*boxes: tuple) -> np.ndarray:
+    return np.array(boxes, dtype=np.float32).reshape(-1, 6)
+
+
+def test_moving_sign_keeps_its_track_id() -> None:
+    tracker = Tracker(high_threshold=0.5, low_threshold=0.25, iou_threshold=0.3)
+
+    for index in range(10):
+        tracker.update(frame((100 + 4 * index, 100, 160 + 4 * index, 160, 3, 0.9)), index, index / 30)
+
+    assert tracker.ids.tolist() == [1]
+    assert [(track.track_id, track.hits) for track in tracker.tracks()] == [(1, 10)]
+
+
+def test_signs_of_different_classes_get_separate_tracks() -> None:
+    tracker = Tracker()
+
+    tracker.update(frame((10, 10, 50, 50, 1, 0.9), (10, 10, 50, 50, 2, 0.8)), 0, 0.0)
+    tracker.update(frame((12, 10, 52, 50, 2, 0.8), (12, 10, 52, 50, 1, 0.9)), 1, 0.1)
+
+    assert dict(zip(tracker.boxes[:, 4].astype(int).tolist(), tracker.ids.tolist())) == {1: 1, 2: 2}
+
+
+def test_low_confidence_detection_extends_but_never_starts_a_track() -> None:
+    tracker = Tracker(high_threshold=0.5, low_threshold=0.25)
+
+    tracker.update(frame((10, 10, 50, 50, 1, 0.9)), 0, 0.0)
+    tracker.update(frame((11, 10, 51, 50, 1, 0.3), (200, 200, 240, 240, 1, 0.3)), 1, 0.1)
+
+    assert tracker.ids.tolist() == [1]
+    assert tracker.last_frames.tolist() == [1]
+
+
+def test_track_expires_after_max_age_frames_between_keyframes() -> None:
+    tracker = Tracker(max_age=5)
+    tracker.update(frame((10, 10, 50, 50, 1, 0.9)), 0, 0.0)
+
+    # Keyframes every 3 frames, the sign disappears after the first one
+    tracker.update(frame(), 3, 0.1)
+    assert tracker.ids.tolist() == [1]
+    tracker.update(frame(), 6, 0.2)
+    assert tracker.ids.tolist() == []
+
+
+def test_returning_sign_after_expiry_gets_a_new_track_id() -> None:
+    tracker = Tracker(max_age=2)
+    tracker.update(frame((10, 10, 50, 50, 1, 0.9)), 0, 0.0)
+    tracker.update(frame((10, 10, 50, 50, 1, 0.9)), 10, 1.0)
+
+    assert tracker.ids.tolist() == [2]
+    assert [track.track_id for track in tracker.tracks()] == [1, 2]
@@ -0,0 +1,63 @@
+"""Tests of the bounded, chunked reading of uploads."""
+
+import asyncio
+import io
+from pathlib import Path
+
+from fastapi import UploadFile
+from starlette.datastructures import Headers
+
+from utils.upload import has_allowed_type, read_upload, spool_upload
+
+
+class CountingFile(io.BytesIO):
+    """A file counting the reads made on it."""
+
+    def __init__(self, content: bytes) -> None:
+        super().__init__(content)
+        self.reads = 0
+
+    def read(self, size: int = -1) -> bytes:
+        self.reads += 1
+        return super().read(size)
+
+
+def upload(content: bytes, filename: str = "a.jpg", content_type: str = "image/jpeg") -> UploadFile:
+    return UploadFile(CountingFile(content), filename=filename, headers=Headers({"content-type": content_type}))
+
+
+def test_read_upload_returns_content_within_limit() -> None:
+    content = bytes(range(256)) * 10
+
+    assert asyncio.run(read_upload(upload(content), max_bytes=len(content), chunk_size=100)) == content
+
+
+def test_read_upload_stops_at_the_limit() -> None:
+    file = upload(b"x" * 10_000)
+
+    assert asyncio.run(read_upload(file, max_bytes=250, chunk_size=100)) is None
+    assert file.file.reads == 3
+
+
+def test_spool_upload_writes_the_file(tmp_path: Path) -> None:
+    path = tmp_path / "upload.mp4"
+
+    assert asyncio.run(spool_upload(upload(b"x" * 1000), path, max_bytes=1000, chunk_size=64)) == 1000
+    assert path.read_bytes() == b"x" * 1000
+
+
+def test_spool_upload_removes_partial_file_over_the_limit(tmp_path: Path) -> None:
+    path = tmp_path / "upload.mp4"
+    file = upload(b"x" * 10_000)
+
+    assert asyncio.run(spool_upload(file, path, max_bytes=1000, chunk_size=64)) is None
+    assert not path.exists()
+    assert file.file.reads == 16
+
+
+def test_has_allowed_type_accepts_mime_type_or_extension() -> None:
+    extensions = {".jpg", ".png"}
+
+    assert has_allowed_type(upload(b"", "photo", "image/png"), "image/", extensions)
+    assert has_allowed_type(upload(b"", "photo.PNG", "application/octet-stream"), "image/", extensions)
+    assert not has_allowed_type(upload(b"", "notes.txt", "text/plain"), "image/", extensions)
@@ -0,0 +1,203 @@
+"""Module providing batched tile inference for high-resolution images."""
+
+import time
+from dataclasses import dataclass
+from typing import Any, Iterable, List
+
+import cv2
+import numpy as np
+
+from utils.metrics import observe_batch
+
+
+@dataclass
+class Tile:
+    """A class representing a single model input cut out of the source image."""
+    image: np.ndarray
+    offset_x: int
+    offset_y: int
+    scale: float
+    width: int
+    height: int
+
+
+def pad_tile(tile: np.ndarray, tile_size: int) -> np.ndarray:
+    """The function padding an edge tile to the full tile size.
+
+    Args:
+        tile (np.ndarray): The tile cut out of the image.
+        tile_size (int): The target size of the tile.
+
+    Returns:
+        np.ndarray: The tile padded with black pixels on the bottom and right.
+    """
+
+    height, width = tile.shape[:2]
+    if height == tile_size and width == tile_size:
+        return tile
+
+    padded = np.zeros((tile_size, tile_size, tile.shape[2]), dtype=tile.dtype)
+    padded[:height, :width] = tile
+    return padded
+
+
+def build_tiles(
+        img: np.ndarray,
+        tile_size: int = 640,
+        overlap: float = 0.2,
+        scales: Iterable[float] = (0.5, 0.25),
+) -> List[Tile]:
+    """The function building all overlapping tiles and pyramid levels of an image.
+
+    Args:
+        img (np.ndarray): The BGR image.
+        tile_size (int): The size of a single square tile.
+        overlap (float): The fraction of overlap between neighbouring tiles.
+        scales (Iterable[float]): The scale factors of the downscaled full image copies.
+
+    Returns:
+        List[Tile]: The tiles in the order they should be passed to the model.
+    """
+
+    height, width = img.shape[:2]
+    step = max(1, int(tile_size * (1 - overlap)))
+    tiles = []
+
+    for y in range(0, height, step):
+        for x in range(0, width, step):
+            tile = img[y:y + tile_size, x:x + tile_size]
+            tile_height, tile_width = tile.shape[:2]
+            tiles.append(Tile(pad_tile(tile, tile_size), x, y, 1.0, tile_width, tile_height))
+
+    for scale_factor in scales:
+        small_img = cv2.resize(img, (0, 0), fx=scale_factor, fy=scale_factor)
+        small_height, small_width = small_img.shape[:2]
+        tiles.append(Tile(small_img, 0, 0, scale_factor, small_width, small_height))
+
+    return tiles
+
+
+def image_tile(img: np.ndarray) -> Tile:
+    """The function wrapping a whole image, e.g. a video frame, as a single tile.
+
+    Args:
+        img (np.ndarray): The BGR image.
+
+    Returns:
+        Tile: The tile covering the whole image.
+    """
+
+    height, width = img.shape[:2]
+    return Tile(img, 0, 0, 1.0, width, height)
+
+
+def result_to_array(result: Any) -> np.ndarray:
+    """The function converting a single YOLO result into a detections array.
+
+    Args:
+        result (Any): The ultralytics result of one image.
+
+    Returns:
+        np.ndarray: The (N, 6) array of x1, y1, x2, y2, class_id, confidence rows.
+    """
+
+    boxes = result.boxes
+    if boxes is None or len(boxes) == 0:
+        return np.empty((0, 6), dtype=np.float32)
+
+    xyxy = boxes.xyxy.cpu().numpy()
+    cls = boxes.cls.cpu().numpy()
+    conf = boxes.conf.cpu().numpy()
+    return np.column_stack((xyxy, cls, conf)).astype(np.float32)
+
+
+def to_global(detections: np.ndarray, tile: Tile) -> np.ndarray:
+    """The function mapping tile detections to the source image coordinates.
+
+    Args:
+        detections (np.ndarray): The (N, 6) detections in tile coordinates.
+        tile (Tile): The tile the detections come from.
+
+    Returns:
+        np.ndarray: The detections in the source image coordinates.
+    """
+
+    if not len(detections):
+        return detections
+
+    mapped = detections.copy()
+    # Clip boxes reaching into the padding back to the real tile content
+    mapped[:, [0, 2]] = np.clip(mapped[:, [0, 2]], 0, tile.width)
+    mapped[:, [1, 3]] = np.clip(mapped[:, [1, 3]], 0, tile.height)
+    mapped[:, :4] /= tile.scale
+    mapped[:, [0, 2]] += tile.offset_x
+    mapped[:, [1, 3]] += tile.offset_y
+    return mapped
+
+
+def predict_tile_arrays(
+        model: Any,
+        tiles: List[Tile],
+        conf_threshold: float,
+        batch_size: int = 8,
+) -> List[np.ndarray]:
+    """The function running the model over all tiles in fixed-size batches.
+
+    Args:
+        model (Any): The YOLO model.
+        tiles (List[Tile]): The tiles built by `build_tiles`.
+        conf_threshold (float): The minimal confidence of a detection.
+        batch_size (int): The number of tiles passed to a single forward pass.
+
+    Returns:
+        List[np.ndarray]: The (N, 6) detections of every tile in the source image coordinates.
+    """
+
+    detections = []
+    batch_size = max(1, batch_size)
+
+    for start in range(0, len(tiles), batch_size):
+        batch = tiles[start:start + batch_size]
+        started = time.perf_counter()
+        results = model([tile.image for tile in batch], conf=conf_threshold, verbose=False)
+        observe_batch(len(batch), time.perf_counter() - started)
+        for tile, result in zip(batch, results):
+            detections.append(to_global(result_to_array(result), tile))
+
+    return detections
+
+
+def predict_tiles(
+        model: Any,
+        tiles: List[Tile],
+        conf_threshold: float,
+        batch_size: int = 8,
+) -> np.ndarray:
+    """The function running the model over all tiles and joining the detections.
+
+    Args:
+        model (Any): The YOLO model.
+        tiles (List[Tile]): The tiles built by `build_tiles`.
+        conf_threshold (float): The minimal confidence of a detection.
+        batch_size (int): The number of tiles passed to a single forward pass.
+
+    Returns:
+        np.ndarray: The (N, 6) detections in the source image coordinates.
+    """
+
+    return join_detections(predict_tile_arrays(model, tiles, conf_threshold, batch_size))
+
+
+def join_detections(detections: List[np.ndarray]) -> np.ndarray:
+    """The function joining detections of many tiles into one array.
+
+    Args:
+        detections (List[np.ndarray]): The (N, 6) detections of the tiles.
+
+    Returns:
+        np.ndarray: The joined (N, 6) detections.
+    """
+
+    if not detections:
+        return np.empty((0, 6), dtype=np.float32)
+    return np.concatenate(detections)
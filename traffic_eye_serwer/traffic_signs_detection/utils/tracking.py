@@ -0,0 +1,162 @@
+"""Module providing the multi-object tracker of video detections."""
+
+from dataclasses import dataclass
+from typing import List
+
+import numpy as np
+
+from utils.boxes import iou_matrix
+
+
+@dataclass
+class TrackSummary:
+    """A class representing a single physical sign followed through a video."""
+    track_id: int
+    class_id: int
+    box: tuple
+    confidence: float
+    first_seen: float
+    last_seen: float
+    hits: int
+
+
+def assign(tracks: np.ndarray, detections: np.ndarray, iou_threshold: float) -> tuple[np.ndarray, np.ndarray]:
+    """The function optimally assigning detections to tracks of the same class.
+
+    Args:
+        tracks (np.ndarray): The (T, 6) boxes of the tracks.
+        detections (np.ndarray): The (N, 6) detections.
+        iou_threshold (float): The minimal overlap of an accepted pair.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: The indices of the matched tracks and of their detections.
+    """
+
+    if not len(tracks) or not len(detections):
+        return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp)
+
+    # Deferred, scipy is only needed once a video is tracked
+    from scipy.optimize import linear_sum_assignment
+
+    iou = iou_matrix(tracks, detections)
+    iou[tracks[:, None, 4] != detections[None, :, 4]] = 0
+    track_idx, detection_idx = linear_sum_assignment(iou, maximize=True)
+    accepted = iou[track_idx, detection_idx] > iou_threshold
+    return track_idx[accepted], detection_idx[accepted]
+
+
+class Tracker:
+    """A class following detected signs from frame to frame.
+
+    The state of the live tracks is kept in arrays. Detections are
+    assigned to tracks with the Hungarian algorithm in two passes, like
+    ByteTrack: confident detections first, then the low confidence ones
+    only extend the tracks left unmatched. Only confident detections start
+    new tracks. Every track, also a finished one, is summarised once.
+
+    Tracks age by frame index rather than by update, so skipped frames,
+    e.g. between keyframes or dropped from a stream, count as well.
+    """
+
+    def __init__(
+            self,
+            high_threshold: float = 0.5,
+            low_threshold: float = 0.25,
+            iou_threshold: float = 0.5,
+            max_age: int = 5,
+    ) -> None:
+        """The initializer of the 'tracker'.
+
+        Args:
+            high_threshold (float): The confidence of detections matched first and starting tracks.
+            low_threshold (float): The confidence below which detections are ignored.
+            iou_threshold (float): The overlap above which a detection continues a track.
+            max_age (int): The number of frames a track survives without a detection.
+        """
+
+        self.high_threshold = high_threshold
+        self.low_threshold = low_threshold
+        self.iou_threshold = iou_threshold
+        self.max_age = max_age
+        self.boxes = np.empty((0, 6), dtype=np.float32)  # x1, y1, x2, y2, class_id, confidence
+        self.ids = np.empty(0, dtype=np.int64)
+        self.last_frames = np.empty(0, dtype=np.int64)  # The frame each track was last detected in
+        self.summaries: dict[int, TrackSummary] = {}
+        self._next_id = 1
+
+    def update(self, detections: np.ndarray, frame_index: int, time: float) -> np.ndarray:
+        """The method moving the tracks to the detections of the next frame.
+
+        Args:
+            detections (np.ndarray): The (N, 6) detections of the frame.
+            frame_index (int): The index of the frame, increasing between updates.
+            time (float): The time of the frame in seconds.
+
+        Returns:
+            np.ndarray: The indices of the live tracks updated by a detection in this frame.
+        """
+
+        # Drop the tracks missing for too long before they can be matched again
+        alive = frame_index - self.last_frames <= self.max_age
+        self.boxes = self.boxes[alive]
+        self.ids = self.ids[alive]
+        self.last_frames = self.last_frames[alive]
+
+        detections = detections[detections[:, 5] >= self.low_threshold]
+        high = np.flatnonzero(detections[:, 5] >= self.high_threshold)
+        low = np.flatnonzero(detections[:, 5] < self.high_threshold)
+
+        # Confident detections first
+        track_idx, detection_idx = assign(self.boxes, detections[high], self.iou_threshold)
+        detection_idx = high[detection_idx]
+
+        # Low confidence detections only continue the remaining tracks
+        unmatched_tracks = np.setdiff1d(np.arange(len(self.boxes)), track_idx)
+        second_tracks, second_detections = assign(self.boxes[unmatched_tracks], detections[low], self.iou_threshold)
+        track_idx = np.concatenate([track_idx, unmatched_tracks[second_tracks]])
+        detection_idx = np.concatenate([detection_idx, low[second_detections]])
+
+        self.last_frames[track_idx] = frame_index
+        self.boxes[track_idx] = detections[detection_idx]
+
+        new = np.setdiff1d(high, detection_idx)
+        new_ids = np.arange(self._next_id, self._next_id + len(new))
+        self._next_id += len(new)
+        self.boxes = np.concatenate([self.boxes, detections[new]])
+        self.ids = np.concatenate([self.ids, new_ids])
+        self.last_frames = np.concatenate([self.last_frames, np.full(len(new), frame_index, dtype=np.int64)])
+
+        updated = np.concatenate([track_idx, np.arange(len(self.ids) - len(new), len(self.ids))])
+        for track_id, box in zip(self.ids[updated].tolist(), self.boxes[updated].tolist()):
+            self._summarise(track_id, box, time)
+        return updated
+
+    def tracks(self) -> List[TrackSummary]:
+        """The method listing every track seen so far.
+
+        Returns:
+            List[TrackSummary]: The tracks in the order they started.
+        """
+
+        return list(self.summaries.values())
+
+    def _summarise(self, track_id: int, box: list, time: float) -> None:
+        x1, y1, x2, y2, class_id, confidence = box
+        summary = self.summaries.get(track_id)
+        if summary is None:
+            self.summaries[track_id] = TrackSummary(
+                track_id=track_id,
+                class_id=int(class_id),
+                box=(int(x1), int(y1), int(x2), int(y2)),
+                confidence=confidence,
+                first_seen=time,
+                last_seen=time,
+                hits=1,
+            )
+            return
+
+        summary.last_seen = time
+        summary.hits += 1
+        if confidence > summary.confidence:
+            summary.box = (int(x1), int(y1), int(x2), int(y2))
+            summary.confidence = confidence
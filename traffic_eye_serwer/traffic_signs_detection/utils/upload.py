@@ -0,0 +1,95 @@
+"""Module providing bounded, chunked ingestion of uploaded files."""
+
+import asyncio
+from pathlib import Path
+
+from fastapi import UploadFile
+
+CHUNK_SIZE = 1024 * 1024
+
+
+class UploadRejectedError(Exception):
+    """An exception raised when an upload is refused before it is processed."""
+
+    def __init__(self, status_code: int, detail: str) -> None:
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+def has_allowed_type(
+        file: UploadFile,
+        content_type_prefix: str,
+        allowed_extensions: set[str],
+) -> bool:
+    """The function checking the declared type of an upload before reading it.
+
+    Args:
+        file (UploadFile): The uploaded file.
+        content_type_prefix (str): The accepted MIME type prefix, e.g. `image/`.
+        allowed_extensions (set[str]): The accepted lowercase extensions with a leading dot.
+
+    Returns:
+        bool: True if either the MIME type or the extension is accepted.
+    """
+
+    content_type = file.content_type or ""
+    extension = Path(file.filename or "").suffix.lower()
+    return content_type.startswith(content_type_prefix) or extension in allowed_extensions
+
+
+async def read_upload(file: UploadFile, max_bytes: int, chunk_size: int = CHUNK_SIZE) -> bytes | None:
+    """The function reading an upload into memory in chunks up to a size limit.
+
+    Args:
+        file (UploadFile): The uploaded file.
+        max_bytes (int): The maximal accepted size of the file.
+        chunk_size (int): The size of a single read.
+
+    Returns:
+        bytes | None: The content of the file, None if it exceeds the limit.
+    """
+
+    chunks = []
+    size = 0
+    while chunk := await file.read(chunk_size):
+        size += len(chunk)
+        if size > max_bytes:
+            return None
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+async def spool_upload(
+        file: UploadFile,
+        path: Path,
+        max_bytes: int,
+        chunk_size: int = CHUNK_SIZE,
+) -> int | None:
+    """The function copying an upload to disk in fixed-size chunks.
+
+    At most one chunk of the upload is held in memory at a time.
+
+    Args:
+        file (UploadFile): The uploaded file.
+        path (Path): The destination file.
+        max_bytes (int): The maximal accepted size of the file.
+        chunk_size (int): The size of a single read.
+
+    Returns:
+        int | None: The number of bytes written, None if the upload exceeds
+            the limit, in which case the partial file is removed.
+    """
+
+    size = 0
+    with open(path, "wb") as out:
+        while chunk := await file.read(chunk_size):
+            size += len(chunk)
+            if size > max_bytes:
+                break
+            await asyncio.to_thread(out.write, chunk)
+
+    if size > max_bytes:
+        path.unlink(missing_ok=True)
+        return None
+    return size
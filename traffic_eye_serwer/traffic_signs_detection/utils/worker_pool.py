@@ -0,0 +1,385 @@
+"""Module providing a multi-process model serving pool with shared-memory frame transport.
+
+Tiles and frames are decoded and cut in the API process, then copied once
+into a shared memory slot, which the workers read in place. The copy
+replaces pickling and the pipe transfer, a decode straight into a slot
+would tie the decoders and the tiling to the slot lifecycle.
+"""
+
+import itertools
+import logging
+import multiprocessing as mp
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass
+from multiprocessing.connection import Connection, wait
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, List
+
+import numpy as np
+
+from config import config
+from utils.tiling import Tile, join_detections, result_to_array, to_global
+
+# How often the results collector checks the workers when no result arrives
+WATCH_INTERVAL_SECONDS = 0.5
+
+logger = logging.getLogger(__name__)
+
+
+def _worker_main(tasks: mp.Queue, results: Connection, threads: int) -> None:
+    """The main loop of a model worker process.
+
+    Images are read straight from the shared memory segments named in the
+    tasks, only the small detection arrays travel back through the pipe.
+    """
+
+    from core.config_model import get_model
+
+    if threads:
+        import torch
+        torch.set_num_threads(threads)
+
+    model = get_model()
+    segments = {}
+
+    while True:
+        task = tasks.get()
+        if task is None:
+            break
+
+        task_id, segment_name, layouts, conf_threshold = task
+        try:
+            if segment_name not in segments:
+                segments[segment_name] = SharedMemory(name=segment_name)
+            buffer = segments[segment_name].buf
+            images = [
+                np.ndarray(shape, dtype=np.uint8, buffer=buffer, offset=offset)
+                for offset, shape in layouts
+            ]
+            detections = [result_to_array(result) for result in model(images, conf=conf_threshold, verbose=False)]
+            results.send((task_id, detections, None))
+        except Exception as e:
+            results.send((task_id, None, repr(e)))
+
+    for segment in segments.values():
+        try:
+            segment.close()
+        except BufferError:
+            # The predictor may still reference the last batch, the OS releases it on exit
+            pass
+
+
+@dataclass
+class _Worker:
+    process: Any
+    tasks: mp.Queue
+    results: Connection
+
+
+@dataclass
+class _Task:
+    future: Future
+    segment: SharedMemory
+    worker: int
+    submitted: float
+
+
+class ModelWorkerPool:
+    """A class serving the model from several worker processes.
+
+    Every worker loads the weights once. Images are copied into
+    preallocated shared memory slots instead of being pickled, so a frame
+    crosses to a worker with a single copy and is read there in place.
+
+    Each worker has its own task queue and result pipe, so the pool knows
+    the tasks a worker holds. A worker which exits, e.g. killed for running
+    out of memory, or which holds a task longer than `task_timeout`, is
+    replaced: its tasks fail, their slots are freed and a new worker starts.
+    """
+
+    def __init__(
+            self,
+            workers: int = 2,
+            slots: int = 8,
+            slot_bytes: int = 32 * 1024 * 1024,
+            batch_size: int = 8,
+            threads_per_worker: int = 0,
+            task_timeout: float = 120,
+    ) -> None:
+        """The initializer of the 'model worker pool'.
+
+        Args:
+            workers (int): The number of model worker processes.
+            slots (int): The number of shared memory slots, limiting the tasks in flight.
+            slot_bytes (int): The size of a single shared memory slot.
+            batch_size (int): The maximal number of images in one task.
+            threads_per_worker (int): The number of torch threads per worker, 0 keeps the default.
+            task_timeout (float): The seconds a task may wait for a slot or for its worker.
+        """
+
+        self._context = mp.get_context("spawn")
+        self.batch_size = max(1, batch_size)
+        self.slot_bytes = slot_bytes
+        self.threads_per_worker = threads_per_worker
+        self.task_timeout = task_timeout
+        self._segments = [SharedMemory(create=True, size=slot_bytes) for _ in range(slots)]
+        self._free: queue.Queue[SharedMemory] = queue.Queue()
+        for segment in self._segments:
+            self._free.put(segment)
+
+        self._lock = threading.Lock()
+        self._ids = itertools.count()
+        self._pending: dict[int, _Task] = {}
+        self._closed = False
+        self.restarts = 0
+
+        self._workers = [self._spawn(index) for index in range(max(1, workers))]
+        self._collector = threading.Thread(target=self._collect, name="model-pool-results", daemon=True)
+        self._collector.start()
+
+    def predict_images(self, images: List[np.ndarray], conf_threshold: float) -> List[np.ndarray]:
+        """The method running images through the worker processes.
+
+        Args:
+            images (List[np.ndarray]): The BGR images.
+            conf_threshold (float): The minimal confidence of a detection.
+
+        Raises:
+            ValueError: If a single image does not fit into a shared memory slot.
+            TimeoutError: If no slot frees up or a worker does not answer in time.
+            RuntimeError: If the model fails or its worker exits.
+
+        Returns:
+            List[np.ndarray]: The (N, 6) detections of every image in its own coordinates.
+        """
+
+        futures = [self._submit(chunk, conf_threshold) for chunk in self._chunks(images)]
+        # The collector fails overdue tasks, the margin only guards against a stuck collector
+        deadline = time.monotonic() + self.task_timeout + 4 * WATCH_INTERVAL_SECONDS
+        return [
+            detections
+            for future in futures
+            for detections in future.result(timeout=max(0.0, deadline - time.monotonic()))
+        ]
+
+    def predict(self, tiles: List[Tile], conf_threshold: float) -> np.ndarray:
+        """The method running tiles through the worker processes.
+
+        Args:
+            tiles (List[Tile]): The tiles built by `build_tiles`.
+            conf_threshold (float): The minimal confidence of a detection.
+
+        Returns:
+            np.ndarray: The (N, 6) detections in the source image coordinates.
+        """
+
+        detections = self.predict_images([tile.image for tile in tiles], conf_threshold)
+        return join_detections([to_global(tile_detections, tile) for tile_detections, tile in zip(detections, tiles)])
+
+    def shutdown(self) -> None:
+        """The method stopping the workers and releasing the shared memory."""
+
+        with self._lock:
+            self._closed = True
+            workers = list(self._workers)
+        self._collector.join()
+
+        for worker in workers:
+            worker.tasks.put(None)
+        for worker in workers:
+            worker.process.join(timeout=self.task_timeout)
+            if worker.process.is_alive():
+                worker.process.kill()
+                worker.process.join()
+            worker.results.close()
+        self._fail_pending(lambda task: True, RuntimeError("Model worker pool was shut down"))
+
+        for segment in self._segments:
+            segment.close()
+            segment.unlink()
+
+    def _spawn(self, index: int) -> _Worker:
+        tasks = self._context.Queue()
+        results, results_writer = self._context.Pipe(duplex=False)
+        process = self._context.Process(
+            target=_worker_main,
+            args=(tasks, results_writer, self.threads_per_worker),
+            name=f"model-worker-{index}",
+            daemon=True,
+        )
+        process.start()
+        # Only the worker keeps the writing end, so its exit closes the pipe
+        results_writer.close()
+        return _Worker(process, tasks, results)
+
+    def _chunks(self, images: List[np.ndarray]) -> List[List[np.ndarray]]:
+        chunks = []
+        chunk = []
+        chunk_bytes = 0
+
+        for image in images:
+            if image.nbytes > self.slot_bytes:
+                raise ValueError(f"Image of {image.nbytes} bytes does not fit into a {self.slot_bytes} bytes slot")
+            if chunk and (len(chunk) == self.batch_size or chunk_bytes + image.nbytes > self.slot_bytes):
+                chunks.append(chunk)
+                chunk = []
+                chunk_bytes = 0
+            chunk.append(image)
+            chunk_bytes += image.nbytes
+
+        if chunk:
+            chunks.append(chunk)
+        return chunks
+
+    def _submit(self, images: List[np.ndarray], conf_threshold: float) -> Future:
+        try:
+            segment = self._free.get(timeout=self.task_timeout)
+        except queue.Empty:
+            raise TimeoutError(f"No shared memory slot freed up in {self.task_timeout} s")
+
+        layouts = []
+        offset = 0
+        for image in images:
+            # Crops are strided views, they are copied straight into the slot without a contiguous copy first
+            np.copyto(np.ndarray(image.shape, dtype=np.uint8, buffer=segment.buf, offset=offset), image, casting="unsafe")
+            layouts.append((offset, image.shape))
+            offset += image.nbytes
+
+        future = Future()
+        with self._lock:
+            if self._closed:
+                self._free.put(segment)
+                raise RuntimeError("Model worker pool was shut down")
+            # The least busy worker, a replaced worker is picked up under the same lock
+            loads = [0] * len(self._workers)
+            for task in self._pending.values():
+                loads[task.worker] += 1
+            index = loads.index(min(loads))
+            task_id = next(self._ids)
+            self._pending[task_id] = _Task(future, segment, index, time.monotonic())
+            self._workers[index].tasks.put((task_id, segment.name, layouts, conf_threshold))
+        return future
+
+    def _collect(self) -> None:
+        while True:
+            with self._lock:
+                if self._closed:
+                    return
+                workers = list(self._workers)
+
+            ready = wait(
+                [worker.results for worker in workers] + [worker.process.sentinel for worker in workers],
+                timeout=WATCH_INTERVAL_SECONDS,
+            )
+            for index, worker in enumerate(workers):
+                if worker.results in ready:
+                    self._drain(worker)
+                if not worker.process.is_alive() or self._overdue(index):
+                    self._replace(index, worker)
+
+    def _drain(self, worker: _Worker) -> None:
+        try:
+            while worker.results.poll():
+                self._finish(*worker.results.recv())
+        except (EOFError, OSError):
+            # The worker exited, the liveness check replaces it
+            pass
+
+    def _finish(self, task_id: int, detections: List[np.ndarray] | None, error: str | None) -> None:
+        with self._lock:
+            task = self._pending.pop(task_id, None)
+        if task is None:
+            return
+        self._free.put(task.segment)
+
+        if error is not None:
+            task.future.set_exception(RuntimeError(f"Model worker failed: {error}"))
+        else:
+            task.future.set_result(detections)
+
+    def _overdue(self, index: int) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            return any(task.worker == index and now - task.submitted > self.task_timeout for task in self._pending.values())
+
+    def _replace(self, index: int, worker: _Worker) -> None:
+        if worker.process.is_alive():
+            worker.process.kill()
+            reason = f"did not answer in {self.task_timeout} s"
+        else:
+            reason = f"exited with code {worker.process.exitcode}"
+        worker.process.join()
+        # Results sent before the exit are still valid
+        self._drain(worker)
+        logger.error("Model worker %d %s, restarting it", index, reason)
+
+        with self._lock:
+            if not self._closed:
+                self._workers[index] = self._spawn(index)
+                self.restarts += 1
+        self._fail_pending(lambda task: task.worker == index, RuntimeError(f"Model worker {index} {reason}"))
+        worker.results.close()
+        # The queue may be half-read by the dead worker, its feeder must not block the exit
+        worker.tasks.cancel_join_thread()
+        worker.tasks.close()
+
+    def _fail_pending(self, selected: Any, error: Exception) -> None:
+        with self._lock:
+            tasks = [self._pending.pop(task_id) for task_id, task in list(self._pending.items()) if selected(task)]
+        for task in tasks:
+            # The worker holding the slot is gone, so it can be written again
+            self._free.put(task.segment)
+            task.future.set_exception(error)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def start_worker_pool() -> ModelWorkerPool:
+    """The function starting the model worker pool, once, in the API process.
+
+    Returns:
+        ModelWorkerPool: The started pool.
+    """
+
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ModelWorkerPool(
+                workers=config.MODEL_WORKERS,
+                slots=config.SHARED_MEMORY_SLOTS,
+                slot_bytes=config.SHARED_MEMORY_SLOT_MB * 1024 * 1024,
+                batch_size=config.DETECTION_BATCH_SIZE,
+                threads_per_worker=config.MODEL_WORKER_THREADS,
+                task_timeout=config.MODEL_WORKER_TASK_TIMEOUT_SECONDS,
+            )
+    return _pool
+
+
+def get_worker_pool() -> ModelWorkerPool:
+    """The function returning the model worker pool started by `start_worker_pool`.
+
+    Raises:
+        RuntimeError: If the pool was not started in this process.
+
+    Returns:
+        ModelWorkerPool: The started pool.
+    """
+
+    if _pool is None:
+        raise RuntimeError("Model worker pool is not started, it is started with the app")
+    return _pool
+
+
+def shutdown_worker_pool() -> None:
+    """The function stopping the model worker pool if it was started."""
+
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown()
+            _pool = None